@@ -0,0 +1,230 @@
+"""
+Output artifact store for Bank Statement API
+Keeps generated downloads (CSV files) under collision-free names, expiring them
+after a TTL and evicting the least recently used ones above a total size cap.
+Artifacts live in a managed directory ('disk') or in process memory ('memory');
+in 'stream' mode nothing is stored and outputs are streamed to the client.
+"""
+
+import asyncio
+import io
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Only files named like this are adopted (and swept) in the output directory
+ARTIFACT_PREFIX = "bank_statement_"
+
+OUTPUT_MODES = ("disk", "memory", "stream")
+
+
+class Artifact:
+    """A stored output: a file in the output directory or bytes held in memory"""
+
+    def __init__(self, name: str, size: int, path: Optional[str] = None, data: Optional[bytes] = None,
+                 created_at: Optional[float] = None):
+        self.name = name
+        self.size = size
+        self.path = path
+        self.data = data
+        self.created_at = time.time() if created_at is None else created_at
+        self.pins = 0  # responses still sending the artifact; pinned artifacts are never evicted
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "bytes": self.size, "created_at": self.created_at}
+
+
+class ArtifactStore:
+    """Size-capped LRU store of output artifacts with a TTL and a background sweeper"""
+
+    def __init__(self, mode: str, directory: str, ttl_seconds: float, max_bytes: int,
+                 sweep_interval: float = 60, metrics: Optional[Any] = None):
+        """
+        Args:
+            mode: 'disk', 'memory' or 'stream' (nothing is stored)
+            directory: Output directory for the disk mode; existing artifacts in it are adopted
+            ttl_seconds: Age after which artifacts are removed, 0 = no expiry
+            max_bytes: Total size above which least recently used artifacts are evicted
+            sweep_interval: Seconds between background sweeps
+            metrics: Optional MetricsRegistry counting evictions by reason
+        """
+        mode = mode.lower()
+        if mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown output store mode: {mode}")
+        self.mode = mode
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.metrics = metrics
+        self._entries: "OrderedDict[str, Artifact]" = OrderedDict()  # least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._sweeper: Optional[asyncio.Task] = None
+        if mode == "disk":
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._adopt_existing()
+
+    @property
+    def stores(self) -> bool:
+        """False in 'stream' mode, where outputs are never written"""
+        return self.mode != "stream"
+
+    def _adopt_existing(self) -> None:
+        """Index artifacts left by an earlier process so the TTL and size cap apply to them"""
+        files = []
+        for path in self.directory.glob(f"{ARTIFACT_PREFIX}*"):
+            if path.is_file() and not path.name.endswith(".tmp"):
+                stat = path.stat()
+                files.append((stat.st_mtime, path.name, stat.st_size))
+        for mtime, name, size in sorted(files):
+            self._entries[name] = Artifact(name, size, path=str(self.directory / name), created_at=mtime)
+            self._bytes += size
+
+    @staticmethod
+    def unique_name(extension: str) -> str:
+        """A timestamped name that cannot collide with another request's, e.g. bank_statement_20240101_120000_1a2b3c4d5e6f.csv"""
+        return f"{ARTIFACT_PREFIX}{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:12]}{extension}"
+
+    def save(self, name: str, write: Callable[[BinaryIO], None], pin: bool = False) -> Artifact:
+        """
+        Create an artifact by calling write with a binary file to fill
+
+        Blocking: run it on an executor. A pinned artifact is protected from eviction
+        until release() is called, e.g. after its response has been sent.
+        """
+        if not self.stores:
+            raise RuntimeError("The output store is in 'stream' mode and keeps no artifacts")
+        if self.mode == "disk":
+            path = self.directory / name
+            temp_path = path.with_name(path.name + ".tmp")
+            try:
+                with open(temp_path, "wb") as handle:
+                    write(handle)
+                os.replace(temp_path, path)
+            except BaseException:
+                temp_path.unlink(missing_ok=True)
+                raise
+            artifact = Artifact(name, path.stat().st_size, path=str(path))
+        else:
+            buffer = io.BytesIO()
+            write(buffer)
+            data = buffer.getvalue()
+            artifact = Artifact(name, len(data), data=data)
+
+        with self._lock:
+            artifact.pins = 1 if pin else 0
+            previous = self._entries.pop(name, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[name] = artifact
+            self._bytes += artifact.size
+            evicted = self._evict_over_size()
+        self._remove(evicted, "size")
+        return artifact
+
+    def get(self, name: str, pin: bool = False) -> Optional[Artifact]:
+        """The artifact if it exists and has not expired, marked as recently used"""
+        with self._lock:
+            artifact = self._entries.get(name)
+            if artifact is None or self._expired(artifact, time.time()):
+                return None
+            self._entries.move_to_end(name)
+            if pin:
+                artifact.pins += 1
+            return artifact
+
+    def release(self, artifact: Artifact) -> None:
+        """Unpin an artifact once its response is done"""
+        with self._lock:
+            artifact.pins = max(0, artifact.pins - 1)
+
+    def delete(self, name: str) -> bool:
+        with self._lock:
+            artifact = self._entries.pop(name, None)
+            if artifact is None:
+                return False
+            self._bytes -= artifact.size
+        self._remove([artifact], "deleted")
+        return True
+
+    def _expired(self, artifact: Artifact, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - artifact.created_at > self.ttl_seconds
+
+    def _evict_over_size(self) -> List[Artifact]:
+        """Pop least recently used, unpinned artifacts until the store fits max_bytes (lock held)"""
+        evicted = []
+        for name in list(self._entries):
+            if self._bytes <= self.max_bytes:
+                break
+            artifact = self._entries[name]
+            if artifact.pins:
+                continue
+            del self._entries[name]
+            self._bytes -= artifact.size
+            evicted.append(artifact)
+        return evicted
+
+    def _remove(self, artifacts: List[Artifact], reason: str) -> None:
+        for artifact in artifacts:
+            if artifact.path is not None:
+                try:
+                    os.unlink(artifact.path)
+                except FileNotFoundError:
+                    pass
+            artifact.data = None
+            if self.metrics is not None and reason != "deleted":
+                self.metrics.inc("output_evictions_total", reason=reason)
+
+    def sweep(self) -> int:
+        """Remove expired artifacts and enforce the size cap; returns the number removed"""
+        now = time.time()
+        with self._lock:
+            expired = [artifact for artifact in self._entries.values()
+                       if not artifact.pins and self._expired(artifact, now)]
+            for artifact in expired:
+                del self._entries[artifact.name]
+                self._bytes -= artifact.size
+            evicted = self._evict_over_size()
+        self._remove(expired, "ttl")
+        self._remove(evicted, "size")
+        return len(expired) + len(evicted)
+
+    async def start(self) -> None:
+        """Start the background sweeper on the running event loop"""
+        if self.stores and self.sweep_interval > 0 and self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+    async def _sweep_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                removed = await loop.run_in_executor(None, self.sweep)
+                if removed:
+                    logger.info(f"Output store sweep removed {removed} artifacts")
+            except Exception:
+                logger.exception("Output store sweep failed")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "artifacts": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
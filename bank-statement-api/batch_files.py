@@ -0,0 +1,103 @@
+"""
+Multi-file batch helpers for Bank Statement API
+Expands uploaded PDFs and ZIP archives into statements and assembles the
+per-file results into merged or per-file outputs
+"""
+
+import io
+import zipfile
+from pathlib import PurePosixPath
+from typing import Any, Dict, List, Tuple
+
+from transactions import TransactionTable
+from uploads import StoredPdf, UploadTooLargeError, store_pdf_stream
+
+SOURCE_COLUMN = "source_file"
+
+
+def expand_uploads(uploads: List[Tuple[str, StoredPdf]], max_files: int, max_file_size: int,
+                   temp_dir: str) -> List[Tuple[str, StoredPdf]]:
+    """
+    Turn stored uploads into a list of (source name, stored PDF)
+
+    PDFs are used as-is; every PDF inside a ZIP archive is streamed to its own
+    temporary file and named by its path in the archive. Other archive members are
+    ignored. The uploads themselves are left to the caller to remove; on error the
+    PDFs extracted so far are removed.
+
+    Raises:
+        UploadTooLargeError: When an archived PDF is larger than max_file_size
+        ValueError: On unsupported files, invalid archives or too many files
+    """
+    statements = []
+    extracted = []
+    try:
+        for filename, upload in uploads:
+            lower_name = filename.lower()
+            if lower_name.endswith(".pdf"):
+                statements.append((filename, upload))
+            elif lower_name.endswith(".zip"):
+                try:
+                    archive = zipfile.ZipFile(upload.path)
+                except zipfile.BadZipFile:
+                    raise ValueError(f"{filename} is not a valid ZIP archive")
+                with archive:
+                    for info in archive.infolist():
+                        member = PurePosixPath(info.filename)
+                        if info.is_dir() or member.suffix.lower() != ".pdf" or "__MACOSX" in member.parts:
+                            continue
+                        source = f"{filename}/{info.filename}"
+                        # The declared size is checked first; the streamed size is what counts
+                        if info.file_size > max_file_size:
+                            raise UploadTooLargeError(source, max_file_size)
+                        with archive.open(info) as member_stream:
+                            pdf = store_pdf_stream(member_stream, source, max_file_size, temp_dir)
+                        extracted.append(pdf)
+                        statements.append((source, pdf))
+                        if len(statements) > max_files:
+                            break
+            else:
+                raise ValueError(f"{filename}: only PDF and ZIP files are supported")
+
+            if len(statements) > max_files:
+                raise ValueError(f"A batch may contain at most {max_files} PDF files")
+    except BaseException:
+        for pdf in extracted:
+            pdf.delete()
+        raise
+
+    if not statements:
+        raise ValueError("No PDF files found in the upload")
+    return statements
+
+
+def merged_rows(file_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """All transactions of successful files, in upload order, tagged with their source file"""
+    rows = []
+    for file_result in file_results:
+        for row in file_result.get("data") or []:
+            rows.append({SOURCE_COLUMN: file_result["source"], **row})
+    return rows
+
+
+def rows_to_csv(rows: List[Dict[str, Any]], columns: List[str], types: Dict[str, str]) -> str:
+    """CSV of rows through a TransactionTable, typed like every other output (types by column name)"""
+    return TransactionTable.from_rows(rows, columns, types).to_csv()
+
+
+def per_file_csv_zip(file_results: List[Dict[str, Any]], columns: List[str], types: Dict[str, str]) -> bytes:
+    """ZIP archive with one CSV per successfully processed file"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        used_names = set()
+        for file_result in file_results:
+            if file_result["status"] != "completed":
+                continue
+            name = PurePosixPath(file_result["source"]).stem + ".csv"
+            suffix = 1
+            while name in used_names:
+                suffix += 1
+                name = f"{PurePosixPath(file_result['source']).stem}_{suffix}.csv"
+            used_names.add(name)
+            archive.writestr(name, rows_to_csv(file_result["data"], columns, types))
+    return buffer.getvalue()
@@ -0,0 +1,91 @@
+"""
+Multi-page LLM batching for Bank Statement API
+Packs consecutive pages into one chat request within a token and payload budget,
+and maps the page-keyed response back to individual pages
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for prompt text (about four characters per token)"""
+    return (len(text) + 3) // 4
+
+
+def plan_batches(pages: List[tuple], max_pages: int, token_budget: int, image_tokens: int) -> List[List[tuple]]:
+    """
+    Group consecutive pages into batches
+
+    A batch grows until it holds max_pages pages or adding the next page would
+    exceed the token budget. A page that exceeds the budget on its own is sent alone.
+
+    Args:
+        pages: (page_index, html_content, page_image) tuples in page order
+        max_pages: Maximum pages per batch (1 disables batching)
+        token_budget: Estimated prompt tokens allowed per batch, excluding the instructions
+        image_tokens: Estimated tokens per page image
+
+    Returns:
+        List of batches, each a list of page tuples, in page order
+    """
+    batches = []
+    current, current_tokens = [], 0
+    for page in pages:
+        page_tokens = estimate_tokens(page[1]) + image_tokens
+        if current and (len(current) >= max_pages or current_tokens + page_tokens > token_budget):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(page)
+        current_tokens += page_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def split_by_payload(batch: List[tuple], image_urls: List[str], max_bytes: int) -> List[List[int]]:
+    """
+    Split a rendered batch so the image and HTML payload of each part stays under max_bytes
+
+    Returns:
+        Lists of positions into batch, halving oversized parts until they fit or hold one page
+    """
+    def size(positions):
+        return sum(len(image_urls[pos]) + len(batch[pos][1]) for pos in positions)
+
+    pending, parts = [list(range(len(batch)))], []
+    while pending:
+        positions = pending.pop(0)
+        if len(positions) > 1 and size(positions) > max_bytes:
+            middle = len(positions) // 2
+            pending[:0] = [positions[:middle], positions[middle:]]
+        else:
+            parts.append(positions)
+    return parts
+
+
+def parse_batch_response(response_content: str, page_numbers: List[int]) -> Optional[Dict[int, List[Dict[str, Any]]]]:
+    """
+    Parse a batched chat response of the form {"pages": {"<page number>": [...], ...}}
+
+    Returns:
+        Dict of page number -> transactions, or None if the response is malformed
+        or any requested page is missing
+    """
+    try:
+        result = json.loads(response_content)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(result, dict):
+        return None
+    pages = result.get("pages", result)
+    if not isinstance(pages, dict):
+        return None
+
+    parsed = {}
+    for page_number in page_numbers:
+        rows = pages.get(str(page_number))
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return None
+        parsed[page_number] = rows
+    return parsed
@@ -0,0 +1,83 @@
+"""
+Multi-page LLM batching benchmark
+
+Processes the same statement in single-page mode and in batch mode and
+reports chat calls, tokens and latency per extracted transaction from the
+request's processing report. The fast path is disabled so every page goes
+to the LLM.
+
+By default the local FakeMistral stand-in is used; its token counts are
+estimated from the prompt text and a fixed cost per image. With --pdf and
+a MISTRAL_API_KEY the live API is measured instead.
+
+Usage:
+    python benchmarks/bench_batching.py --pages 12 --chat-latency 0.8
+    MISTRAL_API_KEY=... python benchmarks/bench_batching.py --pdf statement.pdf
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+from config import Config  # noqa: E402
+from fake_mistral import SAMPLE_TRANSACTIONS, FakeMistral, fake_page_renderer  # noqa: E402
+from report import ProcessingReport  # noqa: E402
+
+COLUMNS = list(SAMPLE_TRANSACTIONS[0])
+
+
+async def run_mode(pdf_bytes: bytes, llm_batch: bool) -> dict:
+    report = ProcessingReport()
+    started = time.perf_counter()
+    results = await main.processor.process_bank_statement(
+        pdf_bytes, "statement.pdf", COLUMNS, use_cache=False, fast_path=False, llm_batch=llm_batch, report=report
+    )
+    usage = report.llm_usage()
+    usage["wall_seconds"] = round(time.perf_counter() - started, 3)
+    usage["total_transactions"] = len(results)
+    return usage
+
+
+async def run(args) -> dict:
+    if args.pdf:
+        pdf_bytes = args.pdf.read_bytes()
+    else:
+        main.processor.client = FakeMistral(
+            pages=args.pages, ocr_latency=0, chat_latency=args.chat_latency,
+            malformed_batches=args.malformed_batches
+        )
+        main.processor.render_page_image = fake_page_renderer(0)
+        pdf_bytes = b"%PDF-1.4 benchmark"
+
+    Config.LLM_BATCH_MAX_PAGES = args.batch_pages
+    single = await run_mode(pdf_bytes, llm_batch=False)
+    batch = await run_mode(pdf_bytes, llm_batch=True)
+    return {
+        "source": str(args.pdf) if args.pdf else "fake",
+        "batch_pages": args.batch_pages,
+        "single": single,
+        "batch": batch,
+        "token_reduction": round(1 - batch["tokens_per_transaction"] / max(single["tokens_per_transaction"], 1e-9), 3),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", type=Path, help="Statement to process with the live Mistral API")
+    parser.add_argument("--pages", type=int, default=12, help="Pages of the fake statement")
+    parser.add_argument("--chat-latency", type=float, default=0.5, help="Fake chat latency in seconds")
+    parser.add_argument("--batch-pages", type=int, default=Config.LLM_BATCH_MAX_PAGES, help="Maximum pages per request")
+    parser.add_argument("--malformed-batches", action="store_true",
+                        help="Make the fake answer batched prompts with a malformed response")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
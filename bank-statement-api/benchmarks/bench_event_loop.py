@@ -0,0 +1,105 @@
+"""
+Event loop responsiveness benchmark for the FastAPI endpoints
+
+Fires concurrent uploads at /process-bank-statement-json against the local
+FakeMistral stand-in while probing /health, and reports /health latency and
+upload throughput as JSON.
+
+Usage:
+    python benchmarks/bench_event_loop.py --uploads 8 --pages 10
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("API_REQUESTS_PER_SECOND", "0")
+os.environ.setdefault("FAST_PATH_ENABLED", "false")  # every page goes to the (fake) LLM
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+from fake_mistral import FakeMistral, fake_page_renderer  # noqa: E402
+
+COLUMNS = json.dumps([{"id": str(idx), "name": name} for idx, name in enumerate(
+    ["Date", "Narration", "Withdrawal Amt.", "Deposit Amt.", "Closing Balance"])])
+
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event, latencies: list, interval: float):
+    """Probe /health, measuring latency from when the probe was due (includes event loop stalls)"""
+    while True:
+        due = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        await client.get("/health")
+        latencies.append(time.perf_counter() - due)
+        if stop.is_set():
+            break
+
+
+async def upload(client: httpx.AsyncClient) -> float:
+    started = time.perf_counter()
+    response = await client.post(
+        "/process-bank-statement-json",
+        files={"file": ("statement.pdf", b"%PDF-1.4 benchmark", "application/pdf")},
+        data={"columns": COLUMNS},
+    )
+    response.raise_for_status()
+    if not response.json().get("transactions"):
+        raise RuntimeError(f"Upload failed: {response.text}")
+    return time.perf_counter() - started
+
+
+async def run(args) -> dict:
+    main.processor.client = FakeMistral(pages=args.pages, ocr_latency=args.ocr_latency,
+                                        chat_latency=args.chat_latency)
+    main.processor.render_page_image = fake_page_renderer(args.render_latency)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        stop = asyncio.Event()
+        health_latencies = []
+        prober = asyncio.create_task(probe_health(client, stop, health_latencies, args.probe_interval))
+
+        started = time.perf_counter()
+        upload_latencies = await asyncio.gather(*(upload(client) for _ in range(args.uploads)))
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        await prober
+
+    health_ms = sorted(latency * 1000 for latency in health_latencies)
+    return {
+        "uploads": args.uploads,
+        "pages_per_upload": args.pages,
+        "wall_time_s": round(elapsed, 3),
+        "uploads_per_s": round(args.uploads / elapsed, 3),
+        "upload_latency_mean_s": round(statistics.mean(upload_latencies), 3),
+        "health_probes": len(health_ms),
+        "health_p50_ms": round(statistics.median(health_ms), 2),
+        "health_p95_ms": round(health_ms[int(0.95 * (len(health_ms) - 1))], 2),
+        "health_max_ms": round(health_ms[-1], 2),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=8, help="Concurrent uploads")
+    parser.add_argument("--pages", type=int, default=10, help="Pages per statement")
+    parser.add_argument("--ocr-latency", type=float, default=0.5, help="Simulated OCR latency (s)")
+    parser.add_argument("--chat-latency", type=float, default=0.5, help="Simulated chat latency (s)")
+    parser.add_argument("--render-latency", type=float, default=0.02, help="Simulated render time per page (s)")
+    parser.add_argument("--probe-interval", type=float, default=0.05, help="Delay between /health probes (s)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(run(parse_args())), indent=2))
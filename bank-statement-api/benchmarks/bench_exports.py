@@ -0,0 +1,78 @@
+"""
+Export format benchmark
+
+Encodes the transactions of synthetic statements (the corpus.py fixtures, 30
+rows per page) as CSV, JSON, Parquet, Arrow IPC and XLSX from the same
+TransactionTable and reports output size and median encode time per format.
+Parquet and Arrow are skipped when pyarrow is not installed.
+
+Usage:
+    python benchmarks/bench_exports.py
+    python benchmarks/bench_exports.py --pages 10,100,3334 --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARK_DIR.parent))
+
+from corpus import COLUMNS, generate_rows  # noqa: E402
+from exports import EXPORT_FORMATS, ExportUnavailableError, check_available, export_chunks  # noqa: E402
+from main import processor  # noqa: E402
+from transactions import TransactionTable  # noqa: E402
+
+ROWS_PER_PAGE = 30
+
+
+def encoders(table: TransactionTable) -> dict:
+    formats = {
+        "csv": lambda: table.to_csv().encode("utf-8"),
+        "json": lambda: table.to_json(add_ids=True).encode("utf-8"),
+    }
+    for output_format in EXPORT_FORMATS:
+        try:
+            check_available(output_format)
+        except ExportUnavailableError:
+            continue
+        formats[output_format] = lambda output_format=output_format: b"".join(export_chunks(table, output_format))
+    return formats
+
+
+def measure(encode, repeat: int) -> dict:
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        data = encode()
+        durations.append(time.perf_counter() - started)
+    return {"bytes": len(data), "ms": round(statistics.median(durations) * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="10,100,3334", help="Comma-separated statement sizes in pages")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = []
+    for pages in [int(size) for size in args.pages.split(",")]:
+        table = TransactionTable(COLUMNS, processor.column_types(COLUMNS))
+        for rows in generate_rows(pages, ROWS_PER_PAGE, args.seed):
+            table.extend(rows)
+        formats = {name: measure(encode, args.repeat) for name, encode in encoders(table).items()}
+        csv_bytes = formats["csv"]["bytes"]
+        for result in formats.values():
+            result["size_vs_csv"] = round(result["bytes"] / csv_bytes, 2)
+        results.append({"pages": pages, "rows": len(table), "formats": formats})
+
+    missing = [name for name in EXPORT_FORMATS if name not in results[0]["formats"]] if results else []
+    print(json.dumps({"results": results, "unavailable": missing}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
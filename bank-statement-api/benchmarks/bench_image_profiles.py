@@ -0,0 +1,124 @@
+"""
+Page image profile benchmark
+
+For each image profile, renders every page of a local fixture set and reports
+encode time and payload size. With --extract, also runs the full extraction
+against the live Mistral API and scores the transactions against the expected
+output, so the cheapest profile that keeps accuracy can be chosen.
+
+Fixture layout (one pair per statement):
+    fixtures/<name>.pdf
+    fixtures/<name>.expected.json   {"columns": [...], "transactions": [{...}, ...]}
+
+Usage:
+    python benchmarks/bench_image_profiles.py --fixtures benchmarks/fixtures
+    MISTRAL_API_KEY=... python benchmarks/bench_image_profiles.py --fixtures benchmarks/fixtures --extract
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pdf2image import pdfinfo_from_path  # noqa: E402
+
+from imaging import IMAGE_PROFILE_PRESETS, ImageProfile  # noqa: E402
+from main import processor  # noqa: E402
+
+
+def normalize_cell(value) -> str:
+    text = "" if value is None else str(value)
+    return re.sub(r"[\s,₹$]+", "", text).lower()
+
+
+def score_transactions(expected: list, actual: list, columns: list) -> dict:
+    """Row-level precision, recall and F1 comparing normalized cell values"""
+    def as_rows(transactions):
+        return Counter(
+            tuple(normalize_cell(row.get(col)) for col in columns)
+            for row in transactions if isinstance(row, dict)
+        )
+
+    expected_rows, actual_rows = as_rows(expected), as_rows(actual)
+    matched = sum((expected_rows & actual_rows).values())
+    precision = matched / max(sum(actual_rows.values()), 1)
+    recall = matched / max(sum(expected_rows.values()), 1)
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": round(precision, 4), "recall": round(recall, 4), "f1": round(f1, 4)}
+
+
+def load_fixtures(directory: Path) -> list:
+    fixtures = []
+    for pdf_path in sorted(directory.glob("*.pdf")):
+        expected_path = pdf_path.with_suffix(".expected.json")
+        expected = json.loads(expected_path.read_text()) if expected_path.exists() else None
+        fixtures.append((pdf_path, expected))
+    return fixtures
+
+
+def measure_encoding(profile: ImageProfile, fixtures: list) -> dict:
+    pages = 0
+    payload_bytes = 0
+    started = time.perf_counter()
+    for pdf_path, _ in fixtures:
+        page_count = pdfinfo_from_path(str(pdf_path))["Pages"]
+        for _, image_data in processor.iter_pdf_images(str(pdf_path), list(range(page_count)), profile=profile):
+            pages += 1
+            payload_bytes += len(image_data["image_url"])
+    elapsed = time.perf_counter() - started
+    return {
+        "pages": pages,
+        "encode_ms_per_page": round(1000 * elapsed / max(pages, 1), 1),
+        "payload_kb_per_page": round(payload_bytes / 1024 / max(pages, 1), 1),
+    }
+
+
+async def measure_accuracy(profile: ImageProfile, fixtures: list) -> dict:
+    scores = []
+    started = time.perf_counter()
+    for pdf_path, expected in fixtures:
+        if not expected:
+            continue
+        transactions = await processor.process_bank_statement(
+            pdf_path.read_bytes(), pdf_path.name, expected["columns"], image_profile=profile
+        )
+        scores.append(score_transactions(expected["transactions"], transactions, expected["columns"]))
+    if not scores:
+        return {}
+    return {
+        "extract_seconds": round(time.perf_counter() - started, 2),
+        **{metric: round(sum(score[metric] for score in scores) / len(scores), 4)
+           for metric in ("precision", "recall", "f1")},
+    }
+
+
+async def run(args) -> list:
+    fixtures = load_fixtures(Path(args.fixtures))
+    if not fixtures:
+        raise SystemExit(f"No PDF fixtures found in {args.fixtures}")
+
+    profiles = {"configured": ImageProfile.from_config(), **IMAGE_PROFILE_PRESETS}
+    results = []
+    for name, profile in profiles.items():
+        result = {"profile": name, **profile.to_dict(), **measure_encoding(profile, fixtures)}
+        if args.extract:
+            result.update(await measure_accuracy(profile, fixtures))
+        results.append(result)
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=str(Path(__file__).parent / "fixtures"), help="Fixture directory")
+    parser.add_argument("--extract", action="store_true", help="Run live extraction and score accuracy")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(run(parse_args())), indent=2))
@@ -0,0 +1,100 @@
+"""
+Page fingerprint index benchmark
+
+Simulates the uploads the index is meant for, against a fresh index and with
+the result cache disabled (CACHE_BACKEND=none), so only the index can reuse
+work between uploads:
+
+1. a statement of --pages pages
+2. the same statement re-exported (different file bytes, so the whole-file
+   OCR cache would miss)
+3. a statement twice as long whose first half is the first statement
+   (a quarterly export after a monthly one)
+
+and reports, per upload, chat calls, the page-level hit rate, the time spent
+fingerprinting and the end-to-end seconds. The fast path is disabled so every
+page would otherwise go to the LLM.
+
+Usage:
+    python benchmarks/bench_page_index.py --pages 10
+    python benchmarks/bench_page_index.py --pages 20 --no-text-layer --chat-latency 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("API_REQUESTS_PER_SECOND", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ["CACHE_BACKEND"] = "none"
+os.environ["PAGE_INDEX_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_page_index_"), "page_index.sqlite3")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+from corpus import generate_statement  # noqa: E402
+from fake_mistral import FakeMistral, fake_page_renderer  # noqa: E402
+from report import ProcessingReport  # noqa: E402
+
+
+async def upload(name: str, statement, pdf_bytes: bytes, args) -> dict:
+    fake = FakeMistral.from_statement(statement, ocr_latency=args.ocr_latency, chat_latency=args.chat_latency)
+    main.processor.client = fake
+    report = ProcessingReport()
+    started = time.perf_counter()
+    rows = await main.processor.process_bank_statement(
+        pdf_bytes, f"{name}.pdf", statement.columns, fast_path=False, text_layer=not args.no_text_layer,
+        report=report
+    )
+    page_stats = report.to_dict()
+    return {
+        "upload": name,
+        "pages": statement.pages,
+        "seconds": round(time.perf_counter() - started, 3),
+        "chat_calls": fake.chat.calls,
+        "ocr_calls": fake.ocr.calls,
+        "page_index": page_stats["page_index"],
+        "fingerprint_seconds": round(report.timings.seconds("fingerprint"), 4),
+        "rows_match": rows == statement.transactions,
+    }
+
+
+async def run(args) -> dict:
+    if main.page_index is None:
+        raise SystemExit("The page fingerprint index is disabled (PAGE_INDEX_ENABLED=false)")
+    main.processor.render_page_image = fake_page_renderer(0)
+    monthly = generate_statement(args.pages, args.rows_per_page, args.seed)
+    quarterly = generate_statement(2 * args.pages, args.rows_per_page, args.seed)
+    # Bytes after %%EOF are ignored by PDF readers, like a changed generation timestamp
+    re_export = monthly.pdf_bytes + b"\n% re-exported\n"
+    uploads = [
+        await upload("statement", monthly, monthly.pdf_bytes, args),
+        await upload("re_export", monthly, re_export, args),
+        await upload("overlapping", quarterly, quarterly.pdf_bytes, args),
+    ]
+    return {
+        "pages": args.pages,
+        "text_layer": not args.no_text_layer,
+        "uploads": uploads,
+        "index": main.page_index.stats(),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=10, help="Pages of the first statement")
+    parser.add_argument("--rows-per-page", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ocr-latency", type=float, default=0.1)
+    parser.add_argument("--chat-latency", type=float, default=0.2)
+    parser.add_argument("--no-text-layer", action="store_true", help="Send every page to the (fake) OCR")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,278 @@
+"""
+End-to-end pipeline benchmark on the synthetic corpus
+
+Runs BankStatementProcessor.process_bank_statement (target "processor") and the
+/process-bank-statement-json endpoint (target "http") on generated statements
+of every requested size against FakeMistral. Each scenario runs in a fresh
+subprocess and reports end-to-end latency, per-stage time, peak RSS and
+pages per second; the output is JSON so runs on different commits can be
+compared. --compare checks the results against an earlier output file and
+exits non-zero when a scenario got slower, grew in memory beyond --tolerance
+or stopped producing the expected rows.
+
+Usage:
+    python benchmarks/bench_pipeline.py --pages 1,10,100 --output baseline.json
+    python benchmarks/bench_pipeline.py --pages 1,10,100 --compare baseline.json
+    python benchmarks/bench_pipeline.py --pages 500 --no-fast-path --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+API_DIR = BENCHMARK_DIR.parent
+
+# Regressions smaller than these are treated as noise
+MIN_SECONDS_DELTA = 0.01
+MIN_RSS_DELTA_MB = 2.0
+
+
+def scenario_name(scenario: dict) -> str:
+    name = f"{scenario['target']}-{scenario['pages']}p"
+    if not scenario["fast_path"]:
+        name += "-llm"
+    if scenario["llm_batch"]:
+        name += "-batch"
+    if scenario["error_rate"]:
+        name += f"-err{scenario['error_rate']}"
+    if scenario.get("headerless_continuations"):
+        name += "-headerless"
+    if scenario.get("split_rows"):
+        name += "-split"
+    if not scenario.get("text_layer", True):
+        name += "-ocr"
+    if scenario.get("ocr_chunk_pages") is not None:
+        name += f"-chunk{scenario['ocr_chunk_pages']}x{scenario['ocr_concurrency']}"
+    return name
+
+
+async def run_processor(statement, scenario: dict) -> tuple:
+    import main
+    from report import ProcessingReport
+
+    report = ProcessingReport()
+    rows = []
+    started = time.perf_counter()
+    first_page_seconds = None
+    async for _, page_rows in main.processor.iter_bank_statement(
+        statement.pdf_bytes, f"{statement.name}.pdf", statement.columns, use_cache=False,
+        fast_path=scenario["fast_path"], llm_batch=scenario["llm_batch"], report=report
+    ):
+        if first_page_seconds is None:
+            first_page_seconds = time.perf_counter() - started
+        rows.extend(page_rows)
+    return rows, report.to_dict(), report.timings.to_dict(), first_page_seconds
+
+
+async def run_http(statement, scenario: dict) -> tuple:
+    import httpx
+
+    import main
+
+    columns = json.dumps([{"id": str(index), "name": name} for index, name in enumerate(statement.columns)])
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        response = await client.post(
+            "/process-bank-statement-json",
+            files={"file": (f"{statement.name}.pdf", statement.pdf_bytes, "application/pdf")},
+            data={
+                "columns": columns, "use_cache": "false", "include_timings": "true",
+                "fast_path": str(scenario["fast_path"]).lower(), "llm_batch": str(scenario["llm_batch"]).lower(),
+            },
+        )
+    body = response.json()
+    if "transactions" not in body:
+        raise RuntimeError(f"Request failed: {body}")
+    rows = [{key: value for key, value in row.items() if key != "id"} for row in body["transactions"]]
+    return rows, body["page_stats"], body["timings"], None
+
+
+def run_scenario(scenario: dict) -> dict:
+    """Run one scenario in this process (called in the benchmark subprocess)"""
+    os.environ.setdefault("API_REQUESTS_PER_SECOND", "0")
+    os.environ.setdefault("RETRY_BASE_DELAY", "0.01")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["TEXT_LAYER_ENABLED"] = str(scenario.get("text_layer", True))
+    if scenario.get("ocr_chunk_pages") is not None:
+        os.environ["OCR_CHUNK_PAGES"] = str(scenario["ocr_chunk_pages"])
+        os.environ["OCR_MAX_CONCURRENCY"] = str(scenario["ocr_concurrency"])
+    sys.path.insert(0, str(API_DIR))
+    sys.path.insert(0, str(BENCHMARK_DIR))
+
+    import main
+    from corpus import generate_statement
+    from fake_mistral import FakeMistral, fake_page_renderer
+    from transactions import TransactionTable
+
+    statement = generate_statement(
+        scenario["pages"], scenario["rows_per_page"], scenario["seed"],
+        scenario.get("headerless_continuations", False), scenario.get("split_rows", False)
+    )
+    runner = run_http if scenario["target"] == "http" else run_processor
+    durations = []
+    first_pages = []
+    errors_injected = 0
+    for _ in range(scenario["repeat"]):
+        fake = FakeMistral.from_statement(
+            statement, upload_latency=scenario["upload_latency"], ocr_latency=scenario["ocr_latency"],
+            ocr_page_latency=scenario["ocr_page_latency"], chat_latency=scenario["chat_latency"],
+            error_rate=scenario["error_rate"], seed=scenario["seed"]
+        )
+        main.processor.client = fake
+        main.processor.render_page_image = fake_page_renderer(scenario["render_latency"])
+        started = time.perf_counter()
+        rows, page_stats, timings, first_page_seconds = asyncio.run(runner(statement, scenario))
+        durations.append(time.perf_counter() - started)
+        if first_page_seconds is not None:
+            first_pages.append(first_page_seconds)
+        errors_injected += fake.errors_injected
+
+    expected = statement.transactions
+    if scenario["target"] == "http":
+        # The endpoint outputs the rows of a TransactionTable: amounts as numbers, missing ones as null
+        columns = statement.columns
+        expected = TransactionTable.from_rows(expected, columns, main.processor.column_types(columns)).to_records()
+    seconds = statistics.median(durations)
+    return {
+        "name": scenario_name(scenario),
+        **scenario,
+        "seconds": round(seconds, 4),
+        "seconds_min": round(min(durations), 4),
+        # Time until the first page's transactions were yielded (processor target only)
+        "first_page_seconds": round(statistics.median(first_pages), 4) if first_pages else None,
+        "pages_per_second": round(statement.pages / seconds, 2),
+        "transactions": len(rows),
+        "rows_match": rows == expected,
+        "pages_failed": page_stats["pages_failed"],
+        "retries": page_stats["retries"],
+        "errors_injected": errors_injected,
+        "llm_calls": page_stats["llm_usage"]["calls"],
+        "text_layer_pages": page_stats["text_layer"]["sources"].get("text_layer", 0),
+        "stitching": page_stats["stitching"],
+        "timings": timings,
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def run_in_subprocess(scenario: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--scenario", json.dumps(scenario)],
+        check=True, capture_output=True, text=True, cwd=API_DIR
+    ).stdout
+    return json.loads(output)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True, cwd=API_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """Per-scenario changes against a previous output; 'regression' marks the ones to fail on"""
+    previous = {result["name"]: result for result in baseline.get("results", [])}
+    comparison = []
+    for result in results:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        entry = {"name": result["name"], "regression": False}
+        for metric, min_delta in (("seconds", MIN_SECONDS_DELTA), ("peak_rss_mb", MIN_RSS_DELTA_MB)):
+            old, new = before[metric], result[metric]
+            entry[metric] = {"before": old, "after": new, "change": round(new / old - 1, 3) if old else None}
+            if new > old * (1 + tolerance) and new - old > min_delta:
+                entry["regression"] = True
+        if before.get("rows_match") and not result["rows_match"]:
+            entry["rows_match"] = {"before": True, "after": False}
+            entry["regression"] = True
+        comparison.append(entry)
+    return comparison
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="1,10,100", help="Comma-separated statement sizes (1-500 pages)")
+    parser.add_argument("--targets", default="processor,http", help="processor and/or http")
+    parser.add_argument("--rows-per-page", type=int, default=30)
+    parser.add_argument("--no-fast-path", action="store_true", help="Send every page to the (fake) LLM")
+    parser.add_argument("--llm-batch", action="store_true", help="Pack consecutive pages into one chat request")
+    parser.add_argument("--upload-latency", type=float, default=0.02)
+    parser.add_argument("--ocr-latency", type=float, default=0.1)
+    parser.add_argument("--ocr-page-latency", type=float, default=0.002, help="Added OCR latency per page")
+    parser.add_argument("--chat-latency", type=float, default=0.05)
+    parser.add_argument("--render-latency", type=float, default=0.005)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake API calls failing with 429/503")
+    parser.add_argument("--headerless-continuations", action="store_true",
+                        help="Column headers on the first page only (see corpus.py)")
+    parser.add_argument("--split-rows", action="store_true",
+                        help="Split the last transaction of every page across the page break")
+    parser.add_argument("--no-text-layer", action="store_true",
+                        help="Send every page to the (fake) OCR instead of reading the PDF's text layer")
+    parser.add_argument("--ocr-chunk-pages", type=int,
+                        help="Pages per OCR call (OCR_CHUNK_PAGES, 0 = whole document); default: configured")
+    parser.add_argument("--ocr-concurrency", type=int, default=3, help="OCR calls in flight (OCR_MAX_CONCURRENCY)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario; the median is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Also write the results to this file")
+    parser.add_argument("--compare", type=Path, help="Earlier output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown / growth before failing")
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(json.loads(args.scenario))))
+        return
+
+    results = []
+    for target in args.targets.split(","):
+        for pages in (int(size) for size in args.pages.split(",")):
+            results.append(run_in_subprocess({
+                "target": target, "pages": pages, "rows_per_page": args.rows_per_page,
+                "fast_path": not args.no_fast_path, "llm_batch": args.llm_batch,
+                "upload_latency": args.upload_latency, "ocr_latency": args.ocr_latency,
+                "ocr_page_latency": args.ocr_page_latency, "chat_latency": args.chat_latency,
+                "render_latency": args.render_latency, "error_rate": args.error_rate,
+                "repeat": args.repeat, "seed": args.seed,
+                "headerless_continuations": args.headerless_continuations, "split_rows": args.split_rows,
+                "text_layer": not args.no_text_layer,
+                "ocr_chunk_pages": args.ocr_chunk_pages, "ocr_concurrency": args.ocr_concurrency,
+            }))
+
+    output = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    regressions = []
+    if args.compare:
+        output["comparison"] = compare(results, json.loads(args.compare.read_text()), args.tolerance)
+        regressions = [entry["name"] for entry in output["comparison"] if entry["regression"]]
+        output["regressions"] = regressions
+
+    text = json.dumps(output, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    print(text)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
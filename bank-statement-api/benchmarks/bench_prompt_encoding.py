@@ -0,0 +1,147 @@
+"""
+Prompt encoding benchmark
+
+Processes the same synthetic statements with LLM_PROMPT_ENCODING=html and
+=compact, fast path disabled so every page goes to the LLM, and reports per
+page: estimated prompt text tokens, prompt tokens reported by the client,
+chat latency and the time spent building the prompts locally, plus the
+relative change of each. Every run must reproduce the statement's rows.
+
+The local FakeMistral stand-in echoes the rows of the prompt's tables; its
+prompt tokens are the prompt characters / 4 plus a fixed cost per image, and
+--chat-token-latency adds prompt processing time per text token on top of the
+fixed --chat-latency. With --pdf and a MISTRAL_API_KEY the live API is measured
+instead (the rows are then not checked).
+
+Usage:
+    python benchmarks/bench_prompt_encoding.py --pages 10,50 --rows-per-page 30
+    python benchmarks/bench_prompt_encoding.py --pages 10 --llm-batch
+    MISTRAL_API_KEY=... python benchmarks/bench_prompt_encoding.py --pdf statement.pdf
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("API_REQUESTS_PER_SECOND", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+from config import Config  # noqa: E402
+from corpus import COLUMNS, generate_statement  # noqa: E402
+from fake_mistral import FakeMistral, fake_page_renderer  # noqa: E402
+from report import ProcessingReport  # noqa: E402
+
+ENCODINGS = ("html", "compact")
+
+
+def prompt_build_ms(processor, page_tables: list, columns: list) -> float:
+    """Milliseconds to encode every page and build its prompts, the JSON example already memoized"""
+    started = time.perf_counter()
+    for tables in page_tables:
+        processor.build_page_prompts(processor.page_tables_to_prompt(tables), columns)
+    return 1000 * (time.perf_counter() - started)
+
+
+async def run_encoding(pdf_bytes: bytes, columns: list, encoding: str, llm_batch: bool,
+                       expected: list = None) -> dict:
+    Config.LLM_PROMPT_ENCODING = encoding
+    report = ProcessingReport()
+    started = time.perf_counter()
+    rows = await main.processor.process_bank_statement(
+        pdf_bytes, "statement.pdf", columns, use_cache=False, fast_path=False, page_filter=False,
+        llm_batch=llm_batch, report=report
+    )
+    wall = time.perf_counter() - started
+    usage = report.llm_usage()
+    pages = max(len(report.prompt_estimates), 1)
+    result = {
+        "llm_calls": usage["calls"],
+        "split_pages": usage["split_pages"],
+        "estimated_prompt_tokens_per_page": round(usage["estimated_prompt_tokens"] / pages, 1),
+        "prompt_tokens_per_page": round(usage["prompt_tokens"] / pages, 1),
+        "llm_ms_per_page": round(1000 * usage["latency_seconds"] / pages, 1),
+        "wall_seconds": round(wall, 3),
+    }
+    if expected is not None:
+        result["rows_match"] = rows == expected
+    return result
+
+
+def change(before: float, after: float) -> float:
+    return round(after / before - 1, 3) if before else None
+
+
+async def run_statement(pdf_bytes: bytes, columns: list, args, page_tables: list = None,
+                        expected: list = None) -> dict:
+    results = {}
+    for encoding in ENCODINGS:
+        results[encoding] = await run_encoding(pdf_bytes, columns, encoding, args.llm_batch, expected)
+        if page_tables is not None:
+            results[encoding]["prompt_build_ms_per_page"] = round(
+                prompt_build_ms(main.processor, page_tables, columns) / len(page_tables), 3
+            )
+    before, after = results["html"], results["compact"]
+    results["change"] = {
+        metric: change(before[metric], after[metric])
+        for metric in ("estimated_prompt_tokens_per_page", "prompt_tokens_per_page", "llm_ms_per_page",
+                       "prompt_build_ms_per_page")
+        if metric in before
+    }
+    return results
+
+
+async def run(args) -> dict:
+    Config.LLM_PAGE_TOKEN_BUDGET = args.page_token_budget
+    if args.pdf:
+        return {
+            "source": str(args.pdf),
+            "llm_batch": args.llm_batch,
+            "results": await run_statement(args.pdf.read_bytes(), args.columns or list(COLUMNS), args),
+        }
+
+    main.processor.render_page_image = fake_page_renderer(0)
+    statements = {}
+    for pages in args.pages:
+        statement = generate_statement(pages, args.rows_per_page, args.seed)
+        main.processor.client = FakeMistral.from_statement(
+            statement, ocr_latency=0, chat_latency=args.chat_latency, chat_token_latency=args.chat_token_latency
+        )
+        page_tables = main.processor.extract_page_tables([{"markdown": md} for md in statement.page_markdowns])
+        statements[statement.name] = await run_statement(
+            statement.pdf_bytes, statement.columns, args, page_tables, statement.transactions
+        )
+    return {
+        "source": "fake",
+        "llm_batch": args.llm_batch,
+        "page_token_budget": args.page_token_budget,
+        "rows_per_page": args.rows_per_page,
+        "statements": statements,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", type=Path, help="Statement to process with the live Mistral API")
+    parser.add_argument("--columns", type=lambda value: json.loads(value), help="Columns for --pdf, as a JSON array")
+    parser.add_argument("--pages", type=lambda value: [int(size) for size in value.split(",")], default=[10],
+                        help="Comma-separated statement sizes")
+    parser.add_argument("--rows-per-page", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chat-latency", type=float, default=0.05, help="Fake fixed chat latency in seconds")
+    parser.add_argument("--chat-token-latency", type=float, default=0.0002,
+                        help="Fake chat latency per prompt text token in seconds")
+    parser.add_argument("--page-token-budget", type=int, default=Config.LLM_PAGE_TOKEN_BUDGET,
+                        help="LLM_PAGE_TOKEN_BUDGET for both runs")
+    parser.add_argument("--llm-batch", action="store_true", help="Pack consecutive pages into one request")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,99 @@
+"""
+Peak memory benchmark for PDF page rasterization
+
+Compares the previous eager renderer (every page decoded into PIL, PNG-encoded
+and base64-encoded up front) with BankStatementProcessor.iter_pdf_images, which
+renders one window of pages at a time straight to PNG files. Each mode runs in a
+fresh subprocess and reports its peak RSS. Requires poppler (pdftoppm).
+
+Usage:
+    python benchmarks/bench_render_memory.py --pages 50
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def make_pdf(path: str, pages: int) -> None:
+    """Write an image-only A4 PDF with the given number of pages"""
+    from PIL import Image, ImageDraw
+
+    images = []
+    for page in range(pages):
+        image = Image.new("RGB", (1654, 2339), "white")  # A4 at 200 DPI
+        draw = ImageDraw.Draw(image)
+        for line in range(60):
+            draw.text((100, 100 + line * 35), f"Page {page + 1} row {line + 1}  01/01/24  UPI PAYMENT  1,250.50", fill="black")
+        images.append(image)
+    images[0].save(path, save_all=True, append_images=images[1:])
+
+
+def render_eager(pdf_path: str) -> int:
+    from pdf2image import convert_from_path
+
+    encoded_images = []
+    for img in convert_from_path(pdf_path):
+        buffered = io.BytesIO()
+        img.save(buffered, format="PNG")
+        encoded_images.append(base64.b64encode(buffered.getvalue()).decode("utf-8"))
+    return sum(len(encoded) for encoded in encoded_images)
+
+
+def render_lazy(pdf_path: str, pages: int) -> int:
+    from main import processor
+
+    total = 0
+    for _, image_data in processor.iter_pdf_images(pdf_path, list(range(pages))):
+        total += len(image_data["image_url"])  # image released after this iteration
+    return total
+
+
+def run_mode(mode: str, pdf_path: str, pages: int) -> dict:
+    started = time.perf_counter()
+    payload = render_eager(pdf_path) if mode == "eager" else render_lazy(pdf_path, pages)
+    return {
+        "mode": mode,
+        "seconds": round(time.perf_counter() - started, 3),
+        "payload_bytes": payload,
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50, help="Pages in the synthetic PDF")
+    parser.add_argument("--mode", choices=["eager", "lazy"], help=argparse.SUPPRESS)
+    parser.add_argument("--pdf", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.pdf, args.pages)))
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = os.path.join(temp_dir, "statement.pdf")
+        make_pdf(pdf_path, args.pages)
+        results = []
+        for mode in ("eager", "lazy"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--pdf", pdf_path, "--pages", str(args.pages)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    print(json.dumps({"pages": args.pages, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Markdown table parser benchmark
+
+Checks that the single-pass table parser returns exactly the same tables and
+prompt HTML as the markdown -> HTML -> BeautifulSoup round-trip on a golden
+corpus, then measures per-page parse time and peak allocated memory of both paths.
+
+The built-in corpus covers the layouts seen in OCR output (headings and text
+around tables, borderless and ragged tables, inline markup, LaTeX amounts).
+Real OCR pages can be added as markdown files, one page per file.
+
+Usage:
+    python benchmarks/bench_table_parser.py
+    python benchmarks/bench_table_parser.py --corpus benchmarks/markdown_pages --repeat 200
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_mistral import SAMPLE_PAGE_MARKDOWN  # noqa: E402
+from main import processor  # noqa: E402
+from table_parser import UnsupportedMarkdown, parse_markdown_tables  # noqa: E402
+
+
+def statement_page(rows: int) -> str:
+    """A statement page with a heading, account details and a transaction table"""
+    lines = [
+        "# HDFC BANK LTD",
+        "",
+        "Statement of account for the period 01/01/2024 to 31/01/2024",
+        "",
+        "| Date | Narration | Chq./Ref.No. | Value Dt | Withdrawal Amt. | Deposit Amt. | Closing Balance |",
+        "| :-- | :-- | :-- | :-- | --: | --: | --: |",
+    ]
+    balance = 100000.0
+    for idx in range(rows):
+        amount = 125.5 + idx
+        balance -= amount
+        lines.append(
+            f"| {idx % 28 + 1:02d}/01/24 | UPI-MERCHANT {idx}-PAYMENT | 0000{idx:06d} | {idx % 28 + 1:02d}/01/24 "
+            f"| {amount:,.2f} |  | {balance:,.2f} |"
+        )
+    lines += ["", "Page 1 of 3"]
+    return "\n".join(lines)
+
+
+GOLDEN_CORPUS = {
+    "sample": SAMPLE_PAGE_MARKDOWN,
+    "statement_40_rows": statement_page(40),
+    "no_tables": "# Terms\n\nThis page has no tables.\n\n- item one\n- item two\n",
+    "heading_without_blank_line": "## Transactions\n| Date | Amount |\n|---|---|\n| 01/01/24 | 10.00 |",
+    "text_before_table": "Opening balance as on 01/01/24\n| Date | Amount |\n|---|---|\n| 01/01/24 | 10.00 |",
+    "text_after_table": "| Date | Amount |\n|---|---|\n| 01/01/24 | 10.00 |\nContinued on next page",
+    "setext_heading": "Transactions\n------------\n| Date | Amount |\n|---|---|\n| 01/01/24 | 10.00 |",
+    "rule_between_tables": "| A | B |\n|---|---|\n| 1 | 2 |\n\n***\n\n| C | D |\n|---|---|\n| 3 | 4 |",
+    "borderless": "Date | Amount\n--- | ---\n01/01/24 | 10.00\n02/01/24 | 20.00",
+    "ragged_rows": "| Date | Description | Amount |\n|---|---|---|\n| 01/01/24 | Short |\n| 02/01/24 | Long | 5.00 | extra |",
+    "header_only": "| Date | Amount |\n|---|---|",
+    "single_column": "| Notes |\n|---|\n| one |\n| two |",
+    "separator_mismatch": "| Date | Amount |\n|---|\n| 01/01/24 | 10.00 |",
+    "inline_markup": (
+        "| **Date** | Narration | Amount |\n|---|---|---|\n"
+        "| 01/01/24 | Paid **AMAZON** order | 1,000.00 |\n"
+        "| 02/01/24 | M&S &amp; co [ref](http://x) | 2.00 |\n"
+        "| 03/01/24 | NEFT_HDFC_1234 *urgent* | 3.00 |"
+    ),
+    "latex_amounts": "| Date | Amount |\n|---|---|\n| 01/01/24 | $\\text{1,250.00}$ |\n| 02/01/24 | $500$ |",
+    "line_breaks": "| Date | Narration |\n|---|---|\n| 01/01/24 | UPI/123<br>GROCERY |",
+    "crlf_and_tabs": "| Date\t| Amount |\r\n|---|---|\r\n| 01/01/24 |\t10.00 |\r\n",
+    "image_and_summary": (
+        "![img-0.jpeg](img-0.jpeg)\n\n| Opening Balance | Dr Count | Cr Count | Closing Balance |\n"
+        "|---|---|---|---|\n| 10,000.00 | 12 | 3 | 8,250.00 |"
+    ),
+    "list_with_pipe": "- note | with pipe\n- other",
+    "indented_table": "    | A | B |\n    |---|---|\n    | 1 | 2 |",
+    "code_span": "| Date | Ref |\n|---|---|\n| 01/01/24 | `a|b` |",
+    "raw_html_table": "<table><tr><th>Date</th></tr><tr><td>01/01/24</td></tr></table>",
+}
+
+
+def legacy_tables_to_html(page_tables: list) -> str:
+    """Prompt HTML as previously built by repeated string concatenation"""
+    page_html_parts = []
+    for headers, rows in page_tables:
+        html = "<table>\n"
+        html += "<thead><tr>" + "".join(f"<th>{h}</th>" for h in headers) + "</tr></thead>\n"
+        html += "<tbody>\n"
+        for row in rows:
+            html += "<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>\n"
+        html += "</tbody></table>\n"
+        page_html_parts.append(html)
+    return "\n".join(page_html_parts)
+
+
+def legacy_path(markdown_text: str) -> str:
+    return legacy_tables_to_html(processor.extract_all_table_parts_html(markdown_text))
+
+
+def single_pass_path(markdown_text: str) -> str:
+    return processor.page_tables_to_html(processor.extract_all_table_parts(markdown_text))
+
+
+def uses_fallback(markdown_text: str) -> bool:
+    clean_md = processor.preprocess_markdown(markdown_text)
+    if "$" in clean_md:
+        clean_md = processor.strip_latex_math(clean_md)
+    try:
+        parse_markdown_tables(clean_md)
+        return False
+    except UnsupportedMarkdown:
+        return True
+
+
+def compare(corpus: dict) -> dict:
+    mismatches = []
+    fallbacks = []
+    for name, markdown_text in corpus.items():
+        expected = processor.extract_all_table_parts_html(markdown_text)
+        actual = processor.extract_all_table_parts(markdown_text)
+        if actual != expected or single_pass_path(markdown_text) != legacy_path(markdown_text):
+            mismatches.append({"page": name, "expected": expected, "actual": actual})
+        if uses_fallback(markdown_text):
+            fallbacks.append(name)
+    return {"pages": len(corpus), "mismatches": mismatches, "fallback_pages": fallbacks}
+
+
+def measure(func, pages: list, repeat: int) -> dict:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            func(page)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for page in pages:
+        func(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ms_per_page": round(1000 * elapsed / (repeat * len(pages)), 4),
+        "peak_alloc_kib": round(peak / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, help="Directory of additional markdown pages (*.md)")
+    parser.add_argument("--repeat", type=int, default=50, help="Timing repetitions over the benchmark pages")
+    args = parser.parse_args()
+
+    corpus = dict(GOLDEN_CORPUS)
+    if args.corpus:
+        for path in sorted(args.corpus.glob("*.md")):
+            corpus[path.stem] = path.read_text(encoding="utf-8")
+
+    timing_pages = [statement_page(rows) for rows in (10, 40, 120)]
+    if args.corpus:
+        timing_pages += [text for name, text in corpus.items() if name not in GOLDEN_CORPUS]
+
+    result = {
+        "golden": compare(corpus),
+        "timing_pages": len(timing_pages),
+        "legacy": measure(legacy_path, timing_pages, args.repeat),
+        "single_pass": measure(single_pass_path, timing_pages, args.repeat),
+    }
+    result["speedup"] = round(result["legacy"]["ms_per_page"] / result["single_pass"]["ms_per_page"], 1)
+    print(json.dumps(result, indent=2))
+    if result["golden"]["mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Columnar transaction store benchmark
+
+Builds a 100k-row result the way the pipeline does (one JSON page of rows at a
+time, as returned by the LLM) into a list of dicts and into a TransactionTable,
+then compares retained and peak memory, JSON and CSV serialization time, and
+row-by-row (fast_path.parse_amount / parse_date) against vectorized
+normalization and running-balance validation. Both paths must produce the same
+JSON and CSV values (the corpus has amounts as text, the table outputs numbers).
+
+Usage:
+    python benchmarks/bench_transactions.py
+    python benchmarks/bench_transactions.py --rows 250000 --repeat 5
+"""
+
+import argparse
+import gc
+import io
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARK_DIR.parent))
+
+import pandas as pd  # noqa: E402
+
+from corpus import COLUMNS, generate_rows  # noqa: E402
+from fast_path import BALANCE_TOLERANCE, parse_amount, parse_date  # noqa: E402
+from main import processor  # noqa: E402
+from transactions import TransactionTable, parse_amounts  # noqa: E402
+
+ROWS_PER_PAGE = 30
+
+
+def timed(func, repeat: int) -> tuple:
+    """Median seconds of repeat calls and the last result"""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - started)
+    return round(statistics.median(durations), 4), result
+
+
+def build(pages: list, columnar: bool):
+    """Collect the pages like collect_transactions / process_bank_statement; returns (result, retained, peak)"""
+    gc.collect()
+    tracemalloc.start()
+    if columnar:
+        result = TransactionTable(COLUMNS, processor.column_types(COLUMNS))
+        for page in pages:
+            result.extend(json.loads(page))
+        result.frame  # flush the last chunk
+    else:
+        result = []
+        for page in pages:
+            result.extend(json.loads(page))
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, round(retained / 2 ** 20, 1), round(peak / 2 ** 20, 1)
+
+
+def dict_json(rows: list) -> str:
+    """Previous /process-bank-statement-json behaviour: add an id to every dict, then encode"""
+    for index, row in enumerate(rows, start=1):
+        row["id"] = index
+    text = json.dumps(rows)
+    for row in rows:
+        del row["id"]
+    return text
+
+
+def amounts_as_numbers(rows: list) -> list:
+    """The dict rows with amounts parsed as the table outputs them, for comparing values"""
+    amount_columns = [column for column, kind in processor.column_types(COLUMNS).items() if kind == "float"]
+    return [{**row, **{column: parse_amount(row[column]) for column in amount_columns}} for row in rows]
+
+
+def same_csv_values(first: str, second: str) -> bool:
+    return pd.read_csv(io.StringIO(first)).equals(pd.read_csv(io.StringIO(second)))
+
+
+def row_balance_breaks(rows: list) -> int:
+    breaks = 0
+    previous = None
+    for row in rows:
+        balance = parse_amount(row["Closing Balance"])
+        delta = (parse_amount(row["Deposit Amt."]) or 0.0) - (parse_amount(row["Withdrawal Amt."]) or 0.0)
+        if previous is not None and abs(previous + delta - balance) >= BALANCE_TOLERANCE:
+            breaks += 1
+        previous = balance
+    return breaks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    page_rows = generate_rows(-(-args.rows // ROWS_PER_PAGE), ROWS_PER_PAGE, args.seed)
+    pages = [json.dumps(rows) for rows in page_rows]
+    del page_rows
+
+    rows, dict_retained, dict_peak = build(pages, columnar=False)
+    table, table_retained, table_peak = build(pages, columnar=True)
+
+    dict_json_s, dict_json_text = timed(lambda: dict_json(rows), args.repeat)
+    table_json_s, table_json_text = timed(lambda: table.to_json(add_ids=True), args.repeat)
+    dict_csv_s, dict_csv_text = timed(lambda: pd.DataFrame(rows, columns=COLUMNS).to_csv(index=False), args.repeat)
+    table_csv_s, table_csv_text = timed(table.to_csv, args.repeat)
+
+    amounts = [row["Closing Balance"] for row in rows]
+    dates = [row["Date"] for row in rows]
+    row_amounts_s, _ = timed(lambda: [parse_amount(value) for value in amounts], args.repeat)
+    vector_amounts_s, _ = timed(lambda: parse_amounts(amounts), args.repeat)
+    row_dates_s, _ = timed(lambda: [parse_date(value) for value in dates], args.repeat)
+    vector_dates_s, _ = timed(lambda: table.dates("Date"), args.repeat)
+    row_balance_s, row_breaks = timed(lambda: row_balance_breaks(rows), args.repeat)
+    vector_balance_s, balance_check = timed(table.balance_check, args.repeat)
+
+    def speedup(before, after):
+        return round(before / after, 1) if after else None
+
+    print(json.dumps({
+        "rows": len(rows),
+        "outputs_match": {
+            "json": [{**row, "id": index} for index, row in enumerate(amounts_as_numbers(rows), start=1)]
+            == json.loads(table_json_text),
+            "csv": same_csv_values(dict_csv_text, table_csv_text),
+        },
+        "memory_mb": {
+            "dicts": {"retained": dict_retained, "peak": dict_peak},
+            "columnar": {"retained": table_retained, "peak": table_peak, "column_arrays": round(table.nbytes() / 2 ** 20, 1)},
+        },
+        "seconds": {
+            "json": {"dicts": dict_json_s, "columnar": table_json_s, "speedup": speedup(dict_json_s, table_json_s)},
+            "csv": {"dicts": dict_csv_s, "columnar": table_csv_s, "speedup": speedup(dict_csv_s, table_csv_s)},
+            "parse_amounts": {"per_row": row_amounts_s, "vectorized": vector_amounts_s,
+                              "speedup": speedup(row_amounts_s, vector_amounts_s)},
+            "parse_dates": {"per_row": row_dates_s, "vectorized": vector_dates_s,
+                            "speedup": speedup(row_dates_s, vector_dates_s)},
+            "balance_check": {"per_row": row_balance_s, "vectorized": vector_balance_s,
+                              "speedup": speedup(row_balance_s, vector_balance_s)},
+        },
+        "balance_mismatches": {"per_row": row_breaks, "vectorized": balance_check["mismatches"]},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Synthetic bank statement corpus for the benchmarks
+
+Generates statements of any length with a consistent running balance, as a
+text-layer PDF together with the OCR markdown of every page and the expected
+transactions, so FakeMistral can serve OCR that matches the PDF. Optionally the
+column headers are only printed on the first page and the last transaction of
+every page is split across the page break, as on many real statements.
+
+Usage:
+    python benchmarks/corpus.py --out benchmarks/corpus --pages 1,10,50,100,500
+    python benchmarks/corpus.py --pages 10 --headerless-continuations --split-rows
+"""
+
+import argparse
+import json
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+COLUMNS = ["Date", "Narration", "Chq./Ref.No.", "Withdrawal Amt.", "Deposit Amt.", "Closing Balance"]
+
+NARRATIONS = [
+    "UPI PAYMENT GROCERY", "ATM WDL MUMBAI", "SALARY CREDIT", "NEFT TRANSFER RENT", "POS CAFE COFFEE DAY",
+    "IMPS FROM SAVINGS", "ELECTRICITY BILL PAY", "INTEREST CREDIT", "CARD PAYMENT ONLINE", "CHQ DEPOSIT",
+]
+
+# A4 in points and the x position of every column of the transaction table
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+COLUMN_X = [36, 96, 246, 316, 396, 476]
+FONT_SIZE = 7
+LINE_HEIGHT = 11
+
+
+@dataclass
+class SyntheticStatement:
+    """A generated statement: PDF bytes, per-page OCR markdown and expected rows"""
+    name: str
+    columns: List[str]
+    page_rows: List[List[Dict[str, str]]]
+    pdf_bytes: bytes = b""
+    page_markdowns: List[str] = field(default_factory=list)
+
+    @property
+    def pages(self) -> int:
+        return len(self.page_rows)
+
+    @property
+    def transactions(self) -> List[Dict[str, str]]:
+        return [row for rows in self.page_rows for row in rows]
+
+
+def generate_rows(pages: int, rows_per_page: int, seed: int) -> List[List[Dict[str, str]]]:
+    """Transactions per page whose closing balances add up across the whole statement"""
+    rng = random.Random(seed)
+    balance = 10000.0
+    page_rows = []
+    for page in range(pages):
+        rows = []
+        for row in range(rows_per_page):
+            day = page * rows_per_page + row
+            narration = rng.choice(NARRATIONS)
+            amount = round(rng.uniform(10, 5000), 2)
+            is_credit = "CREDIT" in narration or "FROM" in narration or "DEPOSIT" in narration
+            if not is_credit and amount > balance:
+                is_credit = True
+            balance = round(balance + amount if is_credit else balance - amount, 2)
+            rows.append({
+                "Date": f"{day % 28 + 1:02d}/{day // 28 % 12 + 1:02d}/24",
+                "Narration": narration,
+                "Chq./Ref.No.": f"{100000 + day}",
+                "Withdrawal Amt.": "" if is_credit else f"{amount:.2f}",
+                "Deposit Amt.": f"{amount:.2f}" if is_credit else "",
+                "Closing Balance": f"{balance:.2f}",
+            })
+        page_rows.append(rows)
+    return page_rows
+
+
+def layout_pages(page_rows: List[List[Dict[str, str]]], headerless_continuations: bool = False,
+                 split_rows: bool = False) -> List[Tuple[bool, List[Dict[str, str]]]]:
+    """
+    Rows printed on every page, and whether the page prints the column headers
+
+    With split_rows, the date, narration and reference of each page's last transaction
+    are printed on that page and its amounts and balance at the top of the next page.
+    """
+    printed = [list(rows) for rows in page_rows]
+    if split_rows:
+        for page in range(len(printed) - 1):
+            row = printed[page][-1]
+            head = {column: row[column] if column in COLUMNS[:3] else "" for column in COLUMNS}
+            tail = {column: "" if column in COLUMNS[:3] else row[column] for column in COLUMNS}
+            printed[page][-1] = head
+            printed[page + 1].insert(0, tail)
+    return [(page == 0 or not headerless_continuations, rows) for page, rows in enumerate(printed)]
+
+
+def page_markdown(page_index: int, pages: int, rows: List[Dict[str, str]], show_header: bool = True) -> str:
+    """
+    OCR markdown of one page, as Mistral OCR returns it for a tabular statement
+
+    Without a header row, OCR still emits a markdown table, with the first row as its header.
+    """
+    table = [" | ".join(row[column] for column in COLUMNS) for row in rows]
+    if show_header:
+        table.insert(0, " | ".join(COLUMNS))
+    lines = [
+        "# Account Statement",
+        "",
+        f"Account No: 000123456789    Page {page_index + 1} of {pages}",
+        "",
+        "| " + table[0] + " |",
+        "|" + "---|" * len(COLUMNS),
+    ]
+    lines.extend("| " + line + " |" for line in table[1:])
+    return "\n".join(lines) + "\n"
+
+
+def _pdf_text(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def page_content_stream(page_index: int, pages: int, rows: List[Dict[str, str]], show_header: bool = True) -> bytes:
+    """PDF drawing operators for one page: heading, table header and one text run per cell"""
+    ops = ["BT", f"/F1 12 Tf 1 0 0 1 36 {PAGE_HEIGHT - 50} Tm (Account Statement) Tj"]
+    ops.append(f"/F1 {FONT_SIZE} Tf 1 0 0 1 36 {PAGE_HEIGHT - 66} Tm "
+               f"(Account No: 000123456789    Page {page_index + 1} of {pages}) Tj")
+    y = PAGE_HEIGHT - 90
+    for cells in [dict(zip(COLUMNS, COLUMNS)), *rows] if show_header else rows:
+        for x, column in zip(COLUMN_X, COLUMNS):
+            if cells[column]:
+                ops.append(f"1 0 0 1 {x} {y} Tm ({_pdf_text(cells[column])}) Tj")
+        y -= LINE_HEIGHT
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def build_pdf(page_streams: List[bytes]) -> bytes:
+    """Assemble a minimal PDF 1.4 document with one Courier font and the given page streams"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>",
+    ]
+    page_refs = []
+    for stream in page_streams:
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 3 0 R >> >> "
+            b"/Contents %d 0 R >>" % (PAGE_WIDTH, PAGE_HEIGHT, content_ref)
+        )
+        page_refs.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % ref for ref in page_refs)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_refs)
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(output)
+
+
+def generate_statement(pages: int, rows_per_page: int = 30, seed: int = 0, headerless_continuations: bool = False,
+                       split_rows: bool = False) -> SyntheticStatement:
+    """Generate a statement with the given number of pages (deterministic for a seed)"""
+    page_rows = generate_rows(pages, rows_per_page, seed)
+    name = f"statement_{pages}p" + ("_headerless" if headerless_continuations else "") + ("_split" if split_rows else "")
+    statement = SyntheticStatement(name=name, columns=list(COLUMNS), page_rows=page_rows)
+    layout = layout_pages(page_rows, headerless_continuations, split_rows)
+    statement.page_markdowns = [
+        page_markdown(index, pages, rows, show_header) for index, (show_header, rows) in enumerate(layout)
+    ]
+    statement.pdf_bytes = build_pdf([
+        page_content_stream(index, pages, rows, show_header) for index, (show_header, rows) in enumerate(layout)
+    ])
+    return statement
+
+
+def write_corpus(out_dir: Path, sizes: List[int], rows_per_page: int = 30, seed: int = 0,
+                 headerless_continuations: bool = False, split_rows: bool = False) -> List[Path]:
+    """Write `<name>.pdf`, `<name>.ocr.json` (page markdowns) and `<name>.expected.json` per size"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for pages in sizes:
+        statement = generate_statement(pages, rows_per_page, seed, headerless_continuations, split_rows)
+        pdf_path = out_dir / f"{statement.name}.pdf"
+        pdf_path.write_bytes(statement.pdf_bytes)
+        (out_dir / f"{statement.name}.ocr.json").write_text(json.dumps(statement.page_markdowns))
+        (out_dir / f"{statement.name}.expected.json").write_text(
+            json.dumps({"columns": statement.columns, "transactions": statement.transactions})
+        )
+        written.append(pdf_path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", type=Path, default=Path(__file__).resolve().parent / "corpus")
+    parser.add_argument("--pages", default="1,10,50,100,500", help="Comma-separated statement sizes in pages")
+    parser.add_argument("--rows-per-page", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--headerless-continuations", action="store_true",
+                        help="Print the column headers on the first page only")
+    parser.add_argument("--split-rows", action="store_true",
+                        help="Split the last transaction of every page across the page break")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.pages.split(",")]
+    for path in write_corpus(args.out, sizes, args.rows_per_page, args.seed,
+                             args.headerless_continuations, args.split_rows):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
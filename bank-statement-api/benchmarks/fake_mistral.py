@@ -0,0 +1,211 @@
+"""
+Local stand-in for the Mistral client used by the benchmarks
+Mimics the parts of the SDK used by BankStatementProcessor (files, ocr, chat)
+with configurable latency and error rate, so the pipeline can be exercised
+without an API key
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import httpx
+from mistralai.models import SDKError
+
+SAMPLE_PAGE_MARKDOWN = """# Account Statement
+
+| Date | Narration | Chq./Ref.No. | Withdrawal Amt. | Deposit Amt. | Closing Balance |
+|---|---|---|---|---|---|
+| 01/01/24 | ATM WDL MUMBAI | 0001 | 500.00 |  | 9500.00 |
+| 02/01/24 | SALARY CREDIT | 0002 |  | 25000.00 | 34500.00 |
+| 03/01/24 | UPI PAYMENT GROCERY | 0003 | 1250.50 |  | 33249.50 |
+"""
+
+SAMPLE_TRANSACTIONS = [
+    {"Date": "01/01/24", "Narration": "ATM WDL MUMBAI", "Withdrawal Amt.": "500.00",
+     "Deposit Amt.": "", "Closing Balance": "9500.00"},
+    {"Date": "02/01/24", "Narration": "SALARY CREDIT", "Withdrawal Amt.": "",
+     "Deposit Amt.": "25000.00", "Closing Balance": "34500.00"},
+    {"Date": "03/01/24", "Narration": "UPI PAYMENT GROCERY", "Withdrawal Amt.": "1250.50",
+     "Deposit Amt.": "", "Closing Balance": "33249.50"},
+]
+
+
+class FakeOCRResponse:
+    """Minimal OCR response exposing the same fields as the SDK model"""
+
+    def __init__(self, page_markdowns: List[str], pages: Optional[List[int]] = None):
+        if pages is None:
+            pages = range(len(page_markdowns))
+        self.pages = [
+            SimpleNamespace(index=idx, markdown=page_markdowns[idx], images=[], dimensions=None)
+            for idx in pages
+        ]
+
+
+def _table_rows(text: str) -> List[Dict[str, str]]:
+    """Rows of the HTML or tab-separated (compact) tables in a prompt, keyed by their table headers"""
+    rows = []
+    if "<table>" not in text:
+        # Compact prompts end with their tables after a "Tables...:" / "Page N tables:" line
+        tables = re.split(r"^(?:Tables|Page \d+ tables)\b.*:\n", text, flags=re.M)[-1]
+        for block in tables.split("\n\n"):
+            lines = [line for line in block.split("\n") if line]
+            if lines:
+                headers = lines[0].split("\t")
+                rows.extend(dict(zip(headers, line.split("\t"))) for line in lines[1:])
+        return rows
+    for table in re.findall(r"<table>(.*?)</table>", text, re.S):
+        headers = re.findall(r"<th>(.*?)</th>", table, re.S)
+        for row in re.findall(r"<tr>((?:<td>.*?</td>)+)</tr>", table, re.S):
+            rows.append(dict(zip(headers, re.findall(r"<td>(.*?)</td>", row, re.S))))
+    return rows
+
+
+class _Files:
+    def __init__(self, fake):
+        self._fake = fake
+
+    def upload(self, file, purpose):
+        time.sleep(self._fake.upload_latency)
+        self._fake.maybe_fail()
+        return SimpleNamespace(id="fake-file")
+
+    async def upload_async(self, file, purpose):
+        await asyncio.sleep(self._fake.upload_latency)
+        self._fake.maybe_fail()
+        return SimpleNamespace(id="fake-file")
+
+    def get_signed_url(self, file_id, expiry):
+        return SimpleNamespace(url=f"https://fake.local/{file_id}")
+
+    async def get_signed_url_async(self, file_id, expiry):
+        return SimpleNamespace(url=f"https://fake.local/{file_id}")
+
+
+class _OCR:
+    def __init__(self, fake):
+        self._fake = fake
+        self.calls = 0
+
+    def _latency(self, pages=None):
+        count = len(self._fake.page_markdowns) if pages is None else len(pages)
+        return self._fake.ocr_latency + self._fake.ocr_page_latency * count
+
+    def process(self, pages=None, **kwargs):
+        time.sleep(self._latency(pages))
+        self._fake.maybe_fail()
+        self.calls += 1
+        return FakeOCRResponse(self._fake.page_markdowns, pages)
+
+    async def process_async(self, pages=None, **kwargs):
+        await asyncio.sleep(self._latency(pages))
+        self._fake.maybe_fail()
+        self.calls += 1
+        return FakeOCRResponse(self._fake.page_markdowns, pages)
+
+
+class _Chat:
+    def __init__(self, fake):
+        self._fake = fake
+        self.calls = 0
+
+    def _page_transactions(self, text: str) -> List[dict]:
+        return _table_rows(text) if self._fake.echo_tables else self._fake.transactions
+
+    def _response(self, messages):
+        """Canned (or echoed) transactions per page; batched prompts get a page-keyed object"""
+        self.calls += 1
+        self._fake.maybe_fail()
+        chunks = messages[0]["content"]
+        texts = [chunk.text for chunk in chunks if getattr(chunk, "type", None) == "text"]
+        images = sum(1 for chunk in chunks if getattr(chunk, "type", None) == "image_url")
+
+        pages = {
+            int(match.group(1)): text for text in texts
+            for match in [re.match(r"^Page (\d+) (?:HTML table|tables):", text)] if match
+        }
+        if pages:
+            if self._fake.malformed_batches:
+                content = json.dumps(self._fake.transactions)
+            else:
+                content = json.dumps({"pages": {
+                    str(number): self._page_transactions(text) for number, text in pages.items()
+                }})
+        else:
+            content = json.dumps(self._page_transactions("".join(texts)))
+
+        usage = SimpleNamespace(
+            prompt_tokens=sum(len(text) for text in texts) // 4 + images * self._fake.image_tokens,
+            completion_tokens=len(content) // 4,
+        )
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+    def _latency(self, messages) -> float:
+        """Fixed latency plus prompt processing time proportional to the prompt text"""
+        characters = sum(len(chunk.text) for chunk in messages[0]["content"] if getattr(chunk, "type", None) == "text")
+        return self._fake.chat_latency + self._fake.chat_token_latency * characters / 4
+
+    def complete(self, messages, **kwargs):
+        time.sleep(self._latency(messages))
+        return self._response(messages)
+
+    async def complete_async(self, messages, **kwargs):
+        await asyncio.sleep(self._latency(messages))
+        return self._response(messages)
+
+
+class FakeMistral:
+    """Drop-in replacement for mistralai.Mistral with canned responses"""
+
+    def __init__(self, pages: int = 10, upload_latency: float = 0.05, ocr_latency: float = 0.5,
+                 chat_latency: float = 0.5, page_markdown: str = SAMPLE_PAGE_MARKDOWN,
+                 transactions: List[dict] = None, image_tokens: int = 1500, malformed_batches: bool = False,
+                 page_markdowns: List[str] = None, ocr_page_latency: float = 0.0, echo_tables: bool = False,
+                 error_rate: float = 0.0, error_statuses: tuple = (429, 503), retry_after: float = None,
+                 chat_token_latency: float = 0.0, seed: int = 0):
+        self.upload_latency = upload_latency
+        self.ocr_latency = ocr_latency
+        self.ocr_page_latency = ocr_page_latency  # added to the OCR latency per page
+        self.chat_latency = chat_latency
+        self.chat_token_latency = chat_token_latency  # added chat latency per estimated prompt text token
+        self.image_tokens = image_tokens  # reported prompt tokens per page image
+        self.malformed_batches = malformed_batches  # answer batched prompts with a plain array
+        self.echo_tables = echo_tables  # answer with the rows of the prompt's HTML tables
+        self.error_rate = error_rate  # probability that any call fails with one of error_statuses
+        self.error_statuses = error_statuses
+        self.retry_after = retry_after  # Retry-After header of injected errors, in seconds
+        self.errors_injected = 0
+        self._rng = random.Random(seed)
+        self.page_markdowns = list(page_markdowns) if page_markdowns is not None else [page_markdown] * pages
+        self.transactions = SAMPLE_TRANSACTIONS if transactions is None else transactions
+        self.files = _Files(self)
+        self.ocr = _OCR(self)
+        self.chat = _Chat(self)
+
+    @classmethod
+    def from_statement(cls, statement, **kwargs) -> "FakeMistral":
+        """Fake serving the OCR pages of a corpus.SyntheticStatement and echoing its tables"""
+        kwargs.setdefault("echo_tables", True)
+        return cls(page_markdowns=statement.page_markdowns, **kwargs)
+
+    def maybe_fail(self) -> None:
+        """Raise an SDK error like the API does, with probability error_rate"""
+        if self.error_rate <= 0 or self._rng.random() >= self.error_rate:
+            return
+        self.errors_injected += 1
+        status = self._rng.choice(self.error_statuses)
+        headers = {"Retry-After": str(self.retry_after)} if self.retry_after is not None else {}
+        raise SDKError("Injected API error", status, "", httpx.Response(status, headers=headers))
+
+
+def fake_page_renderer(render_latency: float = 0.02):
+    """Build a replacement for render_page_image that simulates poppler rendering time"""
+    def render_page_image(pdf_path, page_index, profile=None):
+        time.sleep(render_latency)
+        return {"type": "image_url", "image_url": f"data:image/png;base64,page{page_index}"}
+    return render_page_image
@@ -0,0 +1,263 @@
+"""
+Result cache for Bank Statement API
+Content-addressed two-level cache: OCR results keyed by the PDF hash and
+per-page LLM extractions keyed by page content, column schema, model and prompt version
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+class CacheBackend:
+    """Interface for cache storage backends. Values must be JSON-serializable"""
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def info(self) -> Dict[str, int]:
+        """Return the number of entries and total size in bytes"""
+        raise NotImplementedError
+
+
+class NullCacheBackend(CacheBackend):
+    """Backend that stores nothing (caching disabled)"""
+
+    def get(self, key: str) -> Optional[Any]:
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def delete(self, key: str) -> bool:
+        return False
+
+    def clear(self) -> None:
+        pass
+
+    def info(self) -> Dict[str, int]:
+        return {"entries": 0, "bytes": 0}
+
+
+class LRUCacheBackend(CacheBackend):
+    """
+    In-process LRU cache evicting least recently used entries above max_bytes
+
+    Values are stored JSON-encoded and decoded on every get, so callers never share
+    (and cannot corrupt) the cached objects, as with the disk backend.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (JSON-encoded value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        return json.loads(entry[0])
+
+    def set(self, key: str, value: Any) -> None:
+        data = json.dumps(value)
+        size = len(data)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (data, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self._bytes -= entry[1]
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
+
+
+class DiskCacheBackend(CacheBackend):
+    """On-disk cache storing one JSON file per key, evicting least recently used files above max_bytes"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        # Index of existing entries ordered by last access time
+        files = sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        self._entries = OrderedDict((path.stem, path.stat().st_size) for path in files)
+        self._bytes = sum(self._entries.values())
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+                os.utime(path)  # Record access for LRU ordering across restarts
+            except (OSError, json.JSONDecodeError):
+                self._bytes -= self._entries.pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        data = json.dumps(value).encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            path = self._path(key)
+            temp_path = path.with_suffix(".tmp")
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)
+            self._entries[key] = len(data)
+            self._bytes += len(data)
+
+            while self._bytes > self.max_bytes:
+                evicted_key, evicted_size = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._path(evicted_key).unlink(missing_ok=True)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            size = self._entries.pop(key, None)
+            if size is None:
+                return False
+            self._bytes -= size
+            self._path(key).unlink(missing_ok=True)
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in self._entries:
+                self._path(key).unlink(missing_ok=True)
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
+
+
+def create_cache_backend(backend: str, max_bytes: int, directory: str) -> CacheBackend:
+    """
+    Create a cache backend by name
+
+    Args:
+        backend: 'memory', 'disk' or 'none'
+        max_bytes: Size limit before least recently used entries are evicted
+        directory: Storage directory for the disk backend
+
+    Returns:
+        Cache backend instance
+    """
+    backend = backend.lower()
+    if backend == "memory":
+        return LRUCacheBackend(max_bytes)
+    if backend == "disk":
+        return DiskCacheBackend(directory, max_bytes)
+    if backend == "none":
+        return NullCacheBackend()
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Two-level cache for OCR responses and per-page LLM extractions"""
+
+    LEVELS = ("ocr", "page")
+
+    def __init__(self, ocr_backend: CacheBackend, page_backend: CacheBackend):
+        self.backends = {"ocr": ocr_backend, "page": page_backend}
+        self._counters = {level: {"hits": 0, "misses": 0} for level in self.LEVELS}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def page_key(page_html: str, image_url: str, user_columns: List[str],
+                 chat_model: str, prompt_version: str) -> str:
+        """Cache key for a page extraction: page content, column schema, model and prompt version"""
+        parts = [
+            _sha256(page_html),
+            _sha256(image_url),
+            json.dumps(user_columns),
+            chat_model,
+            prompt_version,
+        ]
+        return _sha256("\n".join(parts))
+
+    def get(self, level: str, key: str) -> Optional[Any]:
+        value = self.backends[level].get(key)
+        with self._lock:
+            self._counters[level]["hits" if value is not None else "misses"] += 1
+        return value
+
+    def set(self, level: str, key: str, value: Any) -> None:
+        self.backends[level].set(key, value)
+
+    def invalidate(self, level: str, key: str) -> bool:
+        return self.backends[level].delete(key)
+
+    def clear(self, level: Optional[str] = None) -> None:
+        for name in ([level] if level else self.LEVELS):
+            self.backends[name].clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss counters and storage usage per cache level"""
+        with self._lock:
+            counters = {level: dict(values) for level, values in self._counters.items()}
+        return {level: {**counters[level], **self.backends[level].info()} for level in self.LEVELS}
+
+
+def create_result_cache(backend: str, max_bytes: int, directory: str) -> ResultCache:
+    """Create a ResultCache with one backend instance per level"""
+    return ResultCache(
+        ocr_backend=create_cache_backend(backend, max_bytes, os.path.join(directory, "ocr")),
+        page_backend=create_cache_backend(backend, max_bytes, os.path.join(directory, "page")),
+    )
@@ -28,16 +28,110 @@ class Config:
     MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 50 * 1024 * 1024))  # 50MB default
     ALLOWED_EXTENSIONS = [".pdf"]
     TEMP_DIR = os.getenv("TEMP_DIR", tempfile.gettempdir())
-    OUTPUT_DIR = os.getenv("OUTPUT_DIR")
+
+    # Output Store Configuration: generated CSV downloads
+    OUTPUT_STORE = os.getenv("OUTPUT_STORE", "disk").lower()  # disk, memory or stream (never stored)
+    OUTPUT_DIR = os.getenv("OUTPUT_DIR") or os.path.join(TEMP_DIR, "bank_statement_outputs")
+    OUTPUT_TTL_SECONDS = float(os.getenv("OUTPUT_TTL_SECONDS", 3600))  # 0 = keep until evicted by size
+    OUTPUT_MAX_BYTES = int(os.getenv("OUTPUT_MAX_BYTES", 1024 * 1024 * 1024))  # total, least recently used evicted
+    OUTPUT_SWEEP_INTERVAL = float(os.getenv("OUTPUT_SWEEP_INTERVAL", 60))  # seconds between background sweeps
     
     # Rate Limiting Configuration
     API_RATE_LIMIT_DELAY = float(os.getenv("API_RATE_LIMIT_DELAY", 1.0))  # seconds
+    # Token bucket shared by all page workers; defaults to one request per API_RATE_LIMIT_DELAY
+    API_REQUESTS_PER_SECOND = float(os.getenv(
+        "API_REQUESTS_PER_SECOND",
+        1.0 / API_RATE_LIMIT_DELAY if API_RATE_LIMIT_DELAY > 0 else 0
+    ))  # 0 disables limiting
+    API_RATE_LIMIT_BURST = int(os.getenv("API_RATE_LIMIT_BURST", 1))
+
+    # Resilience: retries with exponential backoff and jitter, per-call timeouts and circuit breakers
+    RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", 4))  # attempts per API call, 1 = no retries
+    RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", 0.5))  # seconds, doubled per retry
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", 20.0))  # backoff cap; Retry-After may ask for longer
+    UPLOAD_TIMEOUT = float(os.getenv("UPLOAD_TIMEOUT", 120))  # seconds per call, 0 = no timeout
+    OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", 300))
+    CHAT_TIMEOUT = float(os.getenv("CHAT_TIMEOUT", 120))
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))  # consecutive failures
+    CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", 30))
+    UPLOAD_URL_REUSE_SECONDS = float(os.getenv("UPLOAD_URL_REUSE_SECONDS", 3000))  # signed URLs last one hour
+
+    # Page Dispatch Configuration
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))  # 1 = sequential
+    CPU_WORKERS = int(os.getenv("CPU_WORKERS", os.cpu_count() or 2))  # threads for parsing and rasterization
+
+    # Multi-page LLM Batching: consecutive pages share one chat request within these budgets
+    LLM_BATCH_ENABLED = os.getenv("LLM_BATCH_ENABLED", "False").lower() == "true"
+    LLM_BATCH_MAX_PAGES = int(os.getenv("LLM_BATCH_MAX_PAGES", 4))
+    LLM_BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", 16000))  # estimated prompt tokens per request
+    LLM_BATCH_IMAGE_TOKENS = int(os.getenv("LLM_BATCH_IMAGE_TOKENS", 3000))  # estimated tokens per page image
+    LLM_BATCH_MAX_PAYLOAD_BYTES = int(os.getenv("LLM_BATCH_MAX_PAYLOAD_BYTES", 10 * 1024 * 1024))
+
+    # LLM Prompt: 'html' sends page tables as HTML with the full instructions, 'compact' as tab-separated
+    # text with short instructions built once per column schema
+    LLM_PROMPT_ENCODING = os.getenv("LLM_PROMPT_ENCODING", "html").lower()
+    # Estimated text tokens per page request (image excluded); larger pages are split by rows, 0 = no limit
+    LLM_PAGE_TOKEN_BUDGET = int(os.getenv("LLM_PAGE_TOKEN_BUDGET", 8000))
     
+    # Page Image Source: 'local' renders pages with poppler and does not request images from OCR;
+    # 'ocr' reuses full-page images returned by OCR (scanned pages) and renders the rest locally
+    PAGE_IMAGE_SOURCE = os.getenv("PAGE_IMAGE_SOURCE", "local").lower()
+    OCR_IMAGE_MIN_COVERAGE = float(os.getenv("OCR_IMAGE_MIN_COVERAGE", 0.9))  # fraction of the page area
+
+    # Page Image Configuration (default profile for images sent to the chat model)
+    IMAGE_DPI = int(os.getenv("IMAGE_DPI", 200))
+    IMAGE_GRAYSCALE = os.getenv("IMAGE_GRAYSCALE", "False").lower() == "true"
+    IMAGE_MAX_EDGE = int(os.getenv("IMAGE_MAX_EDGE", 0))  # longest side in pixels, 0 = no resize
+    IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "png")  # png, jpeg or webp
+    IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", 85))  # jpeg / webp quality
+
+    # Chunked OCR: pages needing OCR are sent in page ranges, OCR'd concurrently; LLM work on a chunk
+    # starts while later chunks are still in OCR
+    OCR_CHUNK_PAGES = int(os.getenv("OCR_CHUNK_PAGES", 16))  # pages per OCR call, 0 = whole document
+    OCR_MAX_CONCURRENCY = int(os.getenv("OCR_MAX_CONCURRENCY", 3))  # OCR calls in flight per statement
+
+    # Native Text Layer: rebuild tables of born-digital pages locally; only the other pages go to OCR
+    TEXT_LAYER_ENABLED = os.getenv("TEXT_LAYER_ENABLED", "True").lower() == "true"
+
+    # Deterministic Fast Path: map pages whose running balance checks out without the LLM
+    FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "True").lower() == "true"
+    FAST_PATH_FUZZY_THRESHOLD = float(os.getenv("FAST_PATH_FUZZY_THRESHOLD", 0.85))  # header similarity, 0-1
+
+    # Page Classifier: skip pages whose tables do not look like transactions (summaries, terms, rewards)
+    # before they are rendered and sent to the LLM
+    PAGE_FILTER_ENABLED = os.getenv("PAGE_FILTER_ENABLED", "True").lower() == "true"
+    PAGE_FILTER_THRESHOLD = float(os.getenv("PAGE_FILTER_THRESHOLD", 0.5))  # page score, 0-1
+
+    # Join transaction tables across page breaks before mapping them or sending them to the LLM
+    TABLE_STITCHING_ENABLED = os.getenv("TABLE_STITCHING_ENABLED", "True").lower() == "true"
+
+    # Result Cache Configuration
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # memory, disk or none
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 256 * 1024 * 1024))  # per cache level
+    CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(TEMP_DIR, "bank_statement_cache"))
+
+    # Page Fingerprint Index: LLM extractions reused for the same page in another upload (overlapping
+    # or re-downloaded statements), keyed by normalized table text and a perceptual hash of the page
+    PAGE_INDEX_ENABLED = os.getenv("PAGE_INDEX_ENABLED", "True").lower() == "true"
+    PAGE_INDEX_PATH = os.getenv("PAGE_INDEX_PATH") or os.path.join(CACHE_DIR, "page_index.sqlite3")
+    PAGE_INDEX_MAX_BYTES = int(os.getenv("PAGE_INDEX_MAX_BYTES", 64 * 1024 * 1024))  # stored rows, LRU evicted
+    PAGE_INDEX_MAX_DISTANCE = int(os.getenv("PAGE_INDEX_MAX_DISTANCE", 6))  # differing image hash bits, of 256
+
+    # Multi-file Batch Configuration (/process-batch)
+    BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", 500))  # PDFs per request, after expanding ZIPs
+    BATCH_MAX_CONCURRENT_FILES = int(os.getenv("BATCH_MAX_CONCURRENT_FILES", 4))  # files in flight at once
+
+    # Background Job Configuration
+    JOB_MAX_CONCURRENT = int(os.getenv("JOB_MAX_CONCURRENT", 2))  # jobs processed at the same time
+    JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", 20))  # waiting jobs before POST /jobs returns 429
+    JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", 3600))  # how long finished jobs are kept
+
     # CORS Configuration
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
     
-    # Logging Configuration
+    # Logging and Metrics Configuration
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"  # /metrics and stage histograms
     LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     
     # Validation
@@ -49,6 +143,15 @@ class Config:
                 "MISTRAL_API_KEY is required. Set it as an environment variable or in .env file"
             )
         
+        if cls.PAGE_IMAGE_SOURCE not in ("local", "ocr"):
+            raise ValueError("PAGE_IMAGE_SOURCE must be 'local' or 'ocr'")
+
+        if cls.LLM_PROMPT_ENCODING not in ("html", "compact"):
+            raise ValueError("LLM_PROMPT_ENCODING must be 'html' or 'compact'")
+
+        if cls.OUTPUT_STORE not in ("disk", "memory", "stream"):
+            raise ValueError("OUTPUT_STORE must be 'disk', 'memory' or 'stream'")
+
         # Create temp directory if it doesn't exist
         Path(cls.TEMP_DIR).mkdir(parents=True, exist_ok=True)
     
@@ -61,13 +164,83 @@ class Config:
             "debug_mode": cls.API_DEBUG,
             "max_file_size_mb": cls.MAX_FILE_SIZE / (1024 * 1024),
             "temp_dir": cls.TEMP_DIR,
+            "output_store": {
+                "mode": cls.OUTPUT_STORE,
+                "dir": cls.OUTPUT_DIR,
+                "ttl_seconds": cls.OUTPUT_TTL_SECONDS,
+                "max_bytes": cls.OUTPUT_MAX_BYTES,
+                "sweep_interval": cls.OUTPUT_SWEEP_INTERVAL
+            },
             "mistral_models": {
                 "ocr": cls.MISTRAL_OCR_MODEL,
                 "chat": cls.MISTRAL_CHAT_MODEL
             },
             "rate_limit_delay": cls.API_RATE_LIMIT_DELAY,
+            "requests_per_second": cls.API_REQUESTS_PER_SECOND,
+            "rate_limit_burst": cls.API_RATE_LIMIT_BURST,
+            "resilience": {
+                "max_attempts": cls.RETRY_MAX_ATTEMPTS,
+                "base_delay": cls.RETRY_BASE_DELAY,
+                "max_delay": cls.RETRY_MAX_DELAY,
+                "timeouts": {"upload": cls.UPLOAD_TIMEOUT, "ocr": cls.OCR_TIMEOUT, "chat": cls.CHAT_TIMEOUT},
+                "circuit_failure_threshold": cls.CIRCUIT_FAILURE_THRESHOLD,
+                "circuit_reset_seconds": cls.CIRCUIT_RESET_SECONDS
+            },
+            "llm_max_concurrency": cls.LLM_MAX_CONCURRENCY,
+            "cpu_workers": cls.CPU_WORKERS,
+            "llm_batch": {
+                "enabled": cls.LLM_BATCH_ENABLED,
+                "max_pages": cls.LLM_BATCH_MAX_PAGES,
+                "token_budget": cls.LLM_BATCH_TOKEN_BUDGET,
+                "image_tokens": cls.LLM_BATCH_IMAGE_TOKENS,
+                "max_payload_bytes": cls.LLM_BATCH_MAX_PAYLOAD_BYTES
+            },
+            "llm_prompt": {
+                "encoding": cls.LLM_PROMPT_ENCODING,
+                "page_token_budget": cls.LLM_PAGE_TOKEN_BUDGET
+            },
+            "page_image_source": cls.PAGE_IMAGE_SOURCE,
+            "image_profile": {
+                "dpi": cls.IMAGE_DPI,
+                "grayscale": cls.IMAGE_GRAYSCALE,
+                "max_edge": cls.IMAGE_MAX_EDGE,
+                "format": cls.IMAGE_FORMAT,
+                "quality": cls.IMAGE_QUALITY
+            },
+            "text_layer_enabled": cls.TEXT_LAYER_ENABLED,
+            "ocr_chunks": {
+                "pages": cls.OCR_CHUNK_PAGES,
+                "max_concurrency": cls.OCR_MAX_CONCURRENCY
+            },
+            "fast_path": {
+                "enabled": cls.FAST_PATH_ENABLED,
+                "fuzzy_threshold": cls.FAST_PATH_FUZZY_THRESHOLD
+            },
+            "table_stitching_enabled": cls.TABLE_STITCHING_ENABLED,
+            "page_filter": {
+                "enabled": cls.PAGE_FILTER_ENABLED,
+                "threshold": cls.PAGE_FILTER_THRESHOLD
+            },
+            "cache": {
+                "backend": cls.CACHE_BACKEND,
+                "max_bytes": cls.CACHE_MAX_BYTES,
+                "dir": cls.CACHE_DIR
+            },
+            "page_index": {
+                "enabled": cls.PAGE_INDEX_ENABLED,
+                "path": cls.PAGE_INDEX_PATH,
+                "max_bytes": cls.PAGE_INDEX_MAX_BYTES,
+                "max_distance": cls.PAGE_INDEX_MAX_DISTANCE
+            },
+            "batch": {
+                "max_files": cls.BATCH_MAX_FILES,
+                "max_concurrent_files": cls.BATCH_MAX_CONCURRENT_FILES
+            },
+            "jobs": {
+                "max_concurrent": cls.JOB_MAX_CONCURRENT,
+                "queue_size": cls.JOB_QUEUE_SIZE,
+                "retention_seconds": cls.JOB_RETENTION_SECONDS
+            },
+            "metrics_enabled": cls.METRICS_ENABLED,
             "cors_origins": cls.CORS_ORIGINS
         }
-
-# Validate configuration on import
-Config.validate_config()
\ No newline at end of file
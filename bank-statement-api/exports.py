@@ -0,0 +1,287 @@
+"""
+Binary export formats for Bank Statement API
+Encodes a TransactionTable as Parquet, an Arrow IPC stream or an XLSX workbook,
+straight from its typed columns: amounts as float64 / numbers, dates as dates
+and descriptions dictionary-encoded. Every format is produced as a generator
+of byte chunks, so responses stream without a temporary file.
+
+pyarrow (Parquet, Arrow) is imported on first use; XLSX needs no extra package.
+"""
+
+import io
+import re
+import zipfile
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from transactions import TransactionTable, parse_dates
+
+# Rows encoded per chunk (one Parquet row group / Arrow record batch per chunk)
+EXPORT_CHUNK_ROWS = 8192
+
+# Text columns with more distinct values than this share of their rows (e.g. reference
+# numbers) are exported as plain strings: a dictionary would not make them smaller, and
+# Parquet would repeat it in every row group
+MAX_DICTIONARY_RATIO = 0.5
+
+PARQUET_COMPRESSION = "zstd"
+
+EXPORT_FORMATS = {
+    "parquet": {"media_type": "application/vnd.apache.parquet", "extension": ".parquet", "requires": "pyarrow"},
+    "arrow": {"media_type": "application/vnd.apache.arrow.stream", "extension": ".arrows", "requires": "pyarrow"},
+    "xlsx": {
+        "media_type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "extension": ".xlsx",
+        "requires": None,
+    },
+}
+
+
+class ExportUnavailableError(RuntimeError):
+    """Raised when the package an export format needs is not installed"""
+
+    def __init__(self, output_format: str, package: str):
+        super().__init__(f"Output format '{output_format}' requires the {package} package (pip install {package})")
+
+
+def check_available(output_format: str) -> None:
+    """Fail before processing when the format's optional dependency is missing"""
+    package = EXPORT_FORMATS[output_format]["requires"]
+    if package is None:
+        return
+    try:
+        __import__(package)
+    except ImportError:
+        raise ExportUnavailableError(output_format, package)
+
+
+def export_filename(stem: str, output_format: str) -> str:
+    return f"{stem}{EXPORT_FORMATS[output_format]['extension']}"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable file collecting what is written until drained"""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def export_chunks(table: TransactionTable, output_format: str) -> Iterator[bytes]:
+    """Encode the table in an EXPORT_FORMATS format, as byte chunks"""
+    if output_format == "xlsx":
+        return xlsx_chunks(table)
+    check_available(output_format)
+    return arrow_chunks(table, parquet=output_format == "parquet")
+
+
+# Arrow / Parquet
+
+def arrow_table(table: TransactionTable):
+    """
+    The table as a pyarrow.Table
+
+    Amount columns are float64 and date columns date32 (when every non-empty cell
+    parses as a date); other columns are strings, dictionary-encoded unless they
+    have more than MAX_DICTIONARY_RATIO distinct values per row. A column with
+    cells that do not fit its type (amount text such as 'N/A', an unknown date
+    format) is exported as strings instead, so no value is lost.
+    """
+    import pyarrow as pa
+
+    arrays, fields = [], []
+    for column in table.columns:
+        series = table.frame[column]
+        if table.is_amount(column) and not table.unparsed(column):
+            array = pa.array(series.to_numpy(), type=pa.float64(), from_pandas=True)
+        elif table.is_amount(column):
+            values = table.output_column(column).tolist()
+            array = pa.array([None if value is None else str(value) for value in values], type=pa.string())
+        else:
+            dates = table.dates(column) if table.is_date(column) else None
+            if dates is not None and not (np.isnat(dates) & series.notna().to_numpy()).any():
+                array = pa.array(dates.astype("datetime64[D]"), type=pa.date32(), from_pandas=True)
+            elif len(series.cat.categories) > MAX_DICTIONARY_RATIO * len(series):
+                array = pa.array(series.astype(object).to_numpy(), type=pa.string(), from_pandas=True)
+            else:
+                codes = series.cat.codes.to_numpy().astype("int32")
+                array = pa.DictionaryArray.from_arrays(
+                    pa.array(codes, mask=codes < 0),
+                    pa.array([str(value) for value in series.cat.categories], type=pa.string()),
+                )
+        arrays.append(array)
+        fields.append(pa.field(column, array.type))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def arrow_chunks(table: TransactionTable, parquet: bool) -> Iterator[bytes]:
+    """Parquet file or Arrow IPC stream, one row group / record batch per EXPORT_CHUNK_ROWS rows"""
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    data = arrow_table(table)
+    sink = _ChunkSink()
+    if parquet:
+        writer = pyarrow.parquet.ParquetWriter(sink, data.schema, compression=PARQUET_COMPRESSION)
+    else:
+        writer = pyarrow.ipc.new_stream(sink, data.schema)
+    for start in range(0, max(data.num_rows, 1), EXPORT_CHUNK_ROWS):
+        part = data.slice(start, EXPORT_CHUNK_ROWS)
+        if parquet:
+            writer.write_table(part, row_group_size=EXPORT_CHUNK_ROWS)
+        else:
+            writer.write_table(part, max_chunksize=EXPORT_CHUNK_ROWS)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+# XLSX
+
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        f'<Relationships xmlns="{_PACKAGE_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+        '<sheets><sheet name="Transactions" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        f'<Relationships xmlns="{_PACKAGE_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # Cell styles: 0 general, 1 date (yyyy-mm-dd), 2 amount (0.00)
+    "xl/styles.xml": (
+        f'<styleSheet xmlns="{_MAIN_NS}">'
+        '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd"/></numFmts>'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="2" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+
+# Characters XML 1.0 does not allow, even escaped
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+_EXCEL_EPOCH = np.datetime64("1899-12-30", "D")
+
+_EMPTY_CELL = "<c/>"
+
+
+def _text_cell(value: Any) -> str:
+    text = _INVALID_XML_CHARS.sub("", str(value))
+    if not text:
+        return _EMPTY_CELL
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return f'<c t="inlineStr"><is><t{space}>{text}</t></is></c>'
+
+
+def _xlsx_cells(table: TransactionTable, column: str) -> Iterator[List[str]]:
+    """
+    Cell XML of a column, EXPORT_CHUNK_ROWS rows at a time: numbers for amounts and
+    dates, inline strings otherwise
+    """
+    series = table.frame[column]
+    if table.is_amount(column):
+        amounts = series.to_numpy()
+        unparsed = table.unparsed(column)
+        for start in range(0, len(amounts), EXPORT_CHUNK_ROWS):
+            cells = [_EMPTY_CELL if value != value else f'<c s="2"><v>{value!r}</v></c>'
+                     for value in amounts[start:start + EXPORT_CHUNK_ROWS].tolist()]
+            for row in range(start, start + len(cells)):
+                if row in unparsed:
+                    cells[row - start] = _text_cell(unparsed[row])
+            yield cells
+        return
+
+    # Dictionary-encoded: every distinct value is encoded once
+    categories = [_text_cell(value) for value in series.cat.categories]
+    if table.is_date(column):
+        # Parse the distinct values; cells that are not dates keep their text
+        dates = parse_dates(pd.Categorical(series.cat.categories))
+        serials = (dates.astype("datetime64[D]") - _EXCEL_EPOCH).astype("int64").tolist()
+        categories = [cell if np.isnat(date) else f'<c s="1"><v>{serial}</v></c>'
+                      for cell, date, serial in zip(categories, dates, serials)]
+    lookup = np.array(categories + [_EMPTY_CELL], dtype=object)
+    codes = series.cat.codes.to_numpy()
+    for start in range(0, len(codes), EXPORT_CHUNK_ROWS):
+        yield lookup[codes[start:start + EXPORT_CHUNK_ROWS]].tolist()
+
+
+def xlsx_chunks(table: TransactionTable) -> Iterator[bytes]:
+    """
+    A single-sheet XLSX workbook, streamed
+
+    The ZIP container is written to a non-seekable sink (sizes go in data
+    descriptors), and the cell XML is built and written EXPORT_CHUNK_ROWS rows at
+    a time, so neither the cells nor the workbook are held in memory or on disk
+    as a whole.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in _XLSX_PARTS.items():
+            archive.writestr(name, _XML_HEADER + xml)
+        yield sink.drain()
+
+        template = '<row r="%d">' + "%s" * len(table.columns) + "</row>"
+        with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            header = "".join(_text_cell(column) for column in table.columns)
+            sheet.write(f'{_XML_HEADER}<worksheet xmlns="{_MAIN_NS}"><sheetData><row r="1">{header}</row>'
+                        .encode("utf-8"))
+            chunks = zip(*(_xlsx_cells(table, column) for column in table.columns))
+            for chunk, column_cells in enumerate(chunks):
+                start = chunk * EXPORT_CHUNK_ROWS
+                sheet.write("".join([template % (start + offset + 2, *row)
+                                     for offset, row in enumerate(zip(*column_cells))]).encode("utf-8"))
+                yield sink.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.drain()
+
@@ -0,0 +1,366 @@
+"""
+Deterministic table mapping for Bank Statement API
+Maps well-formed OCR transaction tables to the requested columns without the LLM,
+accepting a page only when its running balance arithmetic checks out
+"""
+
+import re
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from prompts import SUGGESTED_BANK_COLUMNS
+
+# Column roles recognised in headers, checked in order (first match wins)
+ROLE_KEYWORDS = [
+    ("value_date", [("value", "date"), ("value", "dt")]),
+    ("date", [("date",), ("dt",)]),
+    ("balance", [("balance",), ("bal",)]),
+    ("reference", [("chq",), ("cheque",), ("ref",), ("instrument",), ("utr",)]),
+    ("debit", [("withdrawal",), ("withdrawals",), ("debit",), ("debits",), ("dr",)]),
+    ("credit", [("deposit",), ("deposits",), ("credit",), ("credits",), ("cr",)]),
+    ("amount", [("amount",), ("amt",)]),
+    ("type", [("type",), ("drcr",)]),
+    ("description", [("narration",), ("description",), ("particulars",), ("details",), ("remarks",)]),
+    ("serial", [("serial",), ("sno",), ("sr",), ("sl",)]),
+    ("branch", [("br",), ("branch",)]),
+]
+
+AMOUNT_ROLES = {"debit", "credit", "amount", "balance"}
+
+DATE_FORMATS = [
+    "%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y", "%d-%m-%y", "%d.%m.%Y", "%d.%m.%y",
+    "%d %b %Y", "%d %b %y", "%d-%b-%Y", "%d-%b-%y", "%d %B %Y", "%d-%B-%Y",
+    "%d %b, %Y", "%b %d, %Y", "%Y-%m-%d", "%d/%b/%Y", "%d/%b/%y",
+]
+
+# Text any of DATE_FORMATS can match: three numbers joined by separators, or a short text with a
+# month name ending with the year; rejects narrations and amounts before trying each format
+DATE_CANDIDATE = re.compile(r"\d{1,4}[/.-] ?\d{1,2}[/.-] ?\d{1,4}|(?=.*[A-Za-z])[\dA-Za-z][\dA-Za-z ,./-]{4,18}\d")
+
+OPENING_BALANCE_PATTERN = re.compile(r"opening|b/f|brought\s*forward|balance\s*forward", re.IGNORECASE)
+
+BALANCE_TOLERANCE = 0.011
+
+
+def normalize_header(name: str) -> str:
+    """Lowercase and keep only letters and digits, for header comparison"""
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def header_tokens(name: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", name.lower().replace("dr/cr", "drcr").replace("dr./cr.", "drcr"))
+
+
+def column_role(name: str) -> Optional[str]:
+    """Classify a column name into a role such as date, debit or balance"""
+    tokens = set(header_tokens(name))
+    for role, keyword_groups in ROLE_KEYWORDS:
+        for group in keyword_groups:
+            if all(keyword in tokens for keyword in group):
+                return role
+    return None
+
+
+# Known header spellings from the supported banks, used as aliases per role
+KNOWN_HEADER_ROLES = {
+    normalize_header(header): column_role(header)
+    for headers in SUGGESTED_BANK_COLUMNS.values()
+    for header in headers
+}
+
+
+def table_roles(headers: List[str]) -> List[Optional[str]]:
+    """Role of each header in a table"""
+    return [KNOWN_HEADER_ROLES.get(normalize_header(h)) or column_role(h) for h in headers]
+
+
+def parse_amount(text: str) -> Optional[float]:
+    """
+    Parse an amount cell such as '1,250.50', '₹ 500', '(200.00)' or '1,000.00 Dr'
+
+    Returns:
+        Signed value ('Dr' suffix or parentheses make it negative), or None for empty/non-numeric cells
+    """
+    if text is None:
+        return None
+    value = text.strip()
+    if not value or value in {"-", "--", "—"}:
+        return None
+
+    negative = False
+    suffix = re.search(r"\b(dr|cr)\.?$", value, re.IGNORECASE)
+    if suffix:
+        negative = suffix.group(1).lower() == "dr"
+        value = value[:suffix.start()].strip()
+    if value.startswith("(") and value.endswith(")"):
+        negative = True
+        value = value[1:-1]
+    if value.startswith("-"):
+        negative = not negative
+        value = value[1:]
+
+    value = re.sub(r"[₹$€£,\s]|INR|Rs\.?", "", value, flags=re.IGNORECASE)
+    if not re.fullmatch(r"\d+(\.\d+)?", value):
+        return None
+    amount = float(value)
+    return -amount if negative else amount
+
+
+def format_amount(text: str, signed: bool = False, amount: Optional[float] = None) -> str:
+    """
+    Numeric text without currency symbols, separators or Dr/Cr suffixes (as the LLM prompt requests)
+
+    Args:
+        text: Amount cell; its number of decimals is kept
+        signed: Keep the sign ('-200.00' for '(200.00)' or '200.00 Dr'), else the absolute value
+        amount: Value to write instead of the one parsed from text
+    """
+    if amount is None:
+        amount = parse_amount(text)
+    if amount is None:
+        return ""
+    match = re.search(r"\.(\d+)", text)
+    decimals = len(match.group(1)) if match else 0
+    return f"{amount if signed else abs(amount):.{decimals}f}"
+
+
+def parse_date(text: str) -> Optional[datetime]:
+    """Parse a statement date in one of the common Indian bank formats"""
+    if not text:
+        return None
+    value = re.sub(r"\s+", " ", text.strip())
+    if not DATE_CANDIDATE.fullmatch(value):
+        return None
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+class FastPathMapper:
+    """Rule-based mapper from OCR tables to user columns with running-balance validation"""
+
+    def __init__(self, fuzzy_threshold: float = 0.85):
+        self.fuzzy_threshold = fuzzy_threshold
+
+    def match_columns(self, headers: List[str], user_columns: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Map each user column to an OCR header index, or to a derived value
+
+        Returns:
+            Dict of user column -> header index or ('derived', role), or None if any column can't be mapped
+        """
+        header_roles = table_roles(headers)
+        normalized_headers = [normalize_header(h) for h in headers]
+
+        mapping = {}
+        for user_column in user_columns:
+            normalized = normalize_header(user_column)
+
+            # 1. Exact match after normalization
+            if normalized in normalized_headers:
+                mapping[user_column] = normalized_headers.index(normalized)
+                continue
+
+            # 2. Fuzzy match on the header spelling
+            scores = [SequenceMatcher(None, normalized, header).ratio() for header in normalized_headers]
+            best = max(range(len(scores)), key=scores.__getitem__) if scores else None
+            if best is not None and scores[best] >= self.fuzzy_threshold:
+                mapping[user_column] = best
+                continue
+
+            # 3. Same role, when exactly one header has it
+            role = KNOWN_HEADER_ROLES.get(normalized) or column_role(user_column)
+            if role is None:
+                return None
+            candidates = [idx for idx, header_role in enumerate(header_roles) if header_role == role]
+            if len(candidates) == 1:
+                mapping[user_column] = candidates[0]
+                continue
+
+            # 4. Debit/credit derived from amount + type, or amount/type derived from debit/credit
+            if role in ("debit", "credit") and "amount" in header_roles:
+                mapping[user_column] = ("derived", role)
+            elif role in ("amount", "type") and "debit" in header_roles and "credit" in header_roles:
+                mapping[user_column] = ("derived", role)
+            else:
+                return None
+        return mapping
+
+    def _row_amounts(self, row: List[str], header_roles: List[Optional[str]]) -> Tuple[Optional[float], Optional[float]]:
+        """Return (debit, credit) for a row as positive values"""
+        cells = {role: row[idx] for idx, role in enumerate(header_roles) if role and idx < len(row)}
+        if "debit" in cells or "credit" in cells:
+            debit = parse_amount(cells.get("debit", ""))
+            credit = parse_amount(cells.get("credit", ""))
+            return (abs(debit) if debit is not None else None, abs(credit) if credit is not None else None)
+
+        amount = parse_amount(cells.get("amount", ""))
+        if amount is None:
+            return None, None
+        kind = cells.get("type", "").strip().lower()
+        raw_amount = cells.get("amount", "").lower()
+        is_debit = kind.startswith("d") or kind.startswith("w") or raw_amount.rstrip(". ").endswith("dr") or amount < 0
+        return (abs(amount), None) if is_debit else (None, abs(amount))
+
+    def validate_table(self, headers: List[str], rows: List[List[str]],
+                       opening_balance: Optional[float]) -> Optional[Tuple[List[tuple], Optional[float]]]:
+        """
+        Check that every row is a dated transaction and the running balance adds up
+
+        Returns:
+            (transactions, closing_balance) where transactions are (row, debit, credit) tuples,
+            or None if the table fails validation
+        """
+        header_roles = table_roles(headers)
+        if "date" not in header_roles or "balance" not in header_roles:
+            return None
+        if not ({"debit", "credit"} & set(header_roles) or "amount" in header_roles):
+            return None
+
+        date_idx = header_roles.index("date")
+        balance_idx = header_roles.index("balance")
+
+        transactions = []
+        balances = []
+        for row in rows:
+            if len(row) != len(headers):
+                return None
+            debit, credit = self._row_amounts(row, header_roles)
+            balance = parse_amount(row[balance_idx])
+
+            if not row[date_idx].strip() and debit is None and credit is None:
+                # Opening balance / brought forward row: balance only, not a transaction
+                if balance is not None and (not transactions or OPENING_BALANCE_PATTERN.search(" ".join(row))):
+                    opening_balance = balance
+                    continue
+                return None
+
+            if parse_date(row[date_idx]) is None or balance is None:
+                return None
+            if (debit is None) == (credit is None):
+                return None  # exactly one of debit or credit per transaction
+            transactions.append((row, debit, credit))
+            balances.append(balance)
+
+        if not transactions:
+            return None
+
+        # Running balance: forward (oldest first) or reverse (newest first) order
+        deltas = [(credit or 0.0) - (debit or 0.0) for _, debit, credit in transactions]
+        forward = all(
+            abs(balances[i - 1] + deltas[i] - balances[i]) < BALANCE_TOLERANCE for i in range(1, len(balances))
+        )
+        reverse = all(
+            abs(balances[i] + deltas[i - 1] - balances[i - 1]) < BALANCE_TOLERANCE for i in range(1, len(balances))
+        )
+
+        if forward and opening_balance is not None and abs(opening_balance + deltas[0] - balances[0]) < BALANCE_TOLERANCE:
+            return transactions, balances[-1]
+        if len(transactions) < 2:
+            return None  # a single transaction can only be checked against a known opening balance
+        if forward:
+            return transactions, balances[-1]
+        if reverse:
+            return transactions, None
+        return None
+
+    def build_rows(self, headers: List[str], transactions: List[tuple], mapping: Dict[str, Any]) -> List[Dict[str, str]]:
+        """
+        Output rows of validated transactions
+
+        Balances keep their sign. Debit and credit are absolute values; an amount is
+        negative for debits unless a type, debit or credit column gives the direction.
+        """
+        header_roles = table_roles(headers)
+        target_roles = {target[1] if isinstance(target, tuple) else header_roles[target] for target in mapping.values()}
+        directed = bool({"type", "debit", "credit"} & target_roles)
+        output = []
+        for row, debit, credit in transactions:
+            amount = -debit if debit is not None else credit
+            if directed:
+                amount = abs(amount)
+            record = {}
+            for user_column, target in mapping.items():
+                if isinstance(target, tuple):
+                    role = target[1]
+                    if role == "debit":
+                        record[user_column] = f"{debit:.2f}" if debit is not None else ""
+                    elif role == "credit":
+                        record[user_column] = f"{credit:.2f}" if credit is not None else ""
+                    elif role == "amount":
+                        record[user_column] = f"{amount:.2f}"
+                    else:
+                        record[user_column] = "DR" if debit is not None else "CR"
+                elif header_roles[target] == "balance":
+                    record[user_column] = format_amount(row[target], signed=True)
+                elif header_roles[target] == "amount":
+                    record[user_column] = format_amount(row[target], signed=True, amount=amount)
+                elif header_roles[target] in AMOUNT_ROLES:
+                    record[user_column] = format_amount(row[target])
+                else:
+                    record[user_column] = row[target]
+            output.append(record)
+        return output
+
+    def map_page(self, tables: List[tuple], user_columns: List[str],
+                 opening_balance: Optional[float] = None) -> Optional[Tuple[List[Dict[str, str]], Optional[float]]]:
+        """
+        Map every transaction table on a page to the user columns
+
+        Args:
+            tables: (headers, rows) tuples from extract_all_table_parts
+            user_columns: List of user-defined column names
+            opening_balance: Closing balance carried over from the previous page, if known
+
+        Returns:
+            (rows, closing_balance), or None if the page must go to the LLM
+        """
+        page_rows = []
+        found_transactions = False
+        for headers, rows in tables:
+            header_roles = table_roles(headers)
+            if "date" not in header_roles:
+                continue  # not a transaction table (summary, contact details, ...)
+
+            validated = self.validate_table(headers, rows, opening_balance)
+            mapping = self.match_columns(headers, user_columns) if validated else None
+            if mapping is None:
+                return None
+
+            transactions, opening_balance = validated
+            page_rows.extend(self.build_rows(headers, transactions, mapping))
+            found_transactions = True
+
+        if not found_transactions:
+            return None
+        return page_rows, opening_balance
+
+    def map_document(self, page_tables: List[List[tuple]], user_columns: List[str]) -> Dict[int, List[Dict[str, str]]]:
+        """
+        Map all pages that pass validation, carrying the closing balance from page to page
+
+        Returns:
+            Dict of page index -> rows for the pages that don't need the LLM
+        """
+        return self.map_pages(enumerate(page_tables), user_columns)[0]
+
+    def map_pages(self, pages: Iterable[Tuple[int, List[tuple]]], user_columns: List[str],
+                  carried_balance: Optional[float] = None) -> Tuple[Dict[int, List[Dict[str, str]]], Optional[float]]:
+        """
+        Map consecutive pages of a statement, continuing from the closing balance of the page before them
+
+        Returns:
+            (page index -> rows for the pages that don't need the LLM, balance to carry to the next page)
+        """
+        results = {}
+        for page_index, tables in pages:
+            mapped = self.map_page(tables, user_columns, carried_balance) if tables else None
+            if mapped is None:
+                carried_balance = None
+                continue
+            results[page_index], carried_balance = mapped
+        return results, carried_balance
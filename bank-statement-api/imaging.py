@@ -0,0 +1,131 @@
+"""
+Page image encoding profiles for Bank Statement API
+Controls how PDF pages are rasterized and encoded before being sent to the chat model
+"""
+
+import io
+import json
+from dataclasses import asdict, dataclass, replace
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from config import Config
+
+IMAGE_FORMATS = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+}
+
+
+@dataclass(frozen=True)
+class ImageProfile:
+    """Rasterization and encoding settings for page images"""
+
+    dpi: int = 200
+    grayscale: bool = False
+    max_edge: int = 0  # Longest side in pixels, 0 = no resize
+    format: str = "png"  # png, jpeg or webp
+    quality: int = 85  # jpeg / webp quality
+
+    def __post_init__(self):
+        if self.format not in IMAGE_FORMATS:
+            raise ValueError(f"Image format must be one of {list(IMAGE_FORMATS)}")
+        if not 30 <= self.dpi <= 600:
+            raise ValueError("Image DPI must be between 30 and 600")
+        if self.max_edge < 0:
+            raise ValueError("Image max_edge must be 0 or positive")
+        if not 1 <= self.quality <= 100:
+            raise ValueError("Image quality must be between 1 and 100")
+
+    @property
+    def mime_type(self) -> str:
+        return IMAGE_FORMATS[self.format]
+
+    @property
+    def needs_reencode(self) -> bool:
+        """Whether poppler's output has to be resized or converted with PIL"""
+        return self.max_edge > 0 or self.format == "webp"
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_config(cls) -> "ImageProfile":
+        return cls(
+            dpi=Config.IMAGE_DPI,
+            grayscale=Config.IMAGE_GRAYSCALE,
+            max_edge=Config.IMAGE_MAX_EDGE,
+            format=Config.IMAGE_FORMAT.lower(),
+            quality=Config.IMAGE_QUALITY,
+        )
+
+
+# Named presets selectable per request
+IMAGE_PROFILE_PRESETS = {
+    "original": ImageProfile(),
+    "balanced": ImageProfile(dpi=150, max_edge=1600, format="jpeg", quality=85),
+    "compact": ImageProfile(dpi=150, grayscale=True, max_edge=1400, format="jpeg", quality=75),
+    "webp": ImageProfile(dpi=150, grayscale=True, max_edge=1400, format="webp", quality=75),
+}
+
+
+def parse_image_profile(value: Optional[str]) -> ImageProfile:
+    """
+    Resolve a per-request image profile
+
+    Args:
+        value: Empty for the configured default, a preset name, or a JSON object
+            overriding fields of the configured default e.g. '{"dpi": 150, "format": "jpeg"}'
+
+    Returns:
+        ImageProfile instance
+
+    Raises:
+        ValueError: If the preset or overrides are invalid
+    """
+    if not value:
+        return ImageProfile.from_config()
+    if value in IMAGE_PROFILE_PRESETS:
+        return IMAGE_PROFILE_PRESETS[value]
+
+    try:
+        overrides = json.loads(value)
+    except json.JSONDecodeError:
+        raise ValueError(f"Unknown image profile '{value}'; use one of {list(IMAGE_PROFILE_PRESETS)} or a JSON object")
+    if not isinstance(overrides, dict):
+        raise ValueError("Image profile overrides must be a JSON object")
+    if "format" in overrides:
+        overrides["format"] = str(overrides["format"]).lower()
+
+    try:
+        return replace(ImageProfile.from_config(), **overrides)
+    except TypeError as e:
+        raise ValueError(f"Invalid image profile field: {str(e)}")
+
+
+def reencode_image(image_bytes: bytes, profile: ImageProfile) -> bytes:
+    """Resize and/or convert a rendered page image according to the profile"""
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        if profile.max_edge and max(image.size) > profile.max_edge:
+            image.thumbnail((profile.max_edge, profile.max_edge), Image.LANCZOS)
+        if profile.format == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        output = io.BytesIO()
+        if profile.format == "png":
+            image.save(output, format="PNG", optimize=True)
+        else:
+            image.save(output, format=profile.format.upper(), quality=profile.quality)
+        return output.getvalue()
+
+
+def poppler_render_options(profile: ImageProfile) -> Tuple[str, dict]:
+    """File format and pdf2image keyword arguments for rendering a page with this profile"""
+    options = {"dpi": profile.dpi, "grayscale": profile.grayscale}
+    if profile.format == "jpeg" and not profile.needs_reencode:
+        options["jpegopt"] = {"quality": profile.quality, "optimize": "y"}
+        return "jpeg", options
+    # Resized and webp images are produced by re-encoding poppler's lossless PNG output
+    return "png", options
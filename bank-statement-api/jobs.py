@@ -0,0 +1,241 @@
+"""
+Background job subsystem for Bank Statement API
+Runs statement extraction on an in-process worker pool with a bounded queue,
+per-page progress tracking, partial results and cancellation
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from report import ProcessingReport
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+
+class Job:
+    """A single statement extraction job and its progress"""
+
+    def __init__(self, filename: str, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.params = params
+        self.status = JobStatus.QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.pages_total: Optional[int] = None
+        self.page_results: Dict[int, List[Dict[str, Any]]] = {}
+        self.results: Optional[List[Dict[str, Any]]] = None
+        self.error: Optional[str] = None
+        self.report = ProcessingReport()
+        self.task: Optional[asyncio.Task] = None
+
+    def on_page_done(self, page_index: int, pages_total: int, rows: List[Dict[str, Any]]) -> None:
+        """Progress callback invoked by the processor as each page completes"""
+        self.pages_total = pages_total
+        self.page_results[page_index] = rows
+
+    def partial_results(self) -> List[Dict[str, Any]]:
+        """Transactions of all completed pages, in page order"""
+        rows = []
+        for page_index in sorted(self.page_results):
+            rows.extend(self.page_results[page_index])
+        return rows
+
+    def to_dict(self, include_partial: bool = False) -> Dict[str, Any]:
+        pages_completed = len(self.page_results)
+        progress = {
+            "pages_total": self.pages_total,
+            "pages_completed": pages_completed,
+            "percent": round(100 * pages_completed / self.pages_total, 1) if self.pages_total else None,
+        }
+        if self.status == JobStatus.COMPLETED:
+            progress["percent"] = 100.0
+
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "filename": self.filename,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": progress,
+            "pages": [
+                {"page": page_index + 1, "transactions": len(rows)}
+                for page_index, rows in sorted(self.page_results.items())
+            ],
+            "page_stats": self.report.to_dict(),
+            "error": self.error,
+        }
+        if include_partial:
+            data["partial_data"] = self.partial_results()
+        return data
+
+
+class JobManager:
+    """Bounded job queue served by a fixed number of in-process workers"""
+
+    def __init__(self, runner: Callable[[Job], Awaitable[List[Dict[str, Any]]]],
+                 max_concurrent: int, max_queue: int, retention_seconds: float):
+        """
+        Args:
+            runner: Coroutine function that processes a job and returns its transactions
+            max_concurrent: Maximum number of jobs running at the same time
+            max_queue: Maximum number of jobs waiting to run before submissions are rejected
+            retention_seconds: How long finished jobs are kept for polling
+        """
+        self.runner = runner
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(1, max_queue)
+        self.retention_seconds = retention_seconds
+        self.jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the worker tasks on the running event loop"""
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrent)]
+
+    async def stop(self) -> None:
+        """Cancel running jobs and stop the workers"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, filename: str, **params) -> Job:
+        """
+        Queue a new job
+
+        Raises:
+            JobQueueFullError: If the queue is at capacity
+        """
+        self._purge_expired()
+        job = Job(filename, params)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError(f"Job queue is full ({self.max_queue} jobs waiting)")
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def retry(self, job_id: str) -> Job:
+        """
+        Queue a job that reprocesses the failed pages of a completed job, reusing the
+        rows of its other pages
+
+        Raises:
+            ValueError: If the job has no failed pages to retry
+            JobQueueFullError: If the queue is at capacity
+        """
+        job = self.jobs[job_id]
+        failed_pages = set(job.report.failed_pages())
+        if job.status != JobStatus.COMPLETED or not failed_pages or "pdf" not in job.params:
+            raise ValueError("Only completed jobs with failed pages can be retried")
+
+        resume_pages = {
+            page_index: rows for page_index, rows in job.page_results.items()
+            if page_index not in failed_pages
+        }
+        params = {**job.params, "resume_pages": resume_pages}
+        retry = self.submit(job.filename, **params)
+        job.params.pop("pdf", None)  # The retry job owns the PDF now
+        return retry
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job. Finished jobs are left unchanged"""
+        job = self.jobs.get(job_id)
+        if job is None or job.status in JobStatus.FINISHED:
+            return job
+
+        job.status = JobStatus.CANCELLED
+        job.finished_at = time.time()
+        if job.task is not None:
+            job.task.cancel()  # The stored PDF is released when the task ends
+        else:
+            self._release_pdf(job)
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        counts = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "jobs": counts,
+        }
+
+    def _purge_expired(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.status in JobStatus.FINISHED and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            self._release_pdf(self.jobs.pop(job_id))
+
+    @staticmethod
+    def _release_pdf(job: Job) -> None:
+        """Drop the job's stored PDF and remove its file"""
+        pdf = job.params.pop("pdf", None)
+        if pdf is not None:
+            pdf.delete()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status == JobStatus.CANCELLED:
+                    continue
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        job.task = asyncio.create_task(self.runner(job))
+        try:
+            job.results = await job.task
+            job.status = JobStatus.COMPLETED
+        except asyncio.CancelledError:
+            if job.status != JobStatus.CANCELLED:
+                # The worker itself is shutting down
+                job.task.cancel()
+                raise
+            logger.info(f"Job {job.id} cancelled")
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed")
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        finally:
+            if job.finished_at is None:
+                job.finished_at = time.time()
+            job.task = None
+            # Release the uploaded PDF; only results are kept for polling. Jobs with failed
+            # pages keep it until they expire so the failed pages can be retried
+            if job.status != JobStatus.COMPLETED or not job.report.failed_pages():
+                self._release_pdf(job)
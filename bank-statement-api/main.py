@@ -1,17 +1,22 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.background import BackgroundTask
 import uvicorn
 import tempfile
 import os
 import json
 import base64
+import hashlib
 import io
 import time
 import logging
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-import pandas as pd
+from typing import List, Dict, Any, Optional, Callable, AsyncIterator, Iterator, Tuple, Union
 import markdown
 from bs4 import BeautifulSoup
 import re
@@ -20,8 +25,30 @@ from invoke.util import debug
 from pdf2image import convert_from_path
 from mistralai import Mistral, DocumentURLChunk, ImageURLChunk, TextChunk
 from natsort import natsorted
-from prompts import BankStatementPrompts, get_column_suggestions, SUGGESTED_BANK_COLUMNS
+from prompts import BankStatementPrompts, get_column_suggestions, SUGGESTED_BANK_COLUMNS, PROMPT_VERSION
 from config import Config
+from cache import create_result_cache
+from artifacts import Artifact, ArtifactStore
+from jobs import JobManager, JobQueueFullError, JobStatus
+from imaging import ImageProfile, IMAGE_PROFILE_PRESETS, parse_image_profile, poppler_render_options, reencode_image
+from fast_path import FastPathMapper
+from page_classifier import score_pages
+from page_index import create_page_index, fingerprint_pages, schema_key
+from batching import estimate_tokens, parse_batch_response, plan_batches, split_by_payload
+from prompt_encoding import PromptEncoding, encode_page_tables, split_page_content
+from table_parser import UnsupportedMarkdown, parse_markdown_tables, tables_to_html
+from stitching import TableStitcher
+from textlayer import TextSource, page_count, read_text_layer
+from transactions import TransactionTable
+from exports import EXPORT_FORMATS, ExportUnavailableError, check_available, export_chunks, export_filename
+from report import ProcessingReport, PageRoute, PageStatus
+from resilience import CircuitOpenError, ResilientCaller
+from metrics import MetricsRegistry, log_event
+from scheduler import FairScheduler
+from batch_files import SOURCE_COLUMN, expand_uploads, merged_rows, per_file_csv_zip, rows_to_csv
+from streaming import STREAM_MEDIA_TYPES, STREAM_HEADERS, ndjson_stream, sse_stream, csv_stream
+from rate_limiter import TokenBucketRateLimiter
+from uploads import StoredPdf, UploadSizeLimitMiddleware, UploadTooLargeError, store_pdf_bytes, store_pdf_stream
 
 # Configure logging
 logging.basicConfig(level=Config.LOG_LEVEL, format=Config.LOG_FORMAT)
@@ -38,44 +65,235 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized single-file uploads while they arrive, before they are parsed and stored
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    paths=["/process-bank-statement", "/process-bank-statement-json", "/jobs"],
+    max_file_size=Config.MAX_FILE_SIZE,
+)
+
 # Initialize Mistral client
 client = Mistral(api_key=Config.MISTRAL_API_KEY)
 
+# Shared limiter for all chat calls across pages and requests
+rate_limiter = TokenBucketRateLimiter(Config.API_REQUESTS_PER_SECOND, Config.API_RATE_LIMIT_BURST)
+
+# Process-wide counters and stage timings exposed on /metrics
+metrics = MetricsRegistry(enabled=Config.METRICS_ENABLED)
+metrics.counter("statements_total", "Statements processed, by outcome (completed, failed, aborted)")
+metrics.counter("upload_bytes_total", "PDF bytes uploaded to the OCR service")
+metrics.counter("pages_total", "Pages of processed statements")
+metrics.counter("text_layer_pages_total", "Pages by text source (text_layer, ocr) and routing reason")
+metrics.counter("ocr_seconds_saved_total", "Estimated upload and OCR seconds saved by reading the text layer")
+metrics.counter("tables_total", "Tables parsed from the OCR markdown")
+metrics.counter("empty_pages_total", "Pages skipped because they contain no table")
+metrics.counter("fast_path_pages_total", "Pages mapped without the LLM")
+metrics.counter("classifier_skipped_pages_total", "Pages with tables skipped by the page classifier")
+metrics.counter("stitch_repairs_total", "Table stitching repairs across page breaks, by kind")
+metrics.counter("llm_calls_total", "Completed chat requests")
+metrics.counter("llm_tokens_total", "Chat tokens, by kind (prompt, completion)")
+metrics.counter("llm_json_errors_total", "Chat responses that could not be parsed")
+metrics.counter("page_index_lookups_total", "Pages looked up in the page fingerprint index, by result (hit, miss)")
+metrics.counter("llm_split_pages_total", "Pages sent as several requests for exceeding LLM_PAGE_TOKEN_BUDGET")
+metrics.counter("failed_pages_total", "Pages without a usable extraction after retries")
+metrics.counter("rate_limit_wait_seconds_total", "Seconds spent waiting for the shared rate limiter")
+metrics.counter("api_retries_total", "Retried Mistral API calls, by operation")
+metrics.counter("api_failures_total", "Mistral API calls that failed after retries, by operation")
+metrics.counter("api_rejected_calls_total", "Calls rejected by an open circuit breaker, by operation")
+metrics.counter("output_evictions_total", "Stored outputs removed by the output store, by reason (ttl, size)")
+metrics.histogram("stage_seconds", "Duration of pipeline stages, by stage")
+
+# Retries, timeouts and circuit breakers for the Mistral file upload, OCR and chat calls
+api_caller = ResilientCaller(
+    max_attempts=Config.RETRY_MAX_ATTEMPTS,
+    base_delay=Config.RETRY_BASE_DELAY,
+    max_delay=Config.RETRY_MAX_DELAY,
+    timeouts={"upload": Config.UPLOAD_TIMEOUT, "ocr": Config.OCR_TIMEOUT, "chat": Config.CHAT_TIMEOUT},
+    failure_threshold=Config.CIRCUIT_FAILURE_THRESHOLD,
+    reset_seconds=Config.CIRCUIT_RESET_SECONDS,
+    metrics=metrics
+)
+
+# Executor for CPU-bound work (markdown parsing, PDF rasterization) kept off the event loop
+cpu_executor = ThreadPoolExecutor(max_workers=Config.CPU_WORKERS, thread_name_prefix="cpu")
+
+# Content-addressed cache for OCR responses and per-page extractions
+result_cache = create_result_cache(Config.CACHE_BACKEND, Config.CACHE_MAX_BYTES, Config.CACHE_DIR)
+
+# Page extractions by page fingerprint, shared by all uploads (None when disabled)
+page_index = create_page_index(
+    Config.PAGE_INDEX_ENABLED, Config.PAGE_INDEX_PATH, Config.PAGE_INDEX_MAX_BYTES, Config.PAGE_INDEX_MAX_DISTANCE
+)
+
+# Generated CSV downloads, expired and size-capped by a background sweeper
+artifact_store = ArtifactStore(
+    Config.OUTPUT_STORE,
+    Config.OUTPUT_DIR,
+    ttl_seconds=Config.OUTPUT_TTL_SECONDS,
+    max_bytes=Config.OUTPUT_MAX_BYTES,
+    sweep_interval=Config.OUTPUT_SWEEP_INTERVAL,
+    metrics=metrics
+)
 
 
 class BankStatementProcessor:
     def __init__(self):
         self.client = client
+        self.rate_limiter = rate_limiter
+        self.api = api_caller
+        self.metrics = metrics
+        self.executor = cpu_executor
+        self.cache = result_cache
+        self.page_index = page_index
         self.prompts = BankStatementPrompts()
-    
-    def get_ocr_markdowns(self, pdf_bytes: bytes, filename: str) -> Dict[str, Any]:
-        """Extract OCR markdown from PDF bytes"""
+        self.fast_path = FastPathMapper(Config.FAST_PATH_FUZZY_THRESHOLD)
+        # JSON output examples by (columns, compact), built once per column schema
+        self.json_formats: Dict[Tuple[Tuple[str, ...], bool], str] = {}
+        # Signed URLs of uploads whose OCR has not succeeded yet, so a retry skips the upload
+        self.pending_uploads: Dict[str, Tuple[str, float]] = {}
+        # One upload at a time per document, so concurrent OCR chunks share it
+        self.upload_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        # Upload and OCR seconds and pages of completed OCR calls, to estimate what the text layer saves
+        self.ocr_seconds = 0.0
+        self.ocr_pages = 0
+
+    async def run_in_executor(self, func, *args):
+        """Run a blocking or CPU-bound callable on the CPU executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def record_stage(self, report: Optional[ProcessingReport], stage: str, seconds: float) -> None:
+        """Add a stage duration to the request's timings and the stage histogram"""
+        if report:
+            report.timings.add(stage, seconds)
+        self.metrics.observe("stage_seconds", seconds, stage=stage)
+
+    @contextmanager
+    def span(self, report: Optional[ProcessingReport], stage: str):
+        """Time the enclosed block as one span of a pipeline stage"""
+        started = time.perf_counter()
         try:
-            # Upload PDF file to Mistral's OCR service
-            uploaded_file = self.client.files.upload(
-                file={
-                    "file_name": filename,
-                    "content": pdf_bytes,
-                },
-                purpose="ocr",
-            )
+            yield
+        finally:
+            self.record_stage(report, stage, time.perf_counter() - started)
+
+    async def upload_for_ocr(self, pdf: StoredPdf, filename: str, upload_key: str,
+                             report: Optional[ProcessingReport] = None) -> str:
+        """
+        Upload the PDF to Mistral and return a signed URL for OCR
+
+        The file is streamed from disk, reopened for every attempt. The URL is kept until OCR of the document succeeds, so when OCR fails (or the
+        request is retried) within the URL's lifetime the upload is not repeated. Concurrent calls for the
+        same key wait for one upload.
+        """
+        lock = self.upload_locks.get(upload_key)
+        if lock is None:
+            lock = self.upload_locks[upload_key] = asyncio.Lock()
+        async with lock:
+            pending = self.pending_uploads.get(upload_key)
+            if pending and pending[1] > time.monotonic():
+                return pending[0]
+            return await self.upload_document(pdf, filename, upload_key, report)
+
+    async def upload_document(self, pdf: StoredPdf, filename: str, upload_key: str,
+                              report: Optional[ProcessingReport] = None) -> str:
+        """Upload the PDF, remember its signed URL under upload_key and return it"""
+        started = time.perf_counter()
+
+        async def upload():
+            with pdf.open() as content:
+                return await self.client.files.upload_async(
+                    file={
+                        "file_name": filename,
+                        "content": content,
+                    },
+                    purpose="ocr",
+                )
 
-            # Get URL for the uploaded file
-            signed_url = self.client.files.get_signed_url(file_id=uploaded_file.id, expiry=1)
+        with self.span(report, "upload"):
+            uploaded_file, _ = await self.api.call("upload", upload)
+            self.metrics.inc("upload_bytes_total", pdf.size)
 
-            # Process PDF with OCR
-            pdf_response = self.client.ocr.process(
-                document=DocumentURLChunk(document_url=signed_url.url),
-                model=Config.MISTRAL_OCR_MODEL,
-                include_image_base64=True
+            # Get URL for the uploaded file (valid for one hour)
+            signed_url, _ = await self.api.call(
+                "upload", self.client.files.get_signed_url_async, file_id=uploaded_file.id, expiry=1
             )
+        self.pending_uploads[upload_key] = (signed_url.url, time.monotonic() + Config.UPLOAD_URL_REUSE_SECONDS)
+        self.ocr_seconds += time.perf_counter() - started
+        return signed_url.url
+
+    async def get_ocr_markdowns(self, pdf: StoredPdf, filename: str, upload_key: Optional[str] = None,
+                                report: Optional[ProcessingReport] = None,
+                                pages: Optional[List[int]] = None, release_upload: bool = True) -> Dict[str, Any]:
+        """
+        Extract OCR markdown from a stored PDF
+
+        Args:
+            pages: Zero-based indices of the pages to OCR, in ascending order; all pages when None.
+                The response has one entry per requested page, in the same order
+            release_upload: Forget the signed URL once OCR succeeds; False while other pages of
+                the same upload are still to be OCR'd
+        """
+        upload_key = upload_key or pdf.sha256
+        try:
+            # Upload PDF file to Mistral's OCR service
+            document_url = await self.upload_for_ocr(pdf, filename, upload_key, report)
+            started = time.perf_counter()
 
-            # Convert response to JSON format
-            response_dict = json.loads(pdf_response.model_dump_json())
-            return response_dict
+            # Process PDF with OCR; embedded images are only requested when they replace local rendering
+            use_ocr_images = Config.PAGE_IMAGE_SOURCE == "ocr"
+            options = {} if pages is None else {"pages": pages}
+            with self.span(report, "ocr"):
+                pdf_response, _ = await self.api.call(
+                    "ocr", self.client.ocr.process_async,
+                    document=DocumentURLChunk(document_url=document_url),
+                    model=Config.MISTRAL_OCR_MODEL,
+                    include_image_base64=use_ocr_images,
+                    **options
+                )
+            if release_upload:
+                self.pending_uploads.pop(upload_key, None)
+            self.ocr_seconds += time.perf_counter() - started
+            self.ocr_pages += len(pdf_response.pages)
+
+            # Read the fields we need straight from the response models
+            return {
+                "pages": [
+                    {
+                        "index": page.index,
+                        "markdown": page.markdown,
+                        "page_image": self.get_ocr_page_image(page) if use_ocr_images else None,
+                    }
+                    for page in pdf_response.pages
+                ]
+            }
+        except CircuitOpenError as e:
+            raise HTTPException(status_code=503, detail=f"OCR processing failed: {str(e)}",
+                                headers={"Retry-After": str(int(e.retry_after))})
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"OCR processing failed: {str(e)}")
 
+    def get_ocr_page_image(self, page) -> Optional[str]:
+        """
+        Return an OCR-extracted image as a data URL when it covers (nearly) the whole page,
+        which is the case for scanned statements. Otherwise the page has to be rendered locally.
+        """
+        dimensions = page.dimensions
+        if not dimensions or not dimensions.width or not dimensions.height:
+            return None
+
+        page_area = dimensions.width * dimensions.height
+        for image in page.images or []:
+            if not image.image_base64:
+                continue
+            width = (image.bottom_right_x or 0) - (image.top_left_x or 0)
+            height = (image.bottom_right_y or 0) - (image.top_left_y or 0)
+            if width * height >= Config.OCR_IMAGE_MIN_COVERAGE * page_area:
+                if image.image_base64.startswith("data:"):
+                    return image.image_base64
+                return f"data:image/jpeg;base64,{image.image_base64}"
+        return None
+
     def preprocess_markdown(self, md_text: str) -> str:
         """Clean markdown text"""
         return md_text.replace("<br>", "").replace("<br/>", "").replace("<br />", "")
@@ -112,7 +330,17 @@ class BankStatementProcessor:
         return self.markdown_to_html(clean_md)
 
     def extract_all_table_parts(self, markdown_text: str) -> List[tuple]:
-        """Extract tables from markdown text"""
+        """Extract tables from markdown text in a single pass, without the HTML round-trip"""
+        clean_md = self.preprocess_markdown(markdown_text)
+        if "$" in clean_md:
+            clean_md = self.strip_latex_math(clean_md)
+        try:
+            return parse_markdown_tables(clean_md)
+        except UnsupportedMarkdown:
+            return self.extract_all_table_parts_html(markdown_text)
+
+    def extract_all_table_parts_html(self, markdown_text: str) -> List[tuple]:
+        """Extract tables by rendering the markdown to HTML and reading it back"""
         html = self.markdown_table_to_html(markdown_text)
         soup = BeautifulSoup(html, "html.parser")
         tables = soup.find_all("table")
@@ -128,23 +356,68 @@ class BankStatementProcessor:
                 all_tables.append((headers, rows))
         return all_tables
 
-    def convert_pdf_to_images(self, pdf_path: str) -> List[Dict[str, str]]:
-        """Convert PDF pages to base64-encoded images"""
+    def iter_pdf_images(self, pdf_path: str, page_indices: List[int], window: int = 1,
+                        profile: Optional[ImageProfile] = None) -> Iterator[Tuple[int, Dict[str, str]]]:
+        """
+        Lazily rasterize selected PDF pages to base64-encoded images
+
+        Pages are rendered by poppler straight to image files in a temporary directory,
+        a window of consecutive pages at a time, so only the current window is ever held
+        in memory. PIL is only involved when the profile needs resizing or WebP output.
+
+        Args:
+            pdf_path: Path to the PDF file
+            page_indices: Zero-based page indices to render, in ascending order
+            window: Maximum number of consecutive pages rendered per poppler call
+            profile: Image encoding profile; defaults to the configured profile
+
+        Yields:
+            (page_index, image_block) tuples
+        """
+        # Group the requested pages into runs of consecutive pages no longer than window
+        runs = []
+        for page_index in page_indices:
+            if runs and page_index == runs[-1][-1] + 1 and len(runs[-1]) < window:
+                runs[-1].append(page_index)
+            else:
+                runs.append([page_index])
+
+        profile = profile or ImageProfile.from_config()
+        fmt, render_options = poppler_render_options(profile)
+
         try:
-            images = convert_from_path(pdf_path)
-            encoded_images = []
-            for img in images:
-                buffered = io.BytesIO()
-                img.save(buffered, format="PNG")
-                encoded = base64.b64encode(buffered.getvalue()).decode("utf-8")
-                encoded_images.append({
-                    "type": "image_url",
-                    "image_url": f"data:image/png;base64,{encoded}"
-                })
-            return encoded_images
+            with tempfile.TemporaryDirectory(dir=Config.TEMP_DIR) as output_folder:
+                for run in runs:
+                    image_paths = convert_from_path(
+                        pdf_path,
+                        first_page=run[0] + 1,
+                        last_page=run[-1] + 1,
+                        output_folder=output_folder,
+                        fmt=fmt,
+                        paths_only=True,
+                        **render_options
+                    )
+                    for page_index, image_path in zip(run, image_paths):
+                        with open(image_path, "rb") as f:
+                            image_bytes = f.read()
+                        os.unlink(image_path)
+                        if profile.needs_reencode:
+                            image_bytes = reencode_image(image_bytes, profile)
+                        encoded = base64.b64encode(image_bytes).decode("utf-8")
+                        yield page_index, {
+                            "type": "image_url",
+                            "image_url": f"data:{profile.mime_type};base64,{encoded}"
+                        }
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Image conversion failed: {str(e)}")
 
+    def render_page_image(self, pdf_path: str, page_index: int,
+                          profile: Optional[ImageProfile] = None) -> Dict[str, str]:
+        """Rasterize a single PDF page to a base64-encoded image block"""
+        for _, image_data in self.iter_pdf_images(pdf_path, [page_index], profile=profile):
+            return image_data
+        raise HTTPException(status_code=500, detail=f"Image conversion failed: page {page_index + 1} not found")
+
     def infer_json_type(self, col_name: str) -> str:
         """Infer JSON type from column name"""
         col = col_name.lower()
@@ -155,114 +428,1077 @@ class BankStatementProcessor:
         else:
             return "string"
 
-    def generate_json_format(self, columns: List[str]) -> str:
-        """Generate JSON format example"""
-        lines = [f'    "{col}": "{self.infer_json_type(col)}"' for col in columns]
-        return "[\n  {\n" + ",\n".join(lines) + "\n  },\n  ...\n]"
+    def column_types(self, columns: List[str]) -> Dict[str, str]:
+        return {col: self.infer_json_type(col) for col in columns}
+
+    def generate_json_format(self, columns: List[str], compact: bool = False) -> str:
+        """Generate JSON format example (on one line when compact)"""
+        key = (tuple(columns), compact)
+        json_format = self.json_formats.get(key)
+        if json_format is None:
+            if compact:
+                json_format = json.dumps([self.column_types(columns)])
+            else:
+                lines = [f'    "{col}": "{self.infer_json_type(col)}"' for col in columns]
+                json_format = "[\n  {\n" + ",\n".join(lines) + "\n  },\n  ...\n]"
+            self.json_formats[key] = json_format
+        return json_format
+
+    def compact_prompt(self) -> bool:
+        return Config.LLM_PROMPT_ENCODING == PromptEncoding.COMPACT
+
+    def prompt_version(self, batch: bool = False) -> str:
+        """Prompt version part of the page cache key; the HTML prompt keeps the original version"""
+        version = f"{PROMPT_VERSION}-compact" if self.compact_prompt() else PROMPT_VERSION
+        return f"{version}-batch" if batch else version
+
+    def page_prompt(self, page_content: str, user_columns: List[str],
+                    part: Optional[Tuple[int, int]] = None) -> str:
+        """Single-page extraction prompt for a page (or part of a page) in the configured encoding"""
+        compact = self.compact_prompt()
+        json_example = self.generate_json_format(user_columns, compact)
+        if compact:
+            return self.prompts.get_compact_extraction_prompt(user_columns, json_example, page_content, part)
+        return self.prompts.get_data_extraction_prompt(user_columns, json_example, page_content, part)
+
+    def build_page_prompts(self, page_content: str, user_columns: List[str]) -> List[str]:
+        """
+        Extraction prompts for one page: a single prompt, or one per part of its rows when the
+        prompt would exceed LLM_PAGE_TOKEN_BUDGET estimated tokens
+        """
+        prompt = self.page_prompt(page_content, user_columns)
+        budget = Config.LLM_PAGE_TOKEN_BUDGET
+        if budget <= 0 or estimate_tokens(prompt) <= budget:
+            return [prompt]
+        instruction_tokens = estimate_tokens(self.page_prompt("", user_columns, (99, 99)))
+        parts = split_page_content(page_content, Config.LLM_PROMPT_ENCODING, max(budget - instruction_tokens, 1))
+        if len(parts) == 1:
+            return [prompt]
+        return [self.page_prompt(content, user_columns, (number, len(parts)))
+                for number, content in enumerate(parts, start=1)]
+
+    def parse_llm_response(self, response_content: str) -> List[Dict[str, Any]]:
+        """Parse the chat response into a list of transactions (raises json.JSONDecodeError)"""
+        result = json.loads(response_content)
+        # Ensure it's a list
+        if isinstance(result, dict):
+            # If it's wrapped in an object, try to extract the array
+            for value in result.values():
+                if isinstance(value, list):
+                    return value
+            return []
+        return result if isinstance(result, list) else []
+
+    def usage_tokens(self, chat_response) -> Tuple[int, int]:
+        """Prompt and completion token counts reported for a chat response"""
+        usage = getattr(chat_response, "usage", None)
+        return (getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0)
+
+    async def complete_chat(self, content: list, report: Optional[ProcessingReport] = None) -> Tuple[Any, int, float]:
+        """
+        Send one extraction request to the chat model through the rate limiter and retry layer
+
+        Returns:
+            (chat_response, attempts, seconds) where seconds excludes rate-limiter waits
+
+        Raises:
+            CallFailedError: If the request fails after its retries
+        """
+        waited = 0.0
+
+        async def wait_for_rate_limit():
+            nonlocal waited
+            waited += await self.rate_limiter.acquire_async()
 
-    def process_page_with_llm(self, html_content: str, image_data: Dict[str, str], 
-                             user_columns: List[str]) -> List[Dict[str, Any]]:
-        """Process a single page using LLM"""
+        started = time.perf_counter()
         try:
-            json_example = self.generate_json_format(user_columns)
-            prompt = self.prompts.get_data_extraction_prompt(user_columns, json_example, html_content)
-            
-            chat_response = self.client.chat.complete(
+            chat_response, attempts = await self.api.call(
+                "chat", self.client.chat.complete_async,
+                before_attempt=wait_for_rate_limit,
                 model=Config.MISTRAL_CHAT_MODEL,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            ImageURLChunk(image_url=image_data["image_url"]),
-                            TextChunk(text=prompt),
-                        ],
-                    }
-                ],
+                messages=[{"role": "user", "content": content}],
                 response_format={"type": "json_object"},
                 temperature=0
             )
+        finally:
+            elapsed = time.perf_counter() - started - waited
+            self.record_stage(report, "llm", elapsed)
+            if waited:
+                self.record_stage(report, "rate_limit_wait", waited)
+                self.metrics.inc("rate_limit_wait_seconds_total", waited)
 
-            # Parse JSON response
-            response_content = chat_response.choices[0].message.content
-            try:
-                result = json.loads(response_content)
-                # Ensure it's a list
-                if isinstance(result, dict):
-                    # If it's wrapped in an object, try to extract the array
-                    for value in result.values():
-                        if isinstance(value, list):
-                            return value
+        prompt_tokens, completion_tokens = self.usage_tokens(chat_response)
+        self.metrics.inc("llm_calls_total")
+        self.metrics.inc("llm_tokens_total", prompt_tokens, kind="prompt")
+        self.metrics.inc("llm_tokens_total", completion_tokens, kind="completion")
+        return chat_response, attempts, elapsed
+
+    async def process_page_with_llm(self, html_content: str, image_data: Dict[str, str],
+                                    user_columns: List[str], use_cache: bool = True,
+                                    refresh_cache: bool = False,
+                                    report: Optional[ProcessingReport] = None,
+                                    page_index: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Process a single page using LLM
+
+        Transient API failures are retried. A page that still fails returns no rows and is
+        recorded as failed in the report, and is not cached, so reprocessing retries it.
+        A page over the prompt token budget is sent as several requests, one per part of
+        its rows, and their transactions are joined in row order.
+        """
+        def record_status(status, error=None):
+            if report and page_index is not None:
+                report.record_status(page_index, status, error)
+
+        cache_key = self.cache.page_key(
+            html_content, image_data["image_url"], user_columns, Config.MISTRAL_CHAT_MODEL, self.prompt_version()
+        )
+        if use_cache and not refresh_cache:
+            cached = self.cache.get("page", cache_key)
+            if cached is not None:
+                record_status(PageStatus.OK)
+                return cached
+
+        try:
+            prompts = self.build_page_prompts(html_content, user_columns)
+            if report and page_index is not None:
+                report.record_prompt(page_index, sum(map(estimate_tokens, prompts)), len(prompts))
+            if len(prompts) > 1:
+                self.metrics.inc("llm_split_pages_total")
+
+            result = []
+            attempts = 1
+            for prompt in prompts:
+                chat_response, part_attempts, elapsed = await self.complete_chat(
+                    [
+                        ImageURLChunk(image_url=image_data["image_url"]),
+                        TextChunk(text=prompt),
+                    ],
+                    report
+                )
+                attempts = max(attempts, part_attempts)
+
+                # Parse JSON response
+                response_content = chat_response.choices[0].message.content
+                try:
+                    rows = self.parse_llm_response(response_content)
+                except json.JSONDecodeError:
+                    rows = None
+                if report:
+                    report.retries += part_attempts - 1
+                    report.record_llm_call(1, len(rows or []), *self.usage_tokens(chat_response), elapsed)
+                if rows is None:
+                    self.metrics.inc("llm_json_errors_total")
+                    logger.warning(f"Unparseable LLM response for page {self.page_label(page_index)}")
+                    self.metrics.inc("failed_pages_total")
+                    record_status(PageStatus.FAILED, "Unparseable model response")
                     return []
-                return result if isinstance(result, list) else []
-            except json.JSONDecodeError:
-                return []
-                
+                result.extend(rows)
+
         except Exception as e:
-            print(f"LLM processing error: {str(e)}")
+            logger.warning(f"LLM processing failed for page {self.page_label(page_index)}: {str(e)}")
+            if report:
+                report.retries += max(getattr(e, "attempts", 1) - 1, 0)
+            self.metrics.inc("failed_pages_total")
+            record_status(PageStatus.FAILED, str(e))
             return []
 
-    def process_bank_statement(self, pdf_bytes: bytes, filename: str, user_columns: List[str]) -> List[Dict[str, Any]]:
-        """Main processing function"""
-        
-        # Step 1: Get OCR markdowns
-        ocr_response = self.get_ocr_markdowns(pdf_bytes, filename)
-        
-        # Step 2: Process markdowns to HTML tables per page
-        page_html_contents = []
-        current_table = {"headers": None, "rows": []}
-        
-        for page in ocr_response["pages"]:
-            markdown_text = page["markdown"]
-            all_tables_from_page = self.extract_all_table_parts(markdown_text)
-            
-            page_tables = []
-            for headers, rows in all_tables_from_page:
-                page_tables.append((headers, rows))
-                
-                if headers == current_table["headers"]:
-                    current_table["rows"].extend(rows)
+        record_status(PageStatus.RETRIED if attempts > 1 else PageStatus.OK)
+
+        # Only successful extractions are cached, so failed pages are retried next time
+        if use_cache:
+            self.cache.set("page", cache_key, result)
+        return result
+
+    def lookup_page_index(self, fingerprints: Dict[int, Tuple[str, str]], schema: str) -> Dict[int, List[Dict[str, Any]]]:
+        """Rows stored in the page fingerprint index for the (text, image) fingerprinted pages found there"""
+        found = {}
+        for page_index, (text_hash, image_hash) in fingerprints.items():
+            rows = self.page_index.lookup(text_hash, schema, image_hash)
+            if rows is not None:
+                found[page_index] = rows
+        return found
+
+    def page_label(self, page_index: Optional[int]) -> str:
+        return str(page_index + 1) if page_index is not None else "?"
+
+    async def process_batch_with_llm(self, batch: List[tuple], image_urls: List[str], user_columns: List[str],
+                                     use_cache: bool = True, refresh_cache: bool = False,
+                                     report: Optional[ProcessingReport] = None) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Process several pages in one chat request, falling back to one request per page
+        if the response is malformed or misses a page
+
+        Args:
+            batch: (page_index, html_content, page_image) tuples in page order
+            image_urls: Image data URL of each page in the batch
+            user_columns: List of user-defined column names
+            use_cache: Read and write the page-level result cache
+            refresh_cache: Ignore cached results and overwrite them
+            report: Optional ProcessingReport recording tokens and latency
+
+        Returns:
+            Dict of page index -> transactions
+        """
+        results = {}
+        pending = []
+        fell_back = set()  # pages of an unusable batched response
+        for position, (page_index, html_content, _) in enumerate(batch):
+            cache_key = self.cache.page_key(
+                html_content, image_urls[position], user_columns, Config.MISTRAL_CHAT_MODEL, self.prompt_version(True)
+            )
+            cached = self.cache.get("page", cache_key) if use_cache and not refresh_cache else None
+            if cached is not None:
+                results[page_index] = cached
+                if report:
+                    report.record_status(page_index, PageStatus.OK)
+            else:
+                pending.append((position, cache_key))
+
+        # Pages over the prompt token budget are split by rows, which only the single-page path does
+        oversized = [
+            (position, cache_key) for position, cache_key in pending
+            if len(self.build_page_prompts(batch[position][1], user_columns)) > 1
+        ]
+        pending = [entry for entry in pending if entry not in oversized]
+
+        if len(pending) > 1:
+            page_numbers = [batch[position][0] + 1 for position, _ in pending]
+            compact = self.compact_prompt()
+            json_example = self.generate_json_format(user_columns, compact)
+            if compact:
+                prompt = self.prompts.get_compact_batch_prompt(user_columns, json_example, page_numbers)
+            else:
+                prompt = self.prompts.get_batch_extraction_prompt(user_columns, json_example, page_numbers)
+            label = "tables" if compact else "HTML table"
+            content = [TextChunk(text=prompt)]
+            for position, _ in pending:
+                page_index, html_content, _ = batch[position]
+                page_text = f"Page {page_index + 1} {label}:\n{html_content}"
+                content.append(ImageURLChunk(image_url=image_urls[position]))
+                content.append(TextChunk(text=page_text))
+                if report:
+                    # Each page is charged its own tables and an equal share of the instructions
+                    report.record_prompt(page_index, estimate_tokens(page_text) + estimate_tokens(prompt) // len(pending))
+
+            parsed = None
+            attempts = 1
+            try:
+                chat_response, attempts, elapsed = await self.complete_chat(content, report)
+                parsed = parse_batch_response(chat_response.choices[0].message.content, page_numbers)
+                if parsed is None:
+                    self.metrics.inc("llm_json_errors_total")
+                if report:
+                    report.retries += attempts - 1
+                    transactions = sum(len(rows) for rows in parsed.values()) if parsed else 0
+                    report.record_llm_call(len(pending), transactions, *self.usage_tokens(chat_response), elapsed)
+            except Exception as e:
+                logger.warning(f"Batched LLM request for pages {page_numbers} failed: {str(e)}")
+                if report:
+                    report.retries += max(getattr(e, "attempts", 1) - 1, 0)
+
+            if parsed is not None:
+                for (_, cache_key), page_number in zip(pending, page_numbers):
+                    results[page_number - 1] = parsed[page_number]
+                    if use_cache:
+                        self.cache.set("page", cache_key, parsed[page_number])
+                    if report:
+                        report.record_status(page_number - 1, PageStatus.RETRIED if attempts > 1 else PageStatus.OK)
+                pending = []
+            else:
+                logger.warning(f"Unusable batched response for pages {page_numbers}, retrying page by page")
+                fell_back = {batch[position][0] for position, _ in pending}
+                if report:
+                    report.llm_fallback_pages += len(pending)
+        pending.extend(oversized)
+
+        # Pages not covered by a batched response go through the single-page path
+        single_results = await asyncio.gather(*[
+            self.process_page_with_llm(
+                batch[position][1], {"type": "image_url", "image_url": image_urls[position]},
+                user_columns, use_cache, refresh_cache, report, batch[position][0]
+            )
+            for position, _ in pending
+        ])
+        for (position, _), rows in zip(pending, single_results):
+            page_index = batch[position][0]
+            results[page_index] = rows
+            if page_index in fell_back and report and report.statuses.get(page_index) == PageStatus.OK:
+                report.record_status(page_index, PageStatus.RETRIED)  # Recovered from the batched request
+        return results
+
+    async def iter_pages_with_llm(self, pages: List[tuple], pdf_path: str, user_columns: List[str],
+                                  use_cache: bool = True, refresh_cache: bool = False,
+                                  on_page_done: Optional[Callable] = None,
+                                  image_profile: Optional[ImageProfile] = None,
+                                  batch_pages: int = 1,
+                                  report: Optional[ProcessingReport] = None,
+                                  scheduler: Optional[FairScheduler] = None) -> AsyncIterator[tuple]:
+        """
+        Dispatch pages to the LLM concurrently, throttled by the shared rate limiter, and
+        yield each page's results as soon as it and all pages before it have completed
+
+        Each page image is rendered just before its chat request and released once the
+        request returns, so at most LLM_MAX_CONCURRENCY requests' page images are held in memory.
+
+        With batch_pages > 1, consecutive pages are packed into one request up to
+        LLM_BATCH_TOKEN_BUDGET estimated tokens and LLM_BATCH_MAX_PAYLOAD_BYTES of page data.
+
+        Args:
+            pages: List of (page_index, html_content, page_image) tuples in page order, where
+                page_image is an image data URL from OCR or None to render the page locally
+            pdf_path: Path to the PDF file the page images are rendered from
+            user_columns: List of user-defined column names
+            use_cache: Read and write the page-level result cache
+            refresh_cache: Ignore cached results and overwrite them
+            on_page_done: Optional callback(page_index, pages_total, rows) invoked as each page completes
+            image_profile: Page image encoding profile; defaults to the configured profile
+            batch_pages: Maximum pages per chat request (1 = one request per page)
+            report: Optional ProcessingReport recording tokens and latency
+            scheduler: Concurrency limit shared with other statements (multi-file batches);
+                defaults to a limit of LLM_MAX_CONCURRENCY for this statement alone
+
+        Yields:
+            (page_index, rows) tuples in page order
+        """
+        if scheduler is None:
+            scheduler = FairScheduler(Config.LLM_MAX_CONCURRENCY)
+        tasks = self.dispatch_pages_with_llm(
+            pages, pdf_path, user_columns, use_cache, refresh_cache, on_page_done, image_profile,
+            batch_pages, report, scheduler, object()
+        )
+        try:
+            for batch, task in tasks:
+                results = await task
+                for page_index, _, _ in batch:
+                    yield page_index, results[page_index]
+        finally:
+            # Stop outstanding pages if the consumer goes away (e.g. client disconnect)
+            for _, task in tasks:
+                task.cancel()
+
+    def dispatch_pages_with_llm(self, pages: List[tuple], pdf_path: str, user_columns: List[str],
+                                use_cache: bool, refresh_cache: bool, on_page_done: Optional[Callable],
+                                image_profile: Optional[ImageProfile], batch_pages: int,
+                                report: Optional[ProcessingReport], scheduler: FairScheduler,
+                                owner: object) -> List[Tuple[List[tuple], asyncio.Task]]:
+        """
+        Start the chat requests for pages (see iter_pages_with_llm) without waiting for them
+
+        Args:
+            owner: The statement's turn in the scheduler rotation; the same object for every
+                call made for one statement
+
+        Returns:
+            (batch of page tuples, task returning page index -> rows) pairs in page order
+        """
+        async def render(page_index, page_image):
+            if page_image:
+                return {"type": "image_url", "image_url": page_image}
+            with self.span(report, "render"):
+                return await self.run_in_executor(self.render_page_image, pdf_path, page_index, image_profile)
+
+        async def run_page(page_index, html_content, page_image):
+            async with scheduler.slot(owner):
+                image_data = await render(page_index, page_image)
+                rows = await self.process_page_with_llm(
+                    html_content, image_data, user_columns, use_cache, refresh_cache, report, page_index
+                )
+            if on_page_done:
+                on_page_done(page_index, len(pages), rows)
+            return {page_index: rows}
+
+        async def run_batch(batch):
+            async with scheduler.slot(owner):
+                image_urls = [(await render(page_index, page_image))["image_url"]
+                              for page_index, _, page_image in batch]
+                results = {}
+                for positions in split_by_payload(batch, image_urls, Config.LLM_BATCH_MAX_PAYLOAD_BYTES):
+                    results.update(await self.process_batch_with_llm(
+                        [batch[pos] for pos in positions], [image_urls[pos] for pos in positions],
+                        user_columns, use_cache, refresh_cache, report
+                    ))
+            if on_page_done:
+                for page_index, _, _ in batch:
+                    on_page_done(page_index, len(pages), results[page_index])
+            return results
+
+        if batch_pages > 1:
+            batches = plan_batches(pages, batch_pages, Config.LLM_BATCH_TOKEN_BUDGET, Config.LLM_BATCH_IMAGE_TOKENS)
+        else:
+            batches = [[page] for page in pages]
+        return [
+            (batch, asyncio.create_task(run_batch(batch) if len(batch) > 1 else run_page(*batch[0])))
+            for batch in batches
+        ]
+
+    async def process_pages_with_llm(self, pages: List[tuple], pdf_path: str, user_columns: List[str],
+                                     use_cache: bool = True, refresh_cache: bool = False,
+                                     on_page_done: Optional[Callable] = None,
+                                     image_profile: Optional[ImageProfile] = None,
+                                     batch_pages: int = 1,
+                                     report: Optional[ProcessingReport] = None,
+                                     scheduler: Optional[FairScheduler] = None) -> List[List[Dict[str, Any]]]:
+        """Process pages with the LLM and return the per-page results in page order"""
+        return [
+            rows async for _, rows in self.iter_pages_with_llm(
+                pages, pdf_path, user_columns, use_cache, refresh_cache, on_page_done, image_profile,
+                batch_pages, report, scheduler
+            )
+        ]
+
+    def extract_page_tables(self, pages: List[Dict[str, Any]]) -> List[List[tuple]]:
+        """Parse the OCR markdown of every page into its (headers, rows) tables"""
+        # Tables are kept per page; the rows lists must not be shared between pages since
+        # the fast path and the LLM prompt both read them after the whole document is parsed
+        return [self.extract_all_table_parts(page["markdown"]) for page in pages]
+
+    def page_tables_to_html(self, page_tables: List[tuple]) -> str:
+        """Generate the HTML sent to the LLM for one page's tables"""
+        return tables_to_html(page_tables)
+
+    def page_tables_to_prompt(self, page_tables: List[tuple]) -> str:
+        """Encode one page's tables for the LLM prompt in the configured encoding (HTML or compact)"""
+        return encode_page_tables(page_tables, Config.LLM_PROMPT_ENCODING)
+
+    async def get_cached_ocr_markdowns(self, pdf: StoredPdf, filename: str, use_cache: bool = True,
+                                       refresh_cache: bool = False,
+                                       report: Optional[ProcessingReport] = None,
+                                       pages: Optional[List[int]] = None,
+                                       release_upload: bool = True) -> Dict[str, Any]:
+        """Get OCR markdowns, served from the OCR cache when the same PDF (and pages) were processed before"""
+        # SHA-256 of the content (computed while the PDF was stored) plus everything that changes the
+        # OCR response: the model, whether page images are requested, and the pages
+        parts = [
+            pdf.sha256,
+            Config.MISTRAL_OCR_MODEL,
+            Config.PAGE_IMAGE_SOURCE,
+            "" if pages is None else ",".join(map(str, pages)),
+        ]
+        cache_key = hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+        if use_cache and not refresh_cache:
+            cached = self.cache.get("ocr", cache_key)
+            if cached is not None:
+                return cached
+
+        ocr_response = await self.get_ocr_markdowns(pdf, filename, pdf.sha256, report, pages, release_upload)
+        if use_cache:
+            self.cache.set("ocr", cache_key, ocr_response)
+        return ocr_response
+
+    def ocr_seconds_per_page(self) -> Optional[float]:
+        """Average upload and OCR seconds per page of the OCR calls made so far"""
+        return self.ocr_seconds / self.ocr_pages if self.ocr_pages else None
+
+    async def iter_page_tables(self, pdf: StoredPdf, filename: str, report: ProcessingReport,
+                               use_cache: bool = True, refresh_cache: bool = False,
+                               text_layer: bool = True) -> AsyncIterator[List[tuple]]:
+        """
+        Tables of every page in page order, from the PDF's own text layer where it is usable and from OCR otherwise
+
+        Pages with a readable text layer have their tables rebuilt locally; only scanned,
+        image-only or otherwise unreadable pages are uploaded for OCR, and when there are
+        none the upload and OCR are skipped entirely. The pages that need OCR are split into
+        chunks of OCR_CHUNK_PAGES pages of the one upload, up to OCR_MAX_CONCURRENCY of them
+        in OCR at a time, and pages are yielded as soon as the chunks before them are done,
+        so later stages work on the first pages while the rest are still in OCR. The source
+        of every page and an estimate of the OCR time saved are recorded on the report.
+
+        Yields:
+            Lists of consecutive (page_index, tables, page_image) tuples, page_image being the
+            OCR image of the page or None; report.pages_total is set before the first list
+        """
+        layer = None
+        if text_layer:
+            with self.span(report, "text_layer"):
+                layer = await self.run_in_executor(read_text_layer, pdf.path)
+
+        if layer is not None:
+            pages_total = len(layer)
+            ocr_indices = [page.index for page in layer if page.source == TextSource.OCR]
+            for page in layer:
+                report.record_source(page.index, page.source, page.reason)
+                self.metrics.inc("text_layer_pages_total", source=page.source, reason=page.reason)
+            skipped = pages_total - len(ocr_indices)
+            per_page = self.ocr_seconds_per_page()
+            if skipped and per_page is not None:
+                report.ocr_seconds_saved = max(skipped * per_page - report.timings.seconds("text_layer"), 0.0)
+                self.metrics.inc("ocr_seconds_saved_total", report.ocr_seconds_saved)
+            logger.info(f"{filename}: {skipped} pages read from the text layer, {len(ocr_indices)} sent to OCR")
+        else:
+            pages_total = await self.run_in_executor(page_count, pdf.path)
+            ocr_indices = None if pages_total is None else list(range(pages_total))
+            reason = "text_layer_unavailable" if text_layer else "text_layer_disabled"
+            for page_index in range(pages_total or 0):
+                report.record_source(page_index, TextSource.OCR, reason)
+
+        if ocr_indices is None:
+            # The page count is unknown without PDFium: OCR the whole document in one call
+            ocr_response = await self.get_cached_ocr_markdowns(pdf, filename, use_cache, refresh_cache, report)
+            with self.span(report, "parse"):
+                page_tables = await self.run_in_executor(self.extract_page_tables, ocr_response["pages"])
+            report.pages_total = len(page_tables)
+            for page_index in range(len(page_tables)):
+                report.record_source(page_index, TextSource.OCR, reason)
+            yield [
+                (page_index, tables, ocr_page.get("page_image"))
+                for page_index, (tables, ocr_page) in enumerate(zip(page_tables, ocr_response["pages"]))
+            ]
+            return
+
+        report.pages_total = pages_total
+        chunk_pages = Config.OCR_CHUNK_PAGES if Config.OCR_CHUNK_PAGES > 0 else max(len(ocr_indices), 1)
+        chunks = [ocr_indices[start:start + chunk_pages] for start in range(0, len(ocr_indices), chunk_pages)]
+        chunk_of = {page_index: position for position, chunk in enumerate(chunks) for page_index in chunk}
+        ocr_slots = asyncio.Semaphore(max(Config.OCR_MAX_CONCURRENCY, 1))
+
+        async def ocr_chunk(pages):
+            async with ocr_slots:
+                ocr_response = await self.get_cached_ocr_markdowns(
+                    pdf, filename, use_cache, refresh_cache, report,
+                    pages=pages if len(pages) < pages_total else None, release_upload=False
+                )
+            with self.span(report, "parse"):
+                page_tables = await self.run_in_executor(self.extract_page_tables, ocr_response["pages"])
+            return {
+                page_index: (tables, ocr_page.get("page_image"))
+                for page_index, tables, ocr_page in zip(pages, page_tables, ocr_response["pages"])
+            }
+
+        tasks = [asyncio.create_task(ocr_chunk(chunk)) for chunk in chunks]
+        try:
+            ocr_pages: Dict[int, tuple] = {}
+            run: List[tuple] = []
+            for page_index in range(pages_total):
+                if page_index in chunk_of:
+                    if page_index not in ocr_pages:
+                        if run:
+                            yield run
+                            run = []
+                        ocr_pages.update(await tasks[chunk_of[page_index]])
+                    tables, page_image = ocr_pages.pop(page_index)
+                    run.append((page_index, tables, page_image))
                 else:
-                    if current_table["headers"] and current_table["rows"]:
-                        pass  # We could store combined tables here if needed
-                    current_table = {"headers": headers, "rows": rows}
-            
-            # Generate HTML for this page
-            page_html_parts = []
-            for idx, (headers, rows) in enumerate(page_tables, 1):
-                html = "<table>\n"
-                html += "<thead><tr>" + "".join(f"<th>{h}</th>" for h in headers) + "</tr></thead>\n"
-                html += "<tbody>\n"
-                for row in rows:
-                    html += "<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>\n"
-                html += "</tbody></table>\n"
-                page_html_parts.append(html)
-            
-            page_html_content = "\n".join(page_html_parts)
-            page_html_contents.append(page_html_content)
-        
-        # Step 3: Convert PDF to images for LLM processing
-        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_pdf:
-            temp_pdf.write(pdf_bytes)
-            temp_pdf_path = temp_pdf.name
-        
+                    run.append((page_index, layer[page_index].tables, None))
+            if run:
+                yield run
+            if chunks:
+                self.pending_uploads.pop(pdf.sha256, None)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def iter_bank_statement(self, pdf: Union[StoredPdf, bytes], filename: str, user_columns: List[str],
+                                  use_cache: bool = True, refresh_cache: bool = False,
+                                  on_page_done: Optional[Callable] = None,
+                                  image_profile: Optional[ImageProfile] = None,
+                                  fast_path: Optional[bool] = None,
+                                  llm_batch: Optional[bool] = None,
+                                  report: Optional[ProcessingReport] = None,
+                                  scheduler: Optional[FairScheduler] = None,
+                                  resume_pages: Optional[Dict[int, List[Dict[str, Any]]]] = None,
+                                  text_layer: Optional[bool] = None,
+                                  page_filter: Optional[bool] = None) -> AsyncIterator[tuple]:
+        """
+        Run the extraction pipeline, yielding each page's transactions as soon as they are available
+
+        The stages run as a pipeline: as each chunk of pages comes back from OCR (or the text
+        layer), its tables are stitched to the pages before it, and the pages that later pages
+        can no longer change are mapped by the fast path or dispatched to the LLM while the
+        next chunks are still in OCR.
+
+        Args:
+            pdf: Stored PDF, read in place by the OCR upload and the page renderer; PDF bytes
+                are stored in a temporary file for the duration of the call
+            filename: Original file name
+            user_columns: List of user-defined column names
+            use_cache: Read and write the OCR and page-level result caches and the page fingerprint index
+            refresh_cache: Ignore cached results for this statement and overwrite them
+            on_page_done: Optional callback(page_index, pages_total, rows) invoked as each page completes;
+                pages_total counts the pages with tables, an upper bound until every page is parsed
+            image_profile: Page image encoding profile; defaults to the configured profile
+            fast_path: Map well-formed pages without the LLM; defaults to FAST_PATH_ENABLED
+            llm_batch: Pack consecutive pages into one chat request; defaults to LLM_BATCH_ENABLED
+            report: Optional ProcessingReport recording the route taken by each page
+            scheduler: LLM concurrency limit shared with other statements of a multi-file batch
+            resume_pages: Rows of pages already extracted by an earlier run (page index -> rows);
+                only the other pages are sent to the LLM
+            text_layer: Read digital pages from the PDF's text layer instead of OCR; defaults to
+                TEXT_LAYER_ENABLED
+            page_filter: Skip pages the page classifier scores below PAGE_FILTER_THRESHOLD
+                instead of sending them to the LLM; defaults to PAGE_FILTER_ENABLED
+
+        Yields:
+            (page_index, rows) tuples in page order, for pages that contain tables
+        """
+        if fast_path is None:
+            fast_path = Config.FAST_PATH_ENABLED
+        if llm_batch is None:
+            llm_batch = Config.LLM_BATCH_ENABLED
+        if text_layer is None:
+            text_layer = Config.TEXT_LAYER_ENABLED
+        if page_filter is None:
+            page_filter = Config.PAGE_FILTER_ENABLED
+        if report is None:
+            report = ProcessingReport()
+        if scheduler is None:
+            scheduler = FairScheduler(Config.LLM_MAX_CONCURRENCY)
+        report.llm_mode = "batch" if llm_batch else "single"
+        report.prompt_encoding = Config.LLM_PROMPT_ENCODING
+        # The page fingerprint index follows use_cache; refresh_cache skips lookups but stores new rows
+        index_pages = self.page_index is not None and use_cache
+        schema = schema_key(
+            user_columns, Config.MISTRAL_CHAT_MODEL, self.prompt_version(llm_batch),
+            (image_profile or ImageProfile.from_config()).to_dict()
+        )
+        page_fingerprints: Dict[int, Tuple[str, str]] = {}  # pages sent to the LLM -> (text, image) hashes
+
+        started = time.perf_counter()
+        outcome = "failed"
+        stored_here = None
+        # Pages handed on to the fast path / LLM so far, and how many of them have tables
+        released = {"pages": 0, "with_tables": 0}
+
+        def pages_expected():
+            return released["with_tables"] + report.pages_total - released["pages"]
+
+        def llm_page_done(page_index, _, rows):
+            if on_page_done:
+                on_page_done(page_index, pages_expected(), rows)
+
+        # Page order entries for the consumer: (page_index, rows, None) for pages mapped without
+        # the LLM, (page_index, None, task) for pages in a chat request, then None at the end
+        queue: asyncio.Queue = asyncio.Queue()
+        llm_tasks: List[asyncio.Task] = []
+
+        async def produce(pdf: StoredPdf):
+            owner = object()  # This statement's turn in the scheduler rotation
+            stitcher = TableStitcher(report.stitching) if Config.TABLE_STITCHING_ENABLED else None
+            page_tables = stitcher.pages if stitcher else []
+            page_images: List[Optional[str]] = []
+            carried_balance = None
+            counts = {"fast_path": 0, "resumed": 0, "skipped": 0, "indexed": 0, "llm": 0}
+
+            async def release(final: int):
+                nonlocal carried_balance
+                start = released["pages"]
+                if final <= start:
+                    return
+                # Select pages with content; only these need an image for the LLM
+                pages = []
+                for page_index in range(start, final):
+                    page_html = self.page_tables_to_prompt(page_tables[page_index])
+                    if page_html.strip():  # Only process if there's content
+                        pages.append((page_index, page_html, page_images[page_index]))
+                released["pages"] = final
+                self.metrics.inc("empty_pages_total", final - start - len(pages))
+
+                # Map pages whose tables pass the running-balance check without the LLM
+                fast_rows = {}
+                if fast_path and pages:
+                    with self.span(report, "fast_path"):
+                        fast_rows, carried_balance = await self.run_in_executor(
+                            self.fast_path.map_pages, [(i, page_tables[i]) for i in range(start, final)],
+                            user_columns, carried_balance
+                        )
+                    self.metrics.inc("fast_path_pages_total", len(fast_rows))
+                ready_rows = {page_index: rows for page_index, rows in (resume_pages or {}).items()
+                              if start <= page_index < final}
+                ready_rows.update(fast_rows)
+
+                # Score the other pages from their tables; summary, terms and rewards pages scoring
+                # below the threshold are skipped before they are rendered
+                llm_pages = [page for page in pages if page[0] not in ready_rows]
+                skipped = set()
+                if llm_pages:
+                    with self.span(report, "classify"):
+                        scores = await self.run_in_executor(
+                            score_pages, [(page_index, page_tables[page_index]) for page_index, _, _ in llm_pages]
+                        )
+                    report.page_scores.update(scores)
+                    if page_filter:
+                        skipped = {page_index for page_index, score in scores.items()
+                                   if score < Config.PAGE_FILTER_THRESHOLD}
+                        llm_pages = [page for page in llm_pages if page[0] not in skipped]
+                        self.metrics.inc("classifier_skipped_pages_total", len(skipped))
+                released["with_tables"] += len(pages) - len(skipped)
+                counts["fast_path"] += len(fast_rows)
+                counts["resumed"] += len(ready_rows) - len(fast_rows)
+                counts["skipped"] += len(skipped)
+
+                # Reuse the rows of pages already extracted in an earlier upload (same table text and a
+                # near-identical page image); the fingerprints of the others are kept to index their rows
+                indexed = {}
+                if index_pages and llm_pages:
+                    with self.span(report, "fingerprint"):
+                        fingerprints = await self.run_in_executor(
+                            fingerprint_pages, pdf.path,
+                            [(page_index, page_tables[page_index]) for page_index, _, _ in llm_pages]
+                        )
+                    fingerprints = fingerprints or {}
+                    if not refresh_cache:
+                        indexed = await self.run_in_executor(self.lookup_page_index, fingerprints, schema)
+                        report.page_index_lookups += len(fingerprints)
+                        self.metrics.inc("page_index_lookups_total", len(indexed), result="hit")
+                        self.metrics.inc("page_index_lookups_total", len(fingerprints) - len(indexed), result="miss")
+                    page_fingerprints.update(
+                        (page_index, fingerprint) for page_index, fingerprint in fingerprints.items()
+                        if page_index not in indexed
+                    )
+                    llm_pages = [page for page in llm_pages if page[0] not in indexed]
+                    ready_rows.update(indexed)
+                counts["indexed"] += len(indexed)
+                counts["llm"] += len(llm_pages)
+
+                # Process the remaining pages with the LLM, rendering page images locally unless OCR
+                # provided one; poppler reads the stored PDF in place
+                llm_batches = self.dispatch_pages_with_llm(
+                    llm_pages, pdf.path, user_columns, use_cache, refresh_cache, llm_page_done, image_profile,
+                    Config.LLM_BATCH_MAX_PAGES if llm_batch else 1, report, scheduler, owner
+                )
+                llm_tasks.extend(task for _, task in llm_batches)
+                task_of = {page_index: task for batch, task in llm_batches for page_index, _, _ in batch}
+                for page_index, _, _ in pages:
+                    if page_index in skipped:
+                        report.record(page_index, PageRoute.SKIPPED)
+                        continue
+                    if page_index in fast_rows:
+                        report.record(page_index, PageRoute.FAST_PATH)
+                    else:
+                        report.record(page_index, PageRoute.PAGE_INDEX if page_index in indexed else PageRoute.LLM)
+                    if page_index in ready_rows:
+                        report.record_status(page_index, PageStatus.OK)
+                        queue.put_nowait((page_index, ready_rows[page_index], None))
+                    else:
+                        queue.put_nowait((page_index, None, task_of[page_index]))
+
+            try:
+                page_chunks = self.iter_page_tables(pdf, filename, report, use_cache, refresh_cache, text_layer)
+                try:
+                    # Get the tables of every page from the text layer or OCR, chunk by chunk, and
+                    # stitch them across page breaks
+                    async for chunk in page_chunks:
+                        self.metrics.inc("tables_total", sum(len(tables) for _, tables, _ in chunk))
+                        page_images.extend(page_image for _, _, page_image in chunk)
+                        if stitcher:
+                            with self.span(report, "stitch"):
+                                final = await self.run_in_executor(
+                                    stitcher.add_pages, [tables for _, tables, _ in chunk]
+                                )
+                        else:
+                            page_tables.extend(tables for _, tables, _ in chunk)
+                            final = len(page_tables)
+                        await release(final)
+                finally:
+                    await page_chunks.aclose()
+                await release(len(page_tables))
+                self.metrics.inc("pages_total", report.pages_total)
+                for kind, count in report.stitching.items():
+                    if count:
+                        self.metrics.inc("stitch_repairs_total", count, kind=kind)
+                logger.info(f"{filename}: {counts['fast_path']} pages mapped without the LLM, "
+                            f"{counts['resumed']} resumed, {counts['skipped']} skipped as non-transaction pages, "
+                            f"{counts['indexed']} reused from the page index, {counts['llm']} sent to the LLM")
+                queue.put_nowait(None)
+            except BaseException as e:
+                queue.put_nowait(e)
+                raise
+
+        producer = None
         try:
-            image_blocks = self.convert_pdf_to_images(temp_pdf_path)
+            if isinstance(pdf, bytes):
+                pdf = stored_here = await self.run_in_executor(store_pdf_bytes, pdf, Config.TEMP_DIR)
+
+            producer = asyncio.create_task(produce(pdf))
+            while True:
+                entry = await queue.get()
+                if entry is None:
+                    break
+                if isinstance(entry, BaseException):
+                    await asyncio.gather(producer, return_exceptions=True)
+                    raise entry
+                page_index, rows, task = entry
+                if task is None:
+                    if on_page_done:
+                        on_page_done(page_index, pages_expected(), rows)
+                else:
+                    rows = (await task)[page_index]
+                    fingerprint = page_fingerprints.pop(page_index, None)
+                    if fingerprint and report.statuses.get(page_index) != PageStatus.FAILED:
+                        await self.run_in_executor(self.page_index.store, fingerprint[0], schema, fingerprint[1], rows)
+                yield page_index, rows
+            outcome = "completed"
+        except (GeneratorExit, asyncio.CancelledError):
+            outcome = "aborted"  # The consumer went away (e.g. client disconnect)
+            raise
         finally:
-            os.unlink(temp_pdf_path)
-        
-        # Step 4: Process each page with LLM
+            # Stop outstanding OCR and chat requests if the consumer goes away (e.g. client disconnect)
+            for task in llm_tasks:
+                task.cancel()
+            if producer:
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+            if stored_here:
+                stored_here.delete()
+            self.finish_statement(filename, report, outcome, time.perf_counter() - started)
+
+    def finish_statement(self, filename: str, report: ProcessingReport, outcome: str, seconds: float) -> None:
+        """Record the statement's total duration and outcome and log its stage timings"""
+        self.record_stage(report, "total", seconds)
+        self.metrics.inc("statements_total", outcome=outcome)
+        log_event(
+            logger, "statement_processed", file=filename, outcome=outcome, seconds=seconds,
+            pages=report.pages_total, text_layer_pages=report.count_source(TextSource.TEXT_LAYER),
+            ocr_pages=report.count_source(TextSource.OCR), fast_path_pages=report.count(PageRoute.FAST_PATH),
+            llm_pages=report.count(PageRoute.LLM), failed_pages=report.count_status(PageStatus.FAILED),
+            llm_calls=report.llm_calls, prompt_tokens=report.prompt_tokens,
+            completion_tokens=report.completion_tokens, retries=report.retries,
+            **{f"{stage}_s": stats["seconds"] for stage, stats in report.timings.to_dict().items() if stage != "total"}
+        )
+
+    async def process_bank_statement(self, pdf: Union[StoredPdf, bytes], filename: str, user_columns: List[str],
+                                     use_cache: bool = True, refresh_cache: bool = False,
+                                     on_page_done: Optional[Callable] = None,
+                                     image_profile: Optional[ImageProfile] = None,
+                                     fast_path: Optional[bool] = None,
+                                     llm_batch: Optional[bool] = None,
+                                     report: Optional[ProcessingReport] = None,
+                                     scheduler: Optional[FairScheduler] = None,
+                                     resume_pages: Optional[Dict[int, List[Dict[str, Any]]]] = None,
+                                     text_layer: Optional[bool] = None,
+                                     page_filter: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """
+        Main processing function
+
+        Args:
+            pdf: Stored PDF, read in place by the OCR upload and the page renderer; PDF bytes
+                are stored in a temporary file for the duration of the call
+            filename: Original file name
+            user_columns: List of user-defined column names
+            use_cache: Read and write the OCR and page-level result caches
+            refresh_cache: Ignore cached results for this statement and overwrite them
+            on_page_done: Optional callback(page_index, pages_total, rows) invoked as each page completes
+            image_profile: Page image encoding profile; defaults to the configured profile
+            fast_path: Map well-formed pages without the LLM; defaults to FAST_PATH_ENABLED
+            llm_batch: Pack consecutive pages into one chat request; defaults to LLM_BATCH_ENABLED
+            report: Optional ProcessingReport recording the route taken by each page
+            scheduler: LLM concurrency limit shared with other statements of a multi-file batch
+            resume_pages: Rows of pages already extracted by an earlier run (page index -> rows)
+            text_layer: Read digital pages from the PDF's text layer instead of OCR; defaults to
+                TEXT_LAYER_ENABLED
+            page_filter: Skip pages the page classifier scores as non-transaction pages; defaults
+                to PAGE_FILTER_ENABLED
+        """
         final_json = []
-        for page_html, image_data in zip(page_html_contents, image_blocks):
-            if page_html.strip():  # Only process if there's content
-                page_results = self.process_page_with_llm(page_html, image_data, user_columns)
-                final_json.extend(page_results)
-            time.sleep(Config.API_RATE_LIMIT_DELAY)  # Rate limiting
-        
+        async for _, page_results in self.iter_bank_statement(
+            pdf, filename, user_columns, use_cache, refresh_cache, on_page_done, image_profile,
+            fast_path, llm_batch, report, scheduler, resume_pages, text_layer, page_filter
+        ):
+            final_json.extend(page_results)
+
         return final_json
 
+    async def collect_transactions(self, pdf: Union[StoredPdf, bytes], filename: str, user_columns: List[str],
+                                   report: Optional[ProcessingReport] = None, **options) -> TransactionTable:
+        """
+        Run the pipeline into a typed columnar TransactionTable instead of a list of dicts
+
+        Pages are appended as they complete and converted to column arrays in chunks, so
+        large statements never hold all rows as dicts. The running balance of the result is
+        checked and recorded on the report. Options are those of iter_bank_statement.
+        """
+        table = TransactionTable(user_columns, self.column_types(user_columns))
+        async for _, page_results in self.iter_bank_statement(pdf, filename, user_columns, report=report, **options):
+            table.extend(page_results)
+        if report is not None and len(table):
+            report.balance_check = await self.run_in_executor(table.balance_check)
+        return table
+
 # Initialize processor
 processor = BankStatementProcessor()
 
+
+async def run_job(job):
+    """Run a queued extraction job, reporting per-page progress on the job"""
+    params = job.params
+    return await processor.process_bank_statement(
+        params["pdf"], job.filename, params["columns"],
+        use_cache=params["use_cache"], refresh_cache=params["refresh_cache"],
+        on_page_done=job.on_page_done, image_profile=params["image_profile"],
+        fast_path=params["fast_path"], llm_batch=params["llm_batch"], report=job.report,
+        resume_pages=params.get("resume_pages"), page_filter=params.get("page_filter")
+    )
+
+job_manager = JobManager(
+    run_job,
+    max_concurrent=Config.JOB_MAX_CONCURRENT,
+    max_queue=Config.JOB_QUEUE_SIZE,
+    retention_seconds=Config.JOB_RETENTION_SECONDS
+)
+
+@app.on_event("startup")
+async def validate_configuration():
+    # Validated when the server starts rather than on import, so the processor can be
+    # imported and benchmarked offline without a Mistral API key
+    Config.validate_config()
+
+@app.on_event("startup")
+async def start_job_workers():
+    await job_manager.start()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    await job_manager.stop()
+
+@app.on_event("startup")
+async def start_output_sweeper():
+    await artifact_store.start()
+
+@app.on_event("shutdown")
+async def stop_output_sweeper():
+    await artifact_store.stop()
+
+async def prefetch_first_page(pages: AsyncIterator[tuple]) -> AsyncIterator[tuple]:
+    """
+    Wait for the first page before a streaming response starts, so failures in
+    upload, OCR or rendering are still reported as regular HTTP errors
+    """
+    try:
+        first = await pages.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def chained():
+        if first is None:
+            return
+        yield first
+        async for page in pages:
+            yield page
+
+    return chained()
+
+def resolve_image_profile(image_profile: str) -> ImageProfile:
+    """Parse the image_profile form field, rejecting invalid profiles with HTTP 400"""
+    try:
+        return parse_image_profile(image_profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid image profile: {str(e)}")
+
+async def store_upload(file: UploadFile, max_size: int = Config.MAX_FILE_SIZE, suffix: str = ".pdf") -> StoredPdf:
+    """
+    Stream an upload to a temporary file under TEMP_DIR in chunks, hashing it on the way
+
+    Raises:
+        HTTPException: 413 as soon as the upload passes max_size
+    """
+    try:
+        return await processor.run_in_executor(
+            store_pdf_stream, file.file, file.filename, max_size, Config.TEMP_DIR, suffix
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+def typed_table(rows: List[Dict[str, Any]], columns: List[str]) -> TransactionTable:
+    """Rows as a TransactionTable typed by the column names, the schema every output shares"""
+    return TransactionTable.from_rows(rows, columns, processor.column_types(columns))
+
+def records_response(payload: Dict[str, Any], key: str, table: TransactionTable, add_ids: bool = False) -> Response:
+    """JSON response of payload plus the table's rows under key, encoded column-wise without per-row dicts"""
+    body = json.dumps(payload)[:-1] + f", {json.dumps(key)}: " + table.to_json(add_ids) + "}"
+    return Response(content=body, media_type="application/json")
+
+def require_export_format(output_format: str) -> None:
+    """501 before any processing when an export format's optional package is not installed"""
+    try:
+        check_available(output_format)
+    except ExportUnavailableError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+def export_response(table: TransactionTable, output_format: str, stem: str,
+                    headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """Stream the table as Parquet, Arrow IPC or XLSX (see exports.EXPORT_FORMATS)"""
+    filename = export_filename(stem, output_format)
+    return StreamingResponse(
+        export_chunks(table, output_format),
+        media_type=EXPORT_FORMATS[output_format]["media_type"],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', **(headers or {})},
+    )
+
+def artifact_response(artifact: Artifact, media_type: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Send a stored output; it is pinned against eviction until the response is done"""
+    headers = {"X-Output-Name": artifact.name, **(headers or {})}
+    background = BackgroundTask(artifact_store.release, artifact)
+    if artifact.path is not None:
+        return FileResponse(path=artifact.path, filename=artifact.name, media_type=media_type, headers=headers,
+                            background=background)
+    headers["Content-Disposition"] = f'attachment; filename="{artifact.name}"'
+    return Response(content=artifact.data, media_type=media_type, headers=headers, background=background)
+
+async def csv_response(table: TransactionTable, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    CSV download of a table: saved in the output store under a unique name, or
+    streamed chunk by chunk without touching disk when OUTPUT_STORE=stream
+    """
+    if not artifact_store.stores:
+        filename = ArtifactStore.unique_name(".csv")
+        return StreamingResponse(
+            table.iter_csv(),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"', **(headers or {})}
+        )
+    artifact = await processor.run_in_executor(
+        artifact_store.save, ArtifactStore.unique_name(".csv"), lambda handle: handle.writelines(table.iter_csv()), True
+    )
+    return artifact_response(artifact, "text/csv", headers)
+
+def parse_column_names(columns: str) -> List[str]:
+    """Parse the columns form field (JSON array of {"id", "name"} objects) into column names"""
+    try:
+        columns_data = json.loads(columns)
+        return [col["name"] for col in columns_data if "name" in col]
+    except (json.JSONDecodeError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid columns format: {str(e)}")
+
+async def process_statement_files(statements: List[Tuple[str, StoredPdf]], column_names: List[str],
+                                  **options) -> List[Dict[str, Any]]:
+    """
+    Process several statements concurrently for a multi-file batch
+
+    Up to BATCH_MAX_CONCURRENT_FILES files are in flight at once. Their LLM pages share one
+    scheduler of LLM_MAX_CONCURRENCY slots, granted to the files in turn, so every file
+    progresses page by page instead of one large file holding all slots. The rate limiter
+    and result caches are the process-wide ones. A failing file does not stop the others.
+
+    Returns:
+        One result per statement, in input order
+    """
+    scheduler = FairScheduler(Config.LLM_MAX_CONCURRENCY)
+    file_slots = asyncio.Semaphore(max(1, Config.BATCH_MAX_CONCURRENT_FILES))
+
+    async def run_file(source, pdf):
+        report = ProcessingReport()
+        async with file_slots:
+            try:
+                table = await processor.collect_transactions(
+                    pdf, source, column_names, report=report, scheduler=scheduler, **options
+                )
+                data = await processor.run_in_executor(table.to_records)
+                status, error = "completed", None
+            except Exception as e:
+                logger.exception(f"Batch file {source} failed")
+                data, status, error = [], "failed", str(e)
+        return {
+            "source": source,
+            "status": status,
+            "error": error,
+            "total_transactions": len(data),
+            "page_stats": report.to_dict(),
+            "data": data
+        }
+
+    return await asyncio.gather(*[run_file(source, pdf) for source, pdf in statements])
+
 @app.get("/")
 async def root():
     return {"message": "Bank Statement PDF to CSV API", "version": "1.0.0"}
@@ -271,7 +1507,14 @@ async def root():
 async def start_process_bank_statement(
     file: UploadFile = File(...),
     columns: str = Form(...),  # JSON string of column names
-    output_format: str = Form(default="csv")  # csv or json
+    output_format: str = Form(default="csv"),  # csv, json, parquet, arrow, xlsx, ndjson, sse or csv_stream
+    use_cache: bool = Form(default=True),
+    refresh_cache: bool = Form(default=False),
+    image_profile: str = Form(default=""),  # preset name or JSON overrides
+    fast_path: Optional[bool] = Form(default=None),
+    llm_batch: Optional[bool] = Form(default=None),
+    page_filter: Optional[bool] = Form(default=None),
+    include_timings: bool = Form(default=False)
 ):
     """
     Process bank statement PDF and return structured data
@@ -279,7 +1522,18 @@ async def start_process_bank_statement(
     Args:
         file: PDF file upload
         columns: JSON array string of column names e.g., '["Date", "Description", "Amount"]'
-        output_format: Output format - 'csv' or 'json'
+        output_format: Output format - 'csv' or 'json', a typed binary export ('parquet', 'arrow'
+            IPC stream or 'xlsx'), or a streaming format that sends each page's transactions as
+            soon as it is processed: 'ndjson', 'sse' or 'csv_stream'
+        use_cache: Set to false to bypass the result cache for this request
+        refresh_cache: Set to true to ignore and overwrite cached results for this PDF
+        image_profile: Page image profile - a preset name ('original', 'balanced', 'compact', 'webp')
+            or a JSON object overriding dpi, grayscale, max_edge, format and quality
+        fast_path: Set to false to send every page to the LLM; defaults to FAST_PATH_ENABLED
+        llm_batch: Set to true or false to override LLM_BATCH_ENABLED (several pages per chat request)
+        page_filter: Set to false to send pages the classifier scores as non-transaction pages to
+            the LLM as well (debugging); defaults to PAGE_FILTER_ENABLED
+        include_timings: Set to true to add per-stage timings to JSON responses
     
     Returns:
         Processed bank statement data in requested format
@@ -313,69 +1567,96 @@ async def start_process_bank_statement(
         raise HTTPException(status_code=400, detail=f"Invalid columns format: {str(e)}")
     
     # Validate output format
-    if output_format.lower() not in ['csv', 'json']:
-        raise HTTPException(status_code=400, detail="Output format must be 'csv' or 'json'")
-    
+    output_format = output_format.lower()
+    if output_format not in ['csv', 'json', *EXPORT_FORMATS, *STREAM_MEDIA_TYPES]:
+        raise HTTPException(
+            status_code=400,
+            detail="Output format must be 'csv', 'json', 'parquet', 'arrow', 'xlsx', 'ndjson', 'sse' or 'csv_stream'"
+        )
+    if output_format in EXPORT_FORMATS:
+        require_export_format(output_format)
+    profile = resolve_image_profile(image_profile)
+
+    # Stream the PDF to disk; it is removed once the response is sent
+    pdf = await store_upload(file)
+    streaming = False
     try:
-        # Read PDF file
-        pdf_bytes = await file.read()
+        report = ProcessingReport()
+
+        if output_format in STREAM_MEDIA_TYPES:
+            pages = await prefetch_first_page(processor.iter_bank_statement(
+                pdf, file.filename, column_names, use_cache=use_cache, refresh_cache=refresh_cache,
+                image_profile=profile, fast_path=fast_path, llm_batch=llm_batch, page_filter=page_filter,
+                report=report
+            ))
+            types = processor.column_types(column_names)
+            if output_format == 'ndjson':
+                body = ndjson_stream(pages, column_names, types)
+            elif output_format == 'sse':
+                body = sse_stream(pages, column_names, types, report=report)
+            else:
+                body = csv_stream(pages, column_names, types)
+            streaming = True
+            return StreamingResponse(body, media_type=STREAM_MEDIA_TYPES[output_format], headers=STREAM_HEADERS,
+                                     background=BackgroundTask(pdf.delete))
         
         # Process the PDF
-        results = processor.process_bank_statement(pdf_bytes, file.filename, column_names)
+        results = await processor.collect_transactions(
+            pdf, file.filename, column_names, use_cache=use_cache, refresh_cache=refresh_cache,
+            image_profile=profile, fast_path=fast_path, llm_batch=llm_batch, page_filter=page_filter,
+            report=report
+        )
+        page_stats = report.to_dict()
+        timings = {"timings": report.timings.to_dict()} if include_timings else {}
         
-        if not results:
+        if not len(results):
             return JSONResponse(
-                content={"message": "No transaction data found in the PDF", "data": []},
+                content={"message": "No transaction data found in the PDF", "data": [], "page_stats": page_stats,
+                         **timings},
                 status_code=200
             )
         
         # Return based on requested format
-        if output_format.lower() == 'json':
-            return JSONResponse(content={
+        if output_format == 'json':
+            return records_response({
                 "message": "Processing completed successfully",
                 "total_transactions": len(results),
                 "columns": column_names,
-                "data": results
-            })
+                "page_stats": page_stats,
+                **timings
+            }, "data", results)
+
+        page_headers = {
+            "X-LLM-Pages-Skipped": str(page_stats["llm_skipped"]),
+            "X-LLM-Pages-Processed": str(page_stats["llm_processed"]),
+            "X-Pages-Failed": str(page_stats["pages_failed"])
+        }
+        if output_format in EXPORT_FORMATS:
+            return export_response(results, output_format, ArtifactStore.unique_name(""), page_headers)
         
-        else:  # CSV format
-            # Create DataFrame and convert to CSV
-            df = pd.DataFrame(results, columns=column_names)
-            
-            # # Create temporary CSV file
-            # with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False, encoding='utf-8') as temp_csv:
-            #     df.to_csv(temp_csv.name, index=False)
-            #     temp_csv_path = temp_csv.name
-            
-            
-            # # Return CSV file
-            # return FileResponse(
-            #     path=temp_csv_path,
-            #     filename=f"bank_statement.csv",
-            #     media_type="text/csv",
-            #     background=lambda: os.unlink(temp_csv_path)  # Clean up temp file
-            # )
-            # Generate timestamped filename
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            csv_filename = f"bank_statement_{timestamp}.csv"
-            csv_path = os.path.join(Config.OUTPUT_DIR, csv_filename)
-
-            # Save CSV locally
-            df.to_csv(csv_path, index=False, encoding="utf-8")
-            # Return saved CSV file
-            return FileResponse(
-                path=csv_path,
-                filename=csv_filename,
-                media_type="text/csv"
-            )
+        else:  # CSV format, from the column arrays
+            return await csv_response(results, page_headers)
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+    finally:
+        if not streaming:
+            pdf.delete()
 
 @app.post("/process-bank-statement-json")
 async def process_bank_statement_json_only(
     file: UploadFile = File(...),
-    columns: str = Form(...)  # JSON string of column names
+    columns: str = Form(...),  # JSON string of column names
+    use_cache: bool = Form(default=True),
+    refresh_cache: bool = Form(default=False),
+    stream: str = Form(default=""),  # '', ndjson or sse
+    image_profile: str = Form(default=""),  # preset name or JSON overrides
+    fast_path: Optional[bool] = Form(default=None),
+    llm_batch: Optional[bool] = Form(default=None),
+    page_filter: Optional[bool] = Form(default=None),
+    include_timings: bool = Form(default=False)
 ):
     """
     Process bank statement PDF and return JSON data only
@@ -384,6 +1665,15 @@ async def process_bank_statement_json_only(
     Args:
         file: PDF file upload
         columns: JSON array string of column names e.g., '["Date", "Description", "Amount"]'
+        use_cache: Set to false to bypass the result cache for this request
+        refresh_cache: Set to true to ignore and overwrite cached results for this PDF
+        stream: Optional streaming mode, 'ndjson' or 'sse', sending each page's transactions as it completes
+        image_profile: Page image profile preset name or JSON overrides (see /process-bank-statement)
+        fast_path: Set to false to send every page to the LLM; defaults to FAST_PATH_ENABLED
+        llm_batch: Set to true or false to override LLM_BATCH_ENABLED (several pages per chat request)
+        page_filter: Set to false to send pages the classifier scores as non-transaction pages to
+            the LLM as well (debugging); defaults to PAGE_FILTER_ENABLED
+        include_timings: Set to true to add per-stage timings to the response
     """
     
     # Validate file type
@@ -405,13 +1695,39 @@ async def process_bank_statement_json_only(
         column_names = [col["name"] for col in columns_data if "name" in col]
     except (json.JSONDecodeError, ValueError) as e:
         raise HTTPException(status_code=400, detail=f"Invalid columns format: {str(e)}")
-    
+
+    stream = stream.lower()
+    if stream not in ['', 'ndjson', 'sse']:
+        raise HTTPException(status_code=400, detail="Stream must be 'ndjson' or 'sse'")
+    profile = resolve_image_profile(image_profile)
+
+    # Stream the PDF to disk; it is removed once the response is sent
+    pdf = await store_upload(file)
+    streaming = False
     try:
-        # Read PDF file
-        pdf_bytes = await file.read()
+        report = ProcessingReport()
+
+        if stream:
+            pages = await prefetch_first_page(processor.iter_bank_statement(
+                pdf, file.filename, column_names, use_cache=use_cache, refresh_cache=refresh_cache,
+                image_profile=profile, fast_path=fast_path, llm_batch=llm_batch, page_filter=page_filter,
+                report=report
+            ))
+            types = processor.column_types(column_names)
+            if stream == 'ndjson':
+                body = ndjson_stream(pages, column_names, types, add_ids=True)
+            else:
+                body = sse_stream(pages, column_names, types, add_ids=True, report=report)
+            streaming = True
+            return StreamingResponse(body, media_type=STREAM_MEDIA_TYPES[stream], headers=STREAM_HEADERS,
+                                     background=BackgroundTask(pdf.delete))
         
         # Process the PDF
-        results = processor.process_bank_statement(pdf_bytes, file.filename, column_names)
+        results = await processor.collect_transactions(
+            pdf, file.filename, column_names, use_cache=use_cache, refresh_cache=refresh_cache,
+            image_profile=profile, fast_path=fast_path, llm_batch=llm_batch, page_filter=page_filter,
+            report=report
+        )
         
         # return {
         #     "success": True,
@@ -420,17 +1736,127 @@ async def process_bank_statement_json_only(
         #     "columns": user_columns,
         #     "data": results
         # }
-        for idx, item in enumerate(results, start=1):
-            item["id"] = idx
-        # print(results)
-        return {"transactions": results}
+        # Rows are numbered while they are encoded instead of adding an id to every dict
+        response = {"page_stats": report.to_dict()}
+        if include_timings:
+            response["timings"] = report.timings.to_dict()
+        return records_response(response, "transactions", results, add_ids=True)
             
     except Exception as e:
         return {
             "success": False,
-            "message": f"Processing failed: {str(e)}",
+            "message": f"Processing failed: {getattr(e, 'detail', None) or str(e)}",
             "data": []
         }
+    finally:
+        if not streaming:
+            pdf.delete()
+
+@app.post("/process-batch")
+async def process_batch(
+    files: List[UploadFile] = File(...),
+    columns: str = Form(...),  # JSON string of column names
+    output_format: str = Form(default="json"),  # csv or json
+    merge: bool = Form(default=True),
+    use_cache: bool = Form(default=True),
+    refresh_cache: bool = Form(default=False),
+    image_profile: str = Form(default=""),  # preset name or JSON overrides
+    fast_path: Optional[bool] = Form(default=None),
+    llm_batch: Optional[bool] = Form(default=None),
+    page_filter: Optional[bool] = Form(default=None)
+):
+    """
+    Process many bank statements in one request
+
+    Args:
+        files: PDF files and/or ZIP archives of PDF files
+        columns: JSON array string of column objects e.g., '[{"id": "1", "name": "Date"}]'
+        output_format: Output format - 'csv' or 'json'
+        merge: Return one merged output with a source_file column (default), or one output per
+            file (a JSON list of files, or a ZIP of CSV files)
+        use_cache, refresh_cache, image_profile, fast_path, llm_batch, page_filter: As for /process-bank-statement
+    """
+    column_names = parse_column_names(columns)
+    output_format = output_format.lower()
+    if output_format not in ("csv", "json"):
+        raise HTTPException(status_code=400, detail="Output format must be 'csv' or 'json'")
+    profile = resolve_image_profile(image_profile)
+
+    # Stream every upload to disk; archives may hold up to BATCH_MAX_FILES PDFs of MAX_FILE_SIZE each
+    uploads, statements = [], []
+    try:
+        for file in files:
+            is_zip = file.filename.lower().endswith(".zip")
+            max_size = Config.MAX_FILE_SIZE * Config.BATCH_MAX_FILES if is_zip else Config.MAX_FILE_SIZE
+            uploads.append((file.filename, await store_upload(file, max_size, ".zip" if is_zip else ".pdf")))
+        try:
+            statements = await processor.run_in_executor(
+                expand_uploads, uploads, Config.BATCH_MAX_FILES, Config.MAX_FILE_SIZE, Config.TEMP_DIR
+            )
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        started = time.perf_counter()
+        file_results = await process_statement_files(
+            statements, column_names, use_cache=use_cache, refresh_cache=refresh_cache,
+            image_profile=profile, fast_path=fast_path, llm_batch=llm_batch, page_filter=page_filter
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        for _, pdf in uploads + statements:
+            pdf.delete()
+
+    pages = sum(result["page_stats"]["pages_total"] for result in file_results)
+    failed = sum(1 for result in file_results if result["status"] == "failed")
+    throughput = {
+        "files": len(file_results),
+        "files_failed": failed,
+        "pages": pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_second": round(pages / elapsed, 2) if elapsed > 0 else None
+    }
+    logger.info(f"Batch of {len(file_results)} files: {pages} pages in {elapsed:.1f}s ({failed} failed)")
+
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    if output_format == "csv":
+        headers = {
+            "X-Files-Failed": str(failed),
+            "X-Pages-Failed": str(sum(result["page_stats"]["pages_failed"] for result in file_results)),
+            "X-Pages-Per-Second": str(throughput["pages_per_second"])
+        }
+        if merge:
+            merged_columns = [SOURCE_COLUMN, *column_names]
+            csv_filename = f"bank_statements_{timestamp}.csv"
+            return Response(
+                content=rows_to_csv(merged_rows(file_results), merged_columns, processor.column_types(merged_columns)),
+                media_type="text/csv",
+                headers={**headers, "Content-Disposition": f'attachment; filename="{csv_filename}"'}
+            )
+        zip_filename = f"bank_statements_{timestamp}.zip"
+        return Response(
+            content=per_file_csv_zip(file_results, column_names, processor.column_types(column_names)),
+            media_type="application/zip",
+            headers={**headers, "Content-Disposition": f'attachment; filename="{zip_filename}"'}
+        )
+
+    if merge:
+        data = merged_rows(file_results)
+        return {
+            "message": "Processing completed",
+            "total_transactions": len(data),
+            "columns": [SOURCE_COLUMN, *column_names],
+            "files": [{key: value for key, value in result.items() if key != "data"} for result in file_results],
+            "data": data,
+            "throughput": throughput
+        }
+    return {
+        "message": "Processing completed",
+        "columns": column_names,
+        "files": file_results,
+        "throughput": throughput
+    }
 
 @app.post("/validate-columns")
 async def validate_columns(columns: str = Form(...)):
@@ -504,10 +1930,215 @@ async def column_suggestions_endpoint(bank_name: Optional[str] = None):
             "all_bank_suggestions": SUGGESTED_BANK_COLUMNS,
             "generic_columns": get_column_suggestions()  # Now calls the actual function
         }
+@app.get("/image-profiles")
+async def image_profiles():
+    """Configured default page image profile and the available presets"""
+    return {
+        "default": ImageProfile.from_config().to_dict(),
+        "presets": {name: profile.to_dict() for name, profile in IMAGE_PROFILE_PRESETS.items()}
+    }
+
+@app.get("/outputs")
+async def output_store_stats():
+    """Mode, artifact count and total size of the output store"""
+    return artifact_store.stats()
+
+@app.get("/outputs/{name}")
+async def get_output(name: str):
+    """Download a stored output again by the name sent in its X-Output-Name header, until it expires"""
+    artifact = artifact_store.get(name, pin=True)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Output not found or expired")
+    return artifact_response(artifact, "text/csv" if name.endswith(".csv") else "application/octet-stream")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters and storage usage of the OCR and page result caches and the page fingerprint index"""
+    return {
+        "backend": Config.CACHE_BACKEND,
+        "levels": result_cache.stats(),
+        "page_index": page_index.stats() if page_index else None,
+    }
+
+@app.delete("/cache")
+async def clear_cache(level: Optional[str] = None):
+    """
+    Clear the result cache
+
+    Args:
+        level: Optional cache level to clear ('ocr', 'page' or 'page_index'); clears all of them when omitted
+    """
+    levels = [*result_cache.LEVELS, "page_index"]
+    if level and level not in levels:
+        raise HTTPException(status_code=400, detail="Cache level must be 'ocr', 'page' or 'page_index'")
+    if level != "page_index":
+        result_cache.clear(level)
+    if level in (None, "page_index") and page_index:
+        page_index.clear()
+    return {"message": "Cache cleared", "levels": [level] if level else levels}
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    columns: str = Form(...),  # JSON string of column names
+    use_cache: bool = Form(default=True),
+    refresh_cache: bool = Form(default=False),
+    image_profile: str = Form(default=""),  # preset name or JSON overrides
+    fast_path: Optional[bool] = Form(default=None),
+    llm_batch: Optional[bool] = Form(default=None),
+    page_filter: Optional[bool] = Form(default=None)
+):
+    """
+    Queue a bank statement for background processing and return its job id immediately
+
+    Args:
+        file: PDF file upload
+        columns: JSON array string of column objects e.g., '[{"id": "1", "name": "Date"}]'
+        use_cache: Set to false to bypass the result cache for this job
+        refresh_cache: Set to true to ignore and overwrite cached results for this PDF
+        image_profile: Page image profile preset name or JSON overrides (see /process-bank-statement)
+        fast_path: Set to false to send every page to the LLM; defaults to FAST_PATH_ENABLED
+        llm_batch: Set to true or false to override LLM_BATCH_ENABLED (several pages per chat request)
+        page_filter: Set to false to send pages the classifier scores as non-transaction pages to
+            the LLM as well (debugging); defaults to PAGE_FILTER_ENABLED
+    """
+    if not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+
+    column_names = parse_column_names(columns)
+    profile = resolve_image_profile(image_profile)
+    pdf = await store_upload(file)  # Owned by the job, which removes it once it is no longer needed
+
+    try:
+        job = job_manager.submit(
+            file.filename,
+            pdf=pdf,
+            columns=column_names,
+            use_cache=use_cache,
+            refresh_cache=refresh_cache,
+            image_profile=profile,
+            fast_path=fast_path,
+            llm_batch=llm_batch,
+            page_filter=page_filter
+        )
+    except JobQueueFullError as e:
+        pdf.delete()
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+@app.get("/jobs")
+async def list_jobs():
+    """Queue statistics and the status of every retained job"""
+    return {
+        **job_manager.stats(),
+        "items": [job.to_dict() for job in job_manager.jobs.values()]
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, include_partial: bool = True):
+    """
+    Get job status, per-page progress and the transactions extracted so far
+
+    Args:
+        job_id: Job identifier returned by POST /jobs
+        include_partial: Include transactions of the pages completed so far
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    status = job.to_dict(include_partial=include_partial)
+    if include_partial:
+        status["partial_data"] = typed_table(status["partial_data"], job.params["columns"]).to_records()
+    return status
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, output_format: str = "json"):
+    """
+    Get the result of a completed job
+
+    Args:
+        job_id: Job identifier returned by POST /jobs
+        output_format: Output format - 'csv', 'json', 'parquet', 'arrow' or 'xlsx'
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+
+    output_format = output_format.lower()
+    columns = job.params["columns"]
+    if output_format == "json":
+        return records_response({
+            "message": "Processing completed successfully",
+            "total_transactions": len(job.results),
+            "columns": columns,
+            "page_stats": job.report.to_dict()
+        }, "data", typed_table(job.results, columns))
+    if output_format == "csv":
+        table = typed_table(job.results, columns)
+        csv_filename = f"{Path(job.filename).stem}_{job.id}.csv"
+        return StreamingResponse(
+            table.iter_csv(),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{csv_filename}"'}
+        )
+    if output_format in EXPORT_FORMATS:
+        require_export_format(output_format)
+        table = typed_table(job.results, columns)
+        return export_response(table, output_format, f"{Path(job.filename).stem}_{job.id}")
+    raise HTTPException(status_code=400, detail="Output format must be 'csv', 'json', 'parquet', 'arrow' or 'xlsx'")
+
+@app.post("/jobs/{job_id}/retry", status_code=202)
+async def retry_job(job_id: str):
+    """
+    Queue a new job that reprocesses only the failed pages of a completed job
+
+    The rows of the pages that succeeded are carried over, and OCR is served from the
+    cache, so only the failed pages are sent to the LLM again.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        retry = job_manager.retry(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+
+    return {
+        "job_id": retry.id,
+        "status": retry.status,
+        "status_url": f"/jobs/{retry.id}",
+        "retry_of": job.id,
+        "pages_to_retry": [page_index + 1 for page_index in job.report.failed_pages()]
+    }
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Counters and stage duration histograms in the Prometheus text format"""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false)")
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "Bank Statement Processor API"}
+    return {
+        "status": "healthy",
+        "service": "Bank Statement Processor API",
+        "circuit_breakers": api_caller.stats()
+    }
 
 if __name__ == "__main__":
     logger.info("Starting Bank Statement Processor API...")
@@ -0,0 +1,112 @@
+"""
+Metrics for Bank Statement API
+Process-wide counters and histograms rendered in the Prometheus text exposition
+format, and key=value structured log lines
+"""
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Upper bounds of the stage duration histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Tuple[Tuple[str, Any], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """
+    Minimal thread-safe registry of counters and histograms
+
+    When disabled, recording is a no-op so instrumentation on the hot path costs a
+    single attribute check.
+    """
+
+    def __init__(self, enabled: bool = True, namespace: str = "bank_statement"):
+        self.enabled = enabled
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._definitions: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {}  # name -> (type, help, buckets)
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._histograms: Dict[Tuple[str, Tuple], List[float]] = {}  # bucket counts..., sum, count
+
+    def counter(self, name: str, help_text: str) -> None:
+        self._definitions[name] = ("counter", help_text, ())
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self._definitions[name] = ("histogram", help_text, tuple(sorted(buckets)))
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        if not self.enabled:
+            return
+        buckets = self._definitions[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [0.0] * (len(buckets) + 2)
+            for position, bound in enumerate(buckets):
+                if value <= bound:
+                    series[position] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, buckets) in self._definitions.items():
+                full_name = f"{self.namespace}_{name}"
+                lines.append(f"# HELP {full_name} {help_text}")
+                lines.append(f"# TYPE {full_name} {kind}")
+                if kind == "counter":
+                    for (series_name, labels), value in sorted(self._counters.items()):
+                        if series_name == name:
+                            lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                for (series_name, labels), series in sorted(self._histograms.items()):
+                    if series_name != name:
+                        continue
+                    for bound, count in zip((*buckets, float("inf")), (*series[:len(buckets)], series[-1])):
+                        le = ("le", _format_value(bound))
+                        lines.append(f"{full_name}_bucket{_format_labels(labels, le)} {_format_value(count)}")
+                    lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(series[-2])}")
+                    lines.append(f"{full_name}_count{_format_labels(labels)} {_format_value(series[-1])}")
+        return "\n".join(lines) + "\n"
+
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO, **fields: Any) -> None:
+    """Log a structured `event=<name> key=value ...` line; values with spaces are quoted"""
+    if not logger.isEnabledFor(level):
+        return
+    parts = [f"event={event}"]
+    for key, value in fields.items():
+        if isinstance(value, float):
+            value = f"{value:.4f}"
+        value = str(value)
+        if not value or any(char in value for char in ' ="'):
+            value = '"' + value.replace('"', '\\"') + '"'
+        parts.append(f"{key}={value}")
+    logger.log(level, " ".join(parts))
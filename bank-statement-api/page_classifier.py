@@ -0,0 +1,81 @@
+"""
+Transaction page classifier for Bank Statement API
+Scores the tables of a page from their text alone (header vocabulary, date and
+amount density, column consistency), so summary, "important information", terms
+and rewards pages can be skipped before they are rendered and sent to the LLM
+"""
+
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from fast_path import AMOUNT_ROLES, header_tokens, table_roles
+from prompts import SUGGESTED_BANK_COLUMNS
+from stitching import cell_kind
+
+# Header words of the supported banks' statement columns
+BANK_HEADER_TOKENS = {
+    token
+    for headers in SUGGESTED_BANK_COLUMNS.values()
+    for header in headers
+    for token in header_tokens(header)
+    if len(token) > 2 or token in {"dt", "dr", "cr"}
+}
+
+# Weights of the header, transaction row density and column consistency scores
+HEADER_WEIGHT = 0.4
+DENSITY_WEIGHT = 0.45
+CONSISTENCY_WEIGHT = 0.15
+
+# Rows looked at per table; the first rows decide as well as all of them
+SAMPLE_ROWS = 40
+
+
+def header_score(headers: List[str]) -> float:
+    """A date column, an amount column and bank column vocabulary in the header row"""
+    roles = table_roles(headers)
+    score = 0.0
+    if "date" in roles or "value_date" in roles:
+        score += 0.5
+    if AMOUNT_ROLES.intersection(roles):
+        score += 0.3
+    known = sum(
+        1 for header, role in zip(headers, roles)
+        if role or BANK_HEADER_TOKENS.intersection(header_tokens(header))
+    )
+    return score + 0.2 * known / max(len(headers), 1)
+
+
+def table_score(headers: List[str], rows: List[List[str]]) -> float:
+    """
+    How much a table looks like a transaction listing, from 0 to 1
+
+    Summary and interest-slab tables have amount headers but no dated rows, terms and
+    contact tables neither; a transaction table (even a header-less continuation whose
+    first row was read as the header) has a date and an amount on most rows and the
+    same number of filled cells on most rows.
+    """
+    sample = [headers, *rows][:SAMPLE_ROWS + 1]
+    transaction_rows = 0
+    filled = []
+    for row in sample:
+        kinds = [cell_kind(cell) for cell in row]
+        if "date" in kinds and "amount" in kinds:
+            transaction_rows += 1
+        filled.append(sum(1 for kind in kinds if kind != "empty"))
+    common = Counter(filled).most_common(1)[0][0]
+    consistent = sum(1 for count in filled if abs(count - common) <= 1)
+    return (
+        HEADER_WEIGHT * header_score(headers)
+        + DENSITY_WEIGHT * transaction_rows / len(sample)
+        + CONSISTENCY_WEIGHT * consistent / len(sample)
+    )
+
+
+def page_score(tables: List[tuple]) -> float:
+    """Score of the page's most transaction-like table (0 for a page without tables)"""
+    return max((table_score(headers, rows) for headers, rows in tables), default=0.0)
+
+
+def score_pages(pages: List[Tuple[int, List[tuple]]]) -> Dict[int, float]:
+    """Scores of (page_index, tables) pages, by page index"""
+    return {page_index: page_score(tables) for page_index, tables in pages}
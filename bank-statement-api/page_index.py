@@ -0,0 +1,231 @@
+"""
+Page fingerprint index for Bank Statement API
+Remembers the LLM extraction of every page under a fingerprint of the page
+itself rather than of the file it came in: a hash of its normalized table text
+plus a perceptual hash of a thumbnail of the rendered page. A page that shows up
+again in another upload (overlapping monthly and quarterly exports, the same
+month downloaded again with a new generation timestamp) is served from the index
+without a chat request.
+
+Entries live in a local SQLite database, keyed by text fingerprint, column
+schema and image hash, and the least recently used ones are evicted above a
+size limit. pypdfium2 renders the thumbnails; without it the index is not used.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from textlayer import pdfium_lock
+
+logger = logging.getLogger(__name__)
+
+# Perceptual hash: difference hash of a HASH_SIZE x HASH_SIZE grayscale thumbnail (256 bits)
+HASH_SIZE = 16
+THUMBNAIL_SCALE = 0.25  # 18 DPI, plenty for a 16 x 16 hash
+
+# Characters kept by the text normalization; case, whitespace and OCR punctuation noise are dropped,
+# but not the sign of an amount: '-', '+', parentheses and (as letters) a Dr/Cr suffix
+_NOT_KEPT = re.compile(r"[^0-9a-z.,/()+-]+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    text_hash TEXT NOT NULL,
+    schema_key TEXT NOT NULL,
+    image_hash TEXT NOT NULL,
+    rows TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (text_hash, schema_key, image_hash)
+);
+CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used);
+"""
+
+
+def normalize_cell(cell: str) -> str:
+    return _NOT_KEPT.sub("", str(cell).lower())
+
+
+def text_fingerprint(tables: List[tuple]) -> str:
+    """SHA-256 of a page's tables with case, whitespace and most punctuation removed"""
+    lines = []
+    for headers, rows in tables:
+        lines.append("|".join(map(normalize_cell, headers)))
+        lines.extend("|".join(map(normalize_cell, row)) for row in rows)
+        lines.append("")
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+def schema_key(user_columns: List[str], chat_model: str, prompt_version: str, image_profile: Dict[str, Any]) -> str:
+    """
+    What the stored rows depend on besides the page: column schema, model, prompt version
+    (encoding and batch mode included, as in the page cache key) and image profile
+    """
+    parts = [user_columns, chat_model, prompt_version, image_profile]
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def difference_hash(image) -> str:
+    """Difference hash of a PIL image as a hex string: one bit per horizontally adjacent pixel pair"""
+    from PIL import Image
+
+    pixels = list(image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR).getdata())
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for column in range(HASH_SIZE):
+            bits = (bits << 1) | (pixels[offset + column] > pixels[offset + column + 1])
+    return f"{bits:0{HASH_SIZE * HASH_SIZE // 4}x}"
+
+
+def image_hashes(pdf_path: str, page_indices: List[int]) -> Optional[Dict[int, str]]:
+    """
+    Perceptual hashes of the given pages of a PDF, from low-resolution renders
+
+    Blocking: run it on an executor.
+
+    Returns:
+        Page index -> hash, or None when pypdfium2 is not installed or the PDF cannot be opened
+    """
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        return None
+
+    with pdfium_lock:
+        try:
+            document = pdfium.PdfDocument(pdf_path)
+        except pdfium.PdfiumError as e:
+            logger.info(f"Pages not fingerprinted ({e})")
+            return None
+        try:
+            hashes = {}
+            for page_index in page_indices:
+                page = document[page_index]
+                try:
+                    hashes[page_index] = difference_hash(page.render(scale=THUMBNAIL_SCALE).to_pil())
+                finally:
+                    page.close()
+            return hashes
+        finally:
+            document.close()
+
+
+def hamming_distance(first: str, second: str) -> int:
+    return bin(int(first, 16) ^ int(second, 16)).count("1")
+
+
+class PageFingerprintIndex:
+    """SQLite index of page extractions keyed by page fingerprint and column schema"""
+
+    def __init__(self, path: str, max_bytes: int, max_distance: int):
+        """
+        Args:
+            path: SQLite database file (":memory:" for an in-process index)
+            max_bytes: Total size of the stored rows before least recently used pages are evicted
+            max_distance: Largest number of differing image hash bits still counted as the same page
+        """
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        self._counters = {"hits": 0, "misses": 0}
+
+    def lookup(self, text_hash: str, schema: str, image_hash: str) -> Optional[List[Dict[str, Any]]]:
+        """Rows stored for the same page text and schema with the closest image hash within max_distance"""
+        with self._lock:
+            candidates = self._db.execute(
+                "SELECT image_hash, rows FROM pages WHERE text_hash = ? AND schema_key = ?", (text_hash, schema)
+            ).fetchall()
+            best = None
+            for stored_hash, rows in candidates:
+                distance = hamming_distance(stored_hash, image_hash)
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, stored_hash, rows)
+            if best is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["hits"] += 1
+            with self._db:
+                self._db.execute(
+                    "UPDATE pages SET last_used = ? WHERE text_hash = ? AND schema_key = ? AND image_hash = ?",
+                    (time.time(), text_hash, schema, best[1])
+                )
+            return json.loads(best[2])
+
+    def store(self, text_hash: str, schema: str, image_hash: str, rows: List[Dict[str, Any]]) -> None:
+        """Store a page's rows, evicting least recently used pages above max_bytes"""
+        data = json.dumps(rows)
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock, self._db:
+            previous = self._db.execute(
+                "SELECT size FROM pages WHERE text_hash = ? AND schema_key = ? AND image_hash = ?",
+                (text_hash, schema, image_hash)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (text_hash, schema, image_hash, data, len(data), time.time())
+            )
+            self._bytes += len(data) - (previous[0] if previous else 0)
+
+            while self._bytes > self.max_bytes:
+                oldest = self._db.execute(
+                    "SELECT rowid, size FROM pages ORDER BY last_used LIMIT 1"
+                ).fetchone()
+                self._db.execute("DELETE FROM pages WHERE rowid = ?", (oldest[0],))
+                self._bytes -= oldest[1]
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM pages")
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, page-level hit rate and storage usage"""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_rate": round(self._counters["hits"] / lookups, 3) if lookups else None,
+                "entries": entries,
+                "bytes": self._bytes,
+            }
+
+
+def fingerprint_pages(pdf_path: str, pages: List[Tuple[int, List[tuple]]]) -> Optional[Dict[int, Tuple[str, str]]]:
+    """
+    Text and image fingerprints of (page_index, tables) pages of a PDF
+
+    Blocking: run it on an executor.
+
+    Returns:
+        Page index -> (text_hash, image_hash), or None when the pages cannot be rendered
+    """
+    hashes = image_hashes(pdf_path, [page_index for page_index, _ in pages])
+    if hashes is None:
+        return None
+    return {page_index: (text_fingerprint(tables), hashes[page_index]) for page_index, tables in pages}
+
+
+def create_page_index(enabled: bool, path: str, max_bytes: int, max_distance: int) -> Optional[PageFingerprintIndex]:
+    """Open the page fingerprint index, or return None when it is disabled or cannot be opened"""
+    if not enabled:
+        return None
+    try:
+        return PageFingerprintIndex(path, max_bytes, max_distance)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Page fingerprint index not available ({e})")
+        return None
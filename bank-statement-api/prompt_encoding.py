@@ -0,0 +1,116 @@
+"""
+Page table encodings for the LLM prompt in Bank Statement API
+Serializes a page's tables as HTML or as compact tab-separated text, and splits
+an encoded page into parts that fit a prompt token budget, repeating each table's
+header line in every part
+"""
+
+import re
+from typing import List, Tuple
+
+from batching import estimate_tokens
+from table_parser import tables_to_html
+
+
+class PromptEncoding:
+    HTML = "html"  # <table> markup, as produced by tables_to_html
+    COMPACT = "compact"  # one header line and one line per row, cells separated by tabs
+
+
+PROMPT_ENCODINGS = (PromptEncoding.HTML, PromptEncoding.COMPACT)
+
+HTML_TABLE = re.compile(r"<table>\n<thead>(.*?)</thead>\n<tbody>\n(.*?)</tbody></table>\n", re.S)
+HTML_ROW = re.compile(r"<tr>.*?</tr>", re.S)
+
+
+def _tsv_line(cells: List[str]) -> str:
+    # Tabs and line breaks inside a cell would break the row apart
+    return "\t".join(" ".join(str(cell).split()) for cell in cells)
+
+
+def tables_to_tsv(tables: List[tuple]) -> str:
+    """
+    Serialize a page's tables as tab-separated blocks separated by a blank line
+
+    Each block is the header line followed by one line per row. Rows without any
+    text are dropped; they carry nothing the model could extract.
+    """
+    blocks = []
+    for headers, rows in tables:
+        lines = [_tsv_line(headers) or "-"]
+        lines.extend(line for line in map(_tsv_line, rows) if line.strip())
+        blocks.append("\n".join(lines) + "\n")
+    return "\n".join(blocks)
+
+
+def encode_page_tables(tables: List[tuple], encoding: str) -> str:
+    """A page's tables as sent to the LLM in the given encoding"""
+    if encoding == PromptEncoding.COMPACT:
+        return tables_to_tsv(tables)
+    return tables_to_html(tables)
+
+
+def _parse(content: str, encoding: str) -> List[Tuple[str, List[str]]]:
+    """(header, row lines) of every table of an encoded page"""
+    if encoding == PromptEncoding.COMPACT:
+        tables = []
+        for block in content.split("\n\n"):
+            lines = [line for line in block.split("\n") if line]
+            if lines:
+                tables.append((lines[0], lines[1:]))
+        return tables
+    return [(match.group(1), HTML_ROW.findall(match.group(2))) for match in HTML_TABLE.finditer(content)]
+
+
+def _serialize(tables: List[Tuple[str, List[str]]], encoding: str) -> str:
+    if encoding == PromptEncoding.COMPACT:
+        return "\n".join("".join(f"{line}\n" for line in [header, *rows]) for header, rows in tables)
+    return "\n".join(
+        f"<table>\n<thead>{header}</thead>\n<tbody>\n" + "".join(f"{row}\n" for row in rows) + "</tbody></table>\n"
+        for header, rows in tables
+    )
+
+
+def split_page_content(content: str, encoding: str, max_tokens: int) -> List[str]:
+    """
+    Split an encoded page into parts of at most max_tokens estimated tokens
+
+    Parts hold consecutive rows, each table keeping its header line. A row too long
+    for the budget on its own becomes a part by itself.
+
+    Args:
+        content: Page tables as returned by encode_page_tables
+        encoding: Encoding of content
+        max_tokens: Estimated token budget per part; 0 or less disables splitting
+
+    Returns:
+        The parts in row order ([content] if it fits the budget)
+    """
+    if max_tokens <= 0 or estimate_tokens(content) <= max_tokens:
+        return [content]
+
+    parts: List[List[Tuple[str, List[str]]]] = []
+    current: List[Tuple[str, List[str]]] = []
+    current_tokens = 0
+    for header, rows in _parse(content, encoding):
+        header_tokens = estimate_tokens(header)
+        if not rows:
+            current.append((header, []))
+            current_tokens += header_tokens
+            continue
+        opened = False  # whether this table's header is already in the current part
+        for row in rows:
+            row_tokens = estimate_tokens(row)
+            needed = row_tokens if opened else header_tokens + row_tokens
+            if current and current_tokens + needed > max_tokens:
+                parts.append(current)
+                current, current_tokens, opened = [], 0, False
+                needed = header_tokens + row_tokens
+            if not opened:
+                current.append((header, []))
+                opened = True
+            current[-1][1].append(row)
+            current_tokens += needed
+    if current:
+        parts.append(current)
+    return [_serialize(part, encoding) for part in parts] or [content]
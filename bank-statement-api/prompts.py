@@ -3,13 +3,57 @@ Prompt configuration file for bank statement processing API
 This file contains all prompts used in the application for better maintainability
 """
 
-from typing import List
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+# Bump whenever the extraction prompt changes so cached page results are not reused
+PROMPT_VERSION = "1"
+
+
+def part_note(part: Optional[Tuple[int, int]]) -> str:
+    """Notice for one part of a page whose rows were split across several requests"""
+    if not part:
+        return ""
+    return (f" (part {part[0]} of {part[1]} of this page's rows: extract only the rows listed here, "
+            f"not the rest of the page shown in the image)")
+
+
+@lru_cache(maxsize=256)
+def compact_extraction_instructions(user_columns: Tuple[str, ...], json_example: str) -> str:
+    """Fixed instructions of the compact single-page prompt, built once per column schema"""
+    return f"""Extract the transaction rows of one bank statement page as JSON.
+Input: the page image and the page's OCR tables below. Each table is a header line followed by one line per row, cells separated by tabs.
+- Extract only transaction rows; skip headers, totals, summaries and placeholder rows.
+- Map the table columns to the output keys; use "" for a key without data.
+- Use the image only to recover rows that are missing, misaligned or garbled in the tables.
+- Dates as printed; amounts as plain numbers without currency symbols; full descriptions; cheque and reference numbers as printed.
+- Never invent data.
+Return only a JSON array of objects with exactly these keys ({len(user_columns)} per object), or [] if the page has no transactions:
+{json_example}
+"""
+
+
+@lru_cache(maxsize=256)
+def compact_batch_instructions(user_columns: Tuple[str, ...], json_example: str) -> str:
+    """Fixed instructions of the compact multi-page prompt, built once per column schema"""
+    return f"""Extract the transaction rows of several bank statement pages as JSON.
+Input: for each page, its image and then its OCR tables labelled "Page N tables:". Each table is a header line followed by one line per row, cells separated by tabs.
+- Treat every page independently, using only its own tables and image.
+- Extract only transaction rows; skip headers, totals, summaries and placeholder rows.
+- Map the table columns to the output keys; use "" for a key without data.
+- Use the image only to recover rows that are missing, misaligned or garbled in the tables.
+- Dates as printed; amounts as plain numbers without currency symbols; full descriptions; cheque and reference numbers as printed.
+- Never invent data.
+Each page's transactions are a JSON array of objects with exactly these keys ({len(user_columns)} per object), [] if it has none:
+{json_example}
+"""
 
 class BankStatementPrompts:
     """Contains all prompts for bank statement processing"""
     
     @staticmethod
-    def get_data_extraction_prompt(user_columns: List[str], json_example: str, html_content: str) -> str:
+    def get_data_extraction_prompt(user_columns: List[str], json_example: str, html_content: str,
+                                   part: Optional[Tuple[int, int]] = None) -> str:
         """
         Main data extraction prompt for processing bank statement pages
         
@@ -17,6 +61,7 @@ class BankStatementPrompts:
             user_columns: List of user-defined column names
             json_example: Example JSON format for the expected output
             html_content: HTML content extracted from OCR
+            part: (part number, parts) when the page's rows were split across requests
             
         Returns:
             Formatted prompt string
@@ -62,10 +107,92 @@ DATA MAPPING GUIDELINES:
 Expected Output Format:
 {json_example}
 
-HTML page content:
+HTML page content{part_note(part)}:
 {html_content}
 """
 
+    @staticmethod
+    def get_compact_extraction_prompt(user_columns: List[str], json_example: str, page_content: str,
+                                      part: Optional[Tuple[int, int]] = None) -> str:
+        """
+        Compact data extraction prompt: the schema appears once, in the JSON example,
+        and the page tables are tab-separated text instead of HTML
+
+        Args:
+            user_columns: List of user-defined column names
+            json_example: Example JSON format for the expected output
+            page_content: Page tables encoded as tab-separated text
+            part: (part number, parts) when the page's rows were split across requests
+
+        Returns:
+            Formatted prompt string
+        """
+        instructions = compact_extraction_instructions(tuple(user_columns), json_example)
+        return f"{instructions}\nTables{part_note(part)}:\n{page_content}"
+
+    @staticmethod
+    def get_batch_extraction_prompt(user_columns: List[str], json_example: str, page_numbers: List[int]) -> str:
+        """
+        Data extraction instructions for several pages sent in one request
+
+        Each page follows these instructions as its image and a "Page N" HTML table.
+
+        Args:
+            user_columns: List of user-defined column names
+            json_example: Example JSON format for the transactions of one page
+            page_numbers: Page numbers included in the request
+
+        Returns:
+            Formatted prompt string
+        """
+        page_keys = ", ".join(f'"{number}"' for number in page_numbers)
+        return f"""
+You are a strict data extractor for bank statements.
+
+You are provided, for each of the pages {page_keys}:
+1. The image of that page (to correct OCR errors).
+2. An OCR-extracted HTML table of that page, labelled with its page number.
+A fixed schema with column names applies to every page: {user_columns}
+
+CORE INSTRUCTIONS:
+- Treat every page independently: extract its rows from its own HTML table and image only.
+- Extract ONLY actual **transaction rows** from the HTML table.
+- If the HTML is incomplete or missing data, use the page image to recover the transaction rows.
+- If the HTML table has incorrect row-column alignment or malformed structure, cross-check and correct it using the image.
+- Use the image **only if the HTML format is empty, broken or misleading**.
+- Map the data from HTML table columns to the user-specified columns as accurately as possible.
+- If a user column doesn't have corresponding data in the HTML, use empty string ("") or null.
+
+OUTPUT REQUIREMENTS:
+- Return a single JSON object of the form {{"pages": {{"<page number>": [transactions]}}}} with exactly the keys {page_keys}.
+- Each page value is a JSON array of objects with keys exactly matching: {user_columns}
+- If a page has no valid transaction rows, its value must be an empty array [].
+- Each row must contain meaningful transaction data – avoid filler values like column names or placeholder dashes.
+- Do NOT hallucinate or invent data.
+- Do NOT return explanations, comments, or non-JSON text.
+
+DATA MAPPING GUIDELINES:
+- Date columns: Extract in the format present in the statement (DD/MM/YYYY, DD-MM-YYYY, etc.)
+- Amount columns: Extract numeric values only, remove currency symbols
+- Description/Narration: Include full transaction description
+- Reference numbers: Include cheque numbers, reference numbers as they appear
+- Balance: Extract the running balance amount
+
+Expected format of each page's array:
+{json_example}
+"""
+
+    @staticmethod
+    def get_compact_batch_prompt(user_columns: List[str], json_example: str, page_numbers: List[int]) -> str:
+        """
+        Compact instructions for several pages sent in one request
+
+        Each page follows these instructions as its image and a "Page N tables:" text block.
+        """
+        page_keys = ", ".join(f'"{number}"' for number in page_numbers)
+        instructions = compact_batch_instructions(tuple(user_columns), json_example)
+        return f'{instructions}Return only {{"pages": {{"<page number>": [transactions]}}}} with exactly the keys {page_keys}.\n'
+
     @staticmethod
     def get_column_validation_prompt() -> str:
         """Prompt for validating column names"""
@@ -0,0 +1,190 @@
+"""
+Per-request processing report for Bank Statement API
+Records how each page of a statement was handled and what the LLM calls cost,
+so responses can show how many pages needed the LLM
+"""
+
+from typing import Any, Dict, List, Optional
+
+
+class PageRoute:
+    FAST_PATH = "fast_path"  # Mapped deterministically, LLM skipped
+    LLM = "llm"  # Sent to the chat model
+    SKIPPED = "skipped"  # Classified as a non-transaction page, neither rendered nor sent to the LLM
+    PAGE_INDEX = "page_index"  # Same page seen in an earlier upload, rows reused from the fingerprint index
+
+
+class PageStatus:
+    OK = "ok"  # Extracted on the first attempt (or from the cache / fast path)
+    RETRIED = "retried"  # Extracted after retrying the chat request
+    FAILED = "failed"  # No usable extraction; retried when the statement is reprocessed
+
+
+class StageTimings:
+    """Cumulative seconds and number of spans per pipeline stage of one request"""
+
+    def __init__(self):
+        self.stages: Dict[str, List[float]] = {}  # stage -> [seconds, count]
+
+    def add(self, stage: str, seconds: float) -> None:
+        entry = self.stages.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def seconds(self, stage: str) -> float:
+        return self.stages.get(stage, (0.0, 0))[0]
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            stage: {"seconds": round(seconds, 4), "count": int(count)}
+            for stage, (seconds, count) in self.stages.items()
+        }
+
+
+class ProcessingReport:
+    """Route taken by every processed page of one request and the cost of its LLM calls"""
+
+    def __init__(self):
+        self.pages_total = 0
+        self.routes: Dict[int, str] = {}
+        self.statuses: Dict[int, str] = {}
+        self.errors: Dict[int, str] = {}
+        self.retries = 0
+        self.timings = StageTimings()
+        self.stitching: Dict[str, int] = {}  # table stitching repairs by kind
+        self.page_scores: Dict[int, float] = {}  # page classifier score of the pages not mapped locally
+        self.page_sources: Dict[int, Dict[str, str]] = {}  # text layer or OCR, and why, per page
+        self.ocr_seconds_saved: Optional[float] = None  # estimated upload and OCR time of the skipped pages
+        self.page_index_lookups = 0  # pages looked up in the page fingerprint index
+        self.balance_check: Optional[Dict[str, Any]] = None  # running balance of the extracted rows
+        self.llm_mode = "single"
+        self.prompt_encoding = "html"
+        self.prompt_estimates: Dict[int, int] = {}  # estimated prompt text tokens per page sent to the LLM
+        self.prompt_parts: Dict[int, int] = {}  # requests per page, more than one for pages over the token budget
+        self.llm_calls = 0
+        self.llm_batched_calls = 0
+        self.llm_fallback_pages = 0
+        self.llm_transactions = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.llm_seconds = 0.0
+
+    def record(self, page_index: int, route: str) -> None:
+        self.routes[page_index] = route
+
+    def record_status(self, page_index: int, status: str, error: str = None) -> None:
+        self.statuses[page_index] = status
+        if error:
+            self.errors[page_index] = error
+        else:
+            self.errors.pop(page_index, None)
+
+    def record_source(self, page_index: int, source: str, reason: str) -> None:
+        self.page_sources[page_index] = {"source": source, "reason": reason}
+
+    def count_source(self, source: str) -> int:
+        return sum(1 for value in self.page_sources.values() if value["source"] == source)
+
+    def text_layer_summary(self) -> Dict[str, Any]:
+        """Where the text of every page came from and the OCR time that saved"""
+        sources: Dict[str, int] = {}
+        for value in self.page_sources.values():
+            sources[value["source"]] = sources.get(value["source"], 0) + 1
+        return {
+            "sources": sources,
+            "seconds": round(self.timings.seconds("text_layer"), 4),
+            "estimated_ocr_seconds_saved": None if self.ocr_seconds_saved is None else round(self.ocr_seconds_saved, 3),
+            "pages": [
+                {"page": page_index + 1, **value} for page_index, value in sorted(self.page_sources.items())
+            ],
+        }
+
+    def record_prompt(self, page_index: int, estimated_tokens: int, parts: int = 1) -> None:
+        """Record the estimated prompt text tokens of a page and the requests it was split into"""
+        self.prompt_estimates[page_index] = estimated_tokens
+        self.prompt_parts[page_index] = parts
+
+    def failed_pages(self) -> List[int]:
+        """Zero-based indices of the pages without a usable extraction"""
+        return sorted(page_index for page_index, status in self.statuses.items() if status == PageStatus.FAILED)
+
+    def record_llm_call(self, pages: int, transactions: int, prompt_tokens: int,
+                        completion_tokens: int, seconds: float) -> None:
+        """Record a completed chat request covering one or more pages"""
+        self.llm_calls += 1
+        if pages > 1:
+            self.llm_batched_calls += 1
+        self.llm_transactions += transactions
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.llm_seconds += seconds
+
+    def llm_usage(self) -> Dict[str, Any]:
+        """Token and latency totals of the chat requests, and their cost per extracted transaction"""
+        per_transaction = max(self.llm_transactions, 1)
+        return {
+            "mode": self.llm_mode,
+            "calls": self.llm_calls,
+            "batched_calls": self.llm_batched_calls,
+            "fallback_pages": self.llm_fallback_pages,
+            "transactions": self.llm_transactions,
+            "prompt_tokens": self.prompt_tokens,
+            "encoding": self.prompt_encoding,
+            "estimated_prompt_tokens": sum(self.prompt_estimates.values()),
+            "split_pages": sum(1 for parts in self.prompt_parts.values() if parts > 1),
+            "completion_tokens": self.completion_tokens,
+            "latency_seconds": round(self.llm_seconds, 3),
+            "tokens_per_transaction": round((self.prompt_tokens + self.completion_tokens) / per_transaction, 1),
+            "latency_ms_per_transaction": round(1000 * self.llm_seconds / per_transaction, 1),
+        }
+
+    def count(self, route: str) -> int:
+        return sum(1 for value in self.routes.values() if value == route)
+
+    def count_status(self, status: str) -> int:
+        return sum(1 for value in self.statuses.values() if value == status)
+
+    def page_index_summary(self) -> Dict[str, Any]:
+        """Page fingerprint index lookups of this request and the share served from it"""
+        hits = self.count(PageRoute.PAGE_INDEX)
+        return {
+            "lookups": self.page_index_lookups,
+            "hits": hits,
+            "hit_rate": round(hits / self.page_index_lookups, 3) if self.page_index_lookups else None,
+        }
+
+    def route_entry(self, page_index: int, route: str) -> Dict[str, Any]:
+        entry = {"page": page_index + 1, "route": route}
+        if route != PageRoute.SKIPPED:
+            entry["status"] = self.statuses.get(page_index, PageStatus.OK)
+        if page_index in self.page_scores:
+            entry["score"] = round(self.page_scores[page_index], 3)
+        if page_index in self.prompt_estimates:
+            entry["estimated_prompt_tokens"] = self.prompt_estimates[page_index]
+        if self.prompt_parts.get(page_index, 1) > 1:
+            entry["parts"] = self.prompt_parts[page_index]
+        if page_index in self.errors:
+            entry["error"] = self.errors[page_index]
+        return entry
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats = {
+            "pages_total": self.pages_total,
+            "pages_with_tables": len(self.routes),
+            "llm_skipped": self.count(PageRoute.FAST_PATH),
+            "llm_processed": self.count(PageRoute.LLM),
+            "pages_skipped": self.count(PageRoute.SKIPPED),
+            "page_index": self.page_index_summary(),
+            "pages_ok": self.count_status(PageStatus.OK),
+            "pages_retried": self.count_status(PageStatus.RETRIED),
+            "pages_failed": self.count_status(PageStatus.FAILED),
+            "failed_pages": [page_index + 1 for page_index in self.failed_pages()],
+            "retries": self.retries,
+            "stitching": dict(self.stitching),
+            "text_layer": self.text_layer_summary(),
+            "llm_usage": self.llm_usage(),
+            "routes": [self.route_entry(page_index, route) for page_index, route in sorted(self.routes.items())],
+        }
+        if self.balance_check is not None:
+            stats["balance_check"] = self.balance_check
+        return stats
@@ -0,0 +1,228 @@
+"""
+Resilient call layer for Bank Statement API
+Wraps Mistral API calls with per-call timeouts, exponential backoff with jitter
+that honours Retry-After, and a circuit breaker per operation
+"""
+
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: timeouts, rate limiting and server-side failures
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class CallFailedError(Exception):
+    """Raised when a call still fails after its retries, or is not retryable"""
+
+    def __init__(self, operation: str, attempts: int, error: Exception):
+        super().__init__(f"{operation} failed after {attempts} attempt(s): {str(error) or type(error).__name__}")
+        self.operation = operation
+        self.attempts = attempts
+        self.error = error
+
+
+class CircuitOpenError(CallFailedError):
+    """Raised without calling the API while the operation's circuit breaker is open"""
+
+    def __init__(self, operation: str, retry_after: float):
+        Exception.__init__(self, f"{operation} is temporarily unavailable (circuit open, retry in {retry_after:.0f}s)")
+        self.operation = operation
+        self.attempts = 0
+        self.error = None
+        self.retry_after = retry_after
+
+
+def error_status_code(error: Exception) -> Optional[int]:
+    """HTTP status of an API error (mistralai SDKError, httpx.HTTPStatusError), if any"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) and status > 0 else None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Timeouts, connection errors, 429 and 5xx responses are retried; other errors are permanent"""
+    if isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException, httpx.TransportError, ConnectionError)):
+        return True
+    return error_status_code(error) in RETRYABLE_STATUS_CODES
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Delay requested by the Retry-After header of an API error, in seconds"""
+    response = getattr(error, "raw_response", None) or getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failed calls and rejects calls for
+    `reset_seconds`; then lets a single trial call through (half-open) and closes
+    again if it succeeds
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def before_call(self, operation: str) -> None:
+        """Raise CircuitOpenError unless a call may go through now"""
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return
+        remaining = self.reset_seconds - (time.monotonic() - self.opened_at)
+        raise CircuitOpenError(operation, max(remaining, 1.0))
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_running or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial_running = False
+
+    def cancel_trial(self) -> None:
+        """Let another call be the trial call if this one was cancelled"""
+        self._trial_running = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+class ResilientCaller:
+    """Retries API calls of named operations, each with its own timeout and circuit breaker"""
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float,
+                 timeouts: Dict[str, float], failure_threshold: int, reset_seconds: float,
+                 metrics: Optional[Any] = None):
+        """
+        Args:
+            max_attempts: Attempts per call, including the first (1 = no retries)
+            base_delay: Backoff before the first retry in seconds; doubled on every further retry
+            max_delay: Upper bound of the exponential backoff in seconds
+            timeouts: Timeout in seconds per operation name; 0 or missing = no timeout
+            failure_threshold: Consecutive failed calls that open an operation's circuit
+            reset_seconds: How long an open circuit rejects calls before a trial call
+            metrics: Optional MetricsRegistry counting retries, failures and rejected calls
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeouts = timeouts
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.metrics = metrics
+
+    def breaker(self, operation: str) -> CircuitBreaker:
+        if operation not in self.breakers:
+            self.breakers[operation] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+        return self.breakers[operation]
+
+    def backoff(self, retry: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+        retry_after = retry_after_seconds(error)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    async def call(self, operation: str, func: Callable[..., Awaitable[Any]], *args,
+                   before_attempt: Optional[Callable[[], Awaitable[Any]]] = None, **kwargs) -> Tuple[Any, int]:
+        """
+        Call `func(*args, **kwargs)` with the operation's timeout, retrying retryable failures
+
+        Args:
+            operation: Operation name selecting the timeout and circuit breaker (e.g. 'chat')
+            func: Coroutine function performing the API call
+            before_attempt: Optional coroutine function awaited before every attempt, outside
+                the timeout (e.g. acquiring the rate limiter)
+
+        Returns:
+            (result, attempts) tuple
+
+        Raises:
+            CircuitOpenError: If the operation's circuit is open
+            CallFailedError: If the call fails permanently or runs out of attempts
+        """
+        breaker = self.breaker(operation)
+        timeout = self.timeouts.get(operation) or None
+        attempt = 0
+        while True:
+            try:
+                breaker.before_call(operation)
+            except CircuitOpenError:
+                self.count("api_rejected_calls_total", operation)
+                raise
+            attempt += 1
+            try:
+                if before_attempt is not None:
+                    await before_attempt()
+                result = await asyncio.wait_for(func(*args, **kwargs), timeout)
+            except asyncio.CancelledError:
+                breaker.cancel_trial()
+                raise
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    breaker.record_failure()
+                else:
+                    # The service answered (e.g. 400/422), so it is not degraded
+                    breaker.record_success()
+                if not retryable or attempt >= self.max_attempts:
+                    self.count("api_failures_total", operation)
+                    raise CallFailedError(operation, attempt, e) from e
+                self.count("api_retries_total", operation)
+                delay = self.backoff(attempt - 1, e)
+                logger.warning(f"{operation} attempt {attempt} failed ({type(e).__name__} {e}); "
+                               f"retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success()
+            return result, attempt
+
+    def count(self, name: str, operation: str) -> None:
+        if self.metrics is not None:
+            self.metrics.inc(name, operation=operation)
+
+    def stats(self) -> Dict[str, Any]:
+        return {operation: breaker.to_dict() for operation, breaker in self.breakers.items()}
@@ -0,0 +1,61 @@
+"""
+Fair page scheduler for Bank Statement API
+Concurrency limit for LLM page requests that can be shared by several statements,
+handing free slots to the waiting statements in turn so pages are interleaved
+"""
+
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Hashable
+
+
+class FairScheduler:
+    """Round-robin semaphore: at most `capacity` slots in use, granted to waiting owners in rotation"""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._in_use = 0
+        self._waiters: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+
+    async def acquire(self, owner: Hashable) -> None:
+        if self._in_use < self.capacity and not self._waiters:
+            self._in_use += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(owner, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # The slot was handed over just before cancellation
+            else:
+                queue = self._waiters.get(owner)
+                if queue is not None and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._waiters[owner]
+            raise
+
+    def release(self) -> None:
+        """Pass the slot to the next waiting owner, or free it"""
+        while self._waiters:
+            owner, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+            if queue:
+                self._waiters.move_to_end(owner)
+            else:
+                del self._waiters[owner]
+            if not future.done():
+                future.set_result(None)
+                return
+        self._in_use -= 1
+
+    @asynccontextmanager
+    async def slot(self, owner: Hashable) -> AsyncIterator[None]:
+        await self.acquire(owner)
+        try:
+            yield
+        finally:
+            self.release()
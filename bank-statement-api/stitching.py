@@ -0,0 +1,230 @@
+"""
+Cross-page table stitching for Bank Statement API
+Joins the transaction tables of a statement across page breaks before they are
+mapped or sent to the LLM: header-less continuation tables get the headers of the
+table they continue, rows split at a page break or wrapped onto extra lines are
+merged back, and repeated header rows are removed
+"""
+
+from typing import Dict, List, Optional
+
+from fast_path import AMOUNT_ROLES, normalize_header, parse_amount, parse_date, table_roles
+
+# Header-less tables whose first row differs from the continued table's column
+# kinds in more columns than this are not treated as continuations
+MAX_KIND_MISMATCHES = 1
+
+
+def cell_kind(text: str) -> str:
+    """Kind of a cell's content: empty, date, amount or text"""
+    if not text.strip():
+        return "empty"
+    if parse_date(text) is not None:
+        return "date"
+    if parse_amount(text) is not None:
+        return "amount"
+    return "text"
+
+
+def column_kinds(rows: List[List[str]]) -> List[str]:
+    """Most common non-empty kind of every column ('empty' for columns without content)"""
+    if not rows:
+        return []
+    kinds = []
+    for column in range(len(rows[0])):
+        counts: Dict[str, int] = {}
+        for row in rows:
+            kind = cell_kind(row[column]) if column < len(row) else "empty"
+            if kind != "empty":
+                counts[kind] = counts.get(kind, 0) + 1
+        kinds.append(max(counts, key=counts.get) if counts else "empty")
+    return kinds
+
+
+def is_transaction_table(headers: List[str]) -> bool:
+    roles = set(table_roles(headers))
+    return "date" in roles and bool(roles & AMOUNT_ROLES)
+
+
+def looks_like_data_row(cells: List[str]) -> bool:
+    """True when a header row is really a transaction (the header of a page was not repeated)"""
+    if is_transaction_table(cells):
+        return False
+    kinds = [cell_kind(cell) for cell in cells]
+    return "date" in kinds or kinds.count("amount") >= 2
+
+
+def matches_kinds(row: List[str], kinds: List[str]) -> bool:
+    mismatches = 0
+    for cell, expected in zip(row, kinds):
+        kind = cell_kind(cell)
+        if kind != "empty" and expected != "empty" and kind != expected:
+            mismatches += 1
+    return mismatches <= MAX_KIND_MISMATCHES
+
+
+class _RowShape:
+    """Which parts of a transaction row are present, by column role"""
+
+    def __init__(self, row: List[str], roles: List[Optional[str]]):
+        self.has_date = False
+        self.has_amount = False
+        self.has_balance = False
+        self.has_text = False
+        for cell, role in zip(row, roles):
+            if not cell.strip():
+                continue
+            if role == "date" or role == "value_date":
+                self.has_date = self.has_date or parse_date(cell) is not None
+            elif role == "balance":
+                self.has_balance = self.has_balance or parse_amount(cell) is not None
+            elif role in AMOUNT_ROLES:
+                self.has_amount = self.has_amount or parse_amount(cell) is not None
+            else:
+                self.has_text = True
+
+    @property
+    def is_wrapped_line(self) -> bool:
+        """Only text: the continuation of the previous row's narration"""
+        return self.has_text and not (self.has_date or self.has_amount or self.has_balance)
+
+    @property
+    def is_incomplete(self) -> bool:
+        """Dated but without amounts or balance: the rest of the row follows (e.g. on the next page)"""
+        return self.has_date and not (self.has_amount or self.has_balance)
+
+    @property
+    def completes_row(self) -> bool:
+        """Amounts without a date: the second half of a split row"""
+        return not self.has_date and (self.has_amount or self.has_balance)
+
+
+def merge_rows(first: List[str], second: List[str]) -> List[str]:
+    """Join two halves of a row cell by cell"""
+    return [" ".join(part for part in (a.strip(), b.strip()) if part) for a, b in zip(first, second)]
+
+
+STAT_KEYS = (
+    "continuation_tables", "tables_merged", "header_rows_removed", "duplicate_rows_removed",
+    "split_rows_merged", "wrapped_lines_merged",
+)
+
+
+class TableStitcher:
+    """
+    Stitches the transaction tables of a statement page by page, in page order
+
+    A page's rows can still change while later pages are added (a wrapped narration
+    or the rest of a split row is merged into the last row of the open table), so
+    only the pages before final_pages() can be passed on.
+    """
+
+    def __init__(self, stats: Optional[Dict[str, int]] = None):
+        self.stats = {} if stats is None else stats
+        for key in STAT_KEYS:
+            self.stats.setdefault(key, 0)
+        self.pages: List[List[tuple]] = []  # stitched tables of every page added so far
+        # The transaction table rows are currently appended to, its headers / column kinds and its page
+        self.open_headers: Optional[List[str]] = None
+        self.open_kinds: List[str] = []
+        self.open_rows: Optional[List[List[str]]] = None
+        self.open_page: Optional[int] = None
+
+    def final_pages(self) -> int:
+        """Number of leading pages that pages added later can no longer change"""
+        return len(self.pages) if self.open_rows is None else self.open_page
+
+    def add_page(self, tables: List[tuple]) -> None:
+        stats = self.stats
+        page: List[tuple] = []
+        for headers, rows in tables:
+            rows = [row for row in rows if any(cell.strip() for cell in row)]
+
+            if self.open_headers is not None and len(headers) == len(self.open_headers) \
+                    and looks_like_data_row(headers) and matches_kinds(headers, self.open_kinds):
+                rows = [list(headers), *rows]
+                headers = list(self.open_headers)
+                stats["continuation_tables"] += 1
+
+            if not is_transaction_table(headers):
+                if rows:
+                    page.append((headers, rows))
+                continue
+
+            continues = self.open_headers is not None and \
+                [normalize_header(h) for h in headers] == [normalize_header(h) for h in self.open_headers]
+            if not continues:
+                self.open_headers, self.open_kinds, self.open_rows = headers, column_kinds(rows), None
+
+            open_rows = self.open_rows
+            if page and open_rows is not None and page[-1][1] is open_rows:
+                target = open_rows  # Same headers as the previous table on this page: merge
+                stats["tables_merged"] += 1
+            else:
+                target = []
+                page.append((headers, target))
+
+            roles = table_roles(headers)
+            header_key = [normalize_header(h) for h in headers]
+            for row in rows:
+                if [normalize_header(cell) for cell in row] == header_key:
+                    stats["header_rows_removed"] += 1
+                    continue
+                shape = _RowShape(row, roles)
+                if open_rows:
+                    previous = _RowShape(open_rows[-1], roles)
+                    if shape.has_balance and row == open_rows[-1]:
+                        stats["duplicate_rows_removed"] += 1
+                        continue
+                    if shape.is_wrapped_line:
+                        open_rows[-1] = merge_rows(open_rows[-1], row)
+                        stats["wrapped_lines_merged"] += 1
+                        continue
+                    if shape.completes_row and previous.is_incomplete:
+                        open_rows[-1] = merge_rows(open_rows[-1], row)
+                        stats["split_rows_merged"] += 1
+                        continue
+                target.append(row)
+                if open_rows is not target:
+                    open_rows = self.open_rows = target
+                    self.open_page = len(self.pages)
+
+            if not target:
+                page.pop()
+            elif not self.open_kinds or all(kind == "empty" for kind in self.open_kinds):
+                self.open_kinds = column_kinds(target)
+        self.pages.append(page)
+
+    def add_pages(self, page_tables: List[List[tuple]]) -> int:
+        """Add pages in order and return final_pages()"""
+        for tables in page_tables:
+            self.add_page(tables)
+        return self.final_pages()
+
+
+def stitch_page_tables(page_tables: List[List[tuple]], stats: Optional[Dict[str, int]] = None) -> List[List[tuple]]:
+    """
+    Stitch the transaction tables of a statement across pages
+
+    Tables stay on their pages so routing, caching and progress remain per page, but:
+    - a table without a header row (its first row parsed as the header) that has the
+      column count and column kinds of the transaction table before it gets that
+      table's headers, and its header cells become its first row
+    - consecutive tables with the same headers on one page are merged
+    - rows repeating the header, and rows with a balance repeating the row before
+      them (a transaction printed again at the top of the next page), are removed
+    - a row holding only text continues the previous row's narration, and a row with
+      amounts but no date completes a previous dated row without amounts; both are
+      merged into that row, also across page breaks (the row stays on its first page)
+    - tables left without rows are dropped
+
+    Args:
+        page_tables: (headers, rows) tables of every page, from parse_markdown_tables
+        stats: Optional dict counting the repairs made, by kind (see STAT_KEYS)
+
+    Returns:
+        Stitched tables per page, same number of pages
+    """
+    stitcher = TableStitcher(stats)
+    stitcher.add_pages(page_tables)
+    return stitcher.pages
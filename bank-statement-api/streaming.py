@@ -0,0 +1,113 @@
+"""
+Streaming response encoders for Bank Statement API
+Turn the per-page results of BankStatementProcessor.iter_bank_statement into
+NDJSON, Server-Sent Events or chunked CSV as pages complete. Each page goes
+through a TransactionTable, so streamed rows have the same types as the other
+outputs (amounts as numbers, missing amounts as null).
+"""
+
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from transactions import TransactionTable
+
+logger = logging.getLogger(__name__)
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+    "csv_stream": "text/csv",
+}
+
+# Disable proxy buffering so rows reach the client as soon as they are sent
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _typed_records(rows: List[Dict[str, Any]], columns: List[str], types: Dict[str, str],
+                   next_id: Optional[int]) -> List[Dict[str, Any]]:
+    """A page's rows with the values of TransactionTable.to_records, optionally numbered from next_id"""
+    # New dicts: the rows may be shared with the page cache or the page index
+    records = TransactionTable.from_rows(rows, columns, types).to_records()
+    if next_id is None:
+        return records
+    for offset, record in enumerate(records):
+        record["id"] = next_id + offset
+    return records
+
+
+async def ndjson_stream(pages: AsyncIterator[tuple], columns: List[str], types: Dict[str, str],
+                        add_ids: bool = False) -> AsyncIterator[bytes]:
+    """
+    Encode transactions as newline-delimited JSON, one transaction per line
+
+    Args:
+        pages: Async iterator of (page_index, rows) tuples
+        columns: Column names, in output order
+        types: Column name -> 'float' or 'string', as returned by BankStatementProcessor.column_types
+        add_ids: Number transactions with a running 'id' field
+    """
+    next_id = 1 if add_ids else None
+    try:
+        async for _, rows in pages:
+            rows = _typed_records(rows, columns, types, next_id)
+            if next_id is not None:
+                next_id += len(rows)
+            if rows:
+                yield "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+    except Exception as e:
+        logger.exception("Streaming failed")
+        yield (json.dumps({"error": f"Processing failed: {str(e)}"}) + "\n").encode("utf-8")
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+async def sse_stream(pages: AsyncIterator[tuple], columns: List[str], types: Dict[str, str],
+                     add_ids: bool = False, report: Optional[Any] = None) -> AsyncIterator[bytes]:
+    """
+    Encode results as Server-Sent Events: one 'page' event per page and a final 'done' event
+
+    Args:
+        pages: Async iterator of (page_index, rows) tuples
+        columns: Column names, in output order
+        types: Column name -> 'float' or 'string', as returned by BankStatementProcessor.column_types
+        add_ids: Number transactions with a running 'id' field
+        report: Optional ProcessingReport whose page counts are added to the 'done' event
+    """
+    next_id = 1 if add_ids else None
+    total = 0
+    try:
+        async for page_index, rows in pages:
+            rows = _typed_records(rows, columns, types, next_id)
+            if next_id is not None:
+                next_id += len(rows)
+            total += len(rows)
+            yield _sse_event("page", {"page": page_index + 1, "transactions": rows})
+        done = {"total_transactions": total}
+        if report is not None:
+            done["page_stats"] = report.to_dict()
+        yield _sse_event("done", done)
+    except Exception as e:
+        logger.exception("Streaming failed")
+        yield _sse_event("error", {"message": f"Processing failed: {str(e)}"})
+
+
+async def csv_stream(pages: AsyncIterator[tuple], columns: List[str], types: Dict[str, str]) -> AsyncIterator[bytes]:
+    """
+    Encode transactions as CSV, sending the header first and then one chunk per page
+
+    Args:
+        pages: Async iterator of (page_index, rows) tuples
+        columns: Column names, in output order
+        types: Column name -> 'float' or 'string', as returned by BankStatementProcessor.column_types
+    """
+    yield TransactionTable(columns, types).to_csv().encode("utf-8")
+    try:
+        async for _, rows in pages:
+            if rows:
+                yield b"".join(TransactionTable.from_rows(rows, columns, types).iter_csv(header=False))
+    except Exception:
+        # Headers are already sent; the truncated body is the only signal left
+        logger.exception("Streaming failed")
@@ -0,0 +1,191 @@
+"""
+Single-pass markdown table parser for Bank Statement API
+Extracts (headers, rows) tables directly from OCR markdown, yielding the same
+tables as rendering it with Python-Markdown's tables extension and reading the
+HTML back with BeautifulSoup, without building or re-parsing any HTML
+"""
+
+import re
+import threading
+from typing import Callable, List, Optional
+
+import markdown
+from bs4 import BeautifulSoup
+
+# Block rules of Python-Markdown that decide whether a table starts at a block
+HASH_HEADER = re.compile(r"(?:^|\n)(?P<level>#{1,6})(?P<header>(?:\\.|[^\\])*?)#*(?:\n|$)")
+SETEXT_HEADER = re.compile(r"^.*?\n[=-]+[ ]*(\n|$)", re.MULTILINE)
+HORIZONTAL_RULE = re.compile(
+    r"^[ ]{0,3}(?=(?P<atomicgroup>(-+[ ]{0,2}){3,}|(_+[ ]{0,2}){3,}|(\*+[ ]{0,2}){3,}))(?P=atomicgroup)[ ]*$",
+    re.MULTILINE
+)
+LIST_START = re.compile(r"^[ ]{0,3}(?:\d+\.|[*+-])[ ]+")
+BLOCKQUOTE = re.compile(r"(^|\n)[ ]{0,3}>")
+REFERENCE = re.compile(r"^[ ]{0,3}\[[^\[\]]*\]:", re.MULTILINE)
+BLANK_LINE = re.compile(r"(?<=\n) +\n")
+
+# Constructs handled exactly only by the full markdown renderer
+RAW_HTML_BLOCK = re.compile(r"^[ ]{0,3}<[A-Za-z/!?]", re.MULTILINE)
+INLINE_MARKUP = re.compile(r"[*\[<]|(?<!\w)_|_(?!\w)|&#?\w+;")
+
+SEPARATOR_CHARS = set("|:- ")
+TAB_LENGTH = 4
+
+
+class UnsupportedMarkdown(Exception):
+    """Raised when a page uses markdown the single-pass parser does not reproduce exactly"""
+
+
+_renderer = threading.local()
+
+
+def render_cell(text: str) -> str:
+    """Text of a table cell containing inline markup, as the markdown + BeautifulSoup path reads it"""
+    md = getattr(_renderer, "md", None)
+    if md is None:
+        md = _renderer.md = markdown.Markdown(extensions=["markdown.extensions.tables"])
+    html = md.reset().convert(f"| {text} |\n| --- |")
+    th = BeautifulSoup(html, "html.parser").find("th")
+    return th.get_text(strip=True) if th is not None else text.strip()
+
+
+def _cell_text(cell: str, render: Callable[[str], str]) -> str:
+    cell = cell.strip(" ")
+    return render(cell) if INLINE_MARKUP.search(cell) else cell.strip()
+
+
+def _split_row(row: str, border: bool) -> List[str]:
+    if border:
+        if row.startswith("|"):
+            row = row[1:]
+        if row.endswith("|"):
+            row = row[:-1]
+    return row.split("|")
+
+
+def _parse_table(block: str, render: Callable[[str], str]) -> Optional[tuple]:
+    """Parse a block as a pipe table, or return None if it does not start with one"""
+    lines = block.split("\n")
+    if len(lines) < 2:
+        return None
+
+    header = lines[0].strip(" ")
+    border = header.startswith("|") or header.endswith("|")
+    header_cells = _split_row(header, border)
+    column_count = len(header_cells)
+
+    is_table = column_count > 1
+    if column_count == 1 and border:
+        # Each row of a single column table needs at least one pipe
+        for line in lines[1:]:
+            line = line.strip(" ")
+            is_table = line.startswith("|") or line.endswith("|")
+            if not is_table:
+                break
+    if not is_table:
+        return None
+
+    separator = _split_row(lines[1].strip(" "), border)
+    if len(separator) != column_count or not set("".join(separator)) <= SEPARATOR_CHARS:
+        return None
+
+    headers = [_cell_text(cell, render) for cell in header_cells]
+    rows = []
+    for line in lines[2:]:
+        cells = _split_row(line.strip(" "), border)
+        # Rows are padded or truncated to the header width
+        rows.append([
+            _cell_text(cells[idx], render) if idx < len(cells) else ""
+            for idx in range(column_count)
+        ])
+    if not rows:
+        rows.append([""] * column_count)
+    return headers, rows
+
+
+def parse_markdown_tables(markdown_text: str, render: Callable[[str], str] = render_cell) -> List[tuple]:
+    """
+    Extract all pipe tables from markdown in a single pass
+
+    Follows Python-Markdown's block rules: blocks are separated by blank lines, a table
+    must start its block (after splitting off headings and horizontal rules) and runs
+    to the end of that block.
+
+    Args:
+        markdown_text: Markdown text, already cleaned of <br> tags and LaTeX math
+        render: Function returning the text of cells that contain inline markup
+
+    Returns:
+        List of (headers, rows) tuples, in document order
+
+    Raises:
+        UnsupportedMarkdown: If the text contains code, raw HTML blocks, escapes or
+            link reference definitions, or a pipe inside a list, blockquote or indented block
+    """
+    if ("`" in markdown_text or "\\" in markdown_text or RAW_HTML_BLOCK.search(markdown_text)
+            or REFERENCE.search(markdown_text)):
+        raise UnsupportedMarkdown("code spans, escapes, raw HTML or link references")
+
+    # Same whitespace normalization as the markdown renderer
+    source = markdown_text.replace("\x02", "").replace("\x03", "")
+    source = source.replace("\r\n", "\n").replace("\r", "\n") + "\n\n"
+    source = BLANK_LINE.sub("\n", source.expandtabs(TAB_LENGTH))
+
+    tables = []
+    blocks = source.split("\n\n")[::-1]  # stack, next block last
+    while blocks:
+        block = blocks.pop()
+        if not block:
+            continue
+        if block.startswith("\n"):
+            blocks.append(block[1:])
+            continue
+        if block.startswith(" " * TAB_LENGTH):
+            if "|" in block:
+                raise UnsupportedMarkdown("pipe in an indented block")
+            continue
+
+        table = _parse_table(block, render)
+        if table is not None:
+            tables.append(table)
+            continue
+
+        # Headings and rules split the block; a table may start right after them
+        match = HASH_HEADER.search(block)
+        if match:
+            blocks.extend(part for part in (block[match.end():], block[:match.start()]) if part)
+            continue
+        if SETEXT_HEADER.match(block):
+            lines = block.split("\n")
+            if len(lines) > 2:
+                blocks.append("\n".join(lines[2:]))
+            continue
+        match = HORIZONTAL_RULE.search(block)
+        if match:
+            before = block[:match.start()].rstrip("\n")
+            after = block[match.end():].lstrip("\n")
+            blocks.extend(part for part in (after, before) if part)
+            continue
+
+        if "|" in block and (LIST_START.match(block) or BLOCKQUOTE.search(block)):
+            raise UnsupportedMarkdown("pipe in a list or blockquote")
+        # Anything else is a paragraph, which never contains a table
+
+    return tables
+
+
+def tables_to_html(tables: List[tuple]) -> str:
+    """Serialize a page's tables as the HTML sent to the LLM"""
+    parts = []
+    for headers, rows in tables:
+        if parts:
+            parts.append("\n")
+        parts.append("<table>\n<thead><tr>")
+        parts.extend(f"<th>{header}</th>" for header in headers)
+        parts.append("</tr></thead>\n<tbody>\n")
+        for row in rows:
+            parts.append("<tr>")
+            parts.extend(f"<td>{cell}</td>" for cell in row)
+            parts.append("</tr>\n")
+        parts.append("</tbody></table>\n")
+    return "".join(parts)
@@ -0,0 +1,10 @@
+"""
+Shared pytest setup for Bank Statement API
+The API modules live in the directory above, which is not a package: put it on
+sys.path so the tests can import them whichever directory pytest is run from
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
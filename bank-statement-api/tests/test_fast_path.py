@@ -0,0 +1,119 @@
+"""Signed and Dr/Cr amounts through FastPathMapper.map_page"""
+
+import pytest
+
+from fast_path import FastPathMapper, format_amount, parse_amount
+
+HDFC_HEADERS = ["Date", "Narration", "Chq./Ref.No.", "Withdrawal Amt.", "Deposit Amt.", "Closing Balance"]
+ICICI_HEADERS = ["Date", "Description", "Amount", "Type", "Balance"]
+
+
+@pytest.fixture
+def mapper():
+    return FastPathMapper()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1,250.50", 1250.5),
+    ("₹ 500", 500.0),
+    ("(200.00)", -200.0),
+    ("500.00 Dr", -500.0),
+    ("500.00 Cr", 500.0),
+    ("-75.25", -75.25),
+    ("", None),
+    ("N/A", None),
+])
+def test_parse_amount_sign(text, expected):
+    assert parse_amount(text) == expected
+
+
+@pytest.mark.parametrize("text, signed, expected", [
+    ("(200.00)", True, "-200.00"),
+    ("(200.00)", False, "200.00"),
+    ("500.00 Dr", True, "-500.00"),
+    ("500.00 Cr", True, "500.00"),
+    ("₹ 1,250.5", True, "1250.5"),
+    ("", True, ""),
+])
+def test_format_amount(text, signed, expected):
+    assert format_amount(text, signed=signed) == expected
+
+
+def test_overdrawn_balance_keeps_its_sign(mapper):
+    tables = [(HDFC_HEADERS, [
+        ["01/04/24", "ATM WITHDRAWAL", "1001", "300.00", "", "(100.00)"],
+        ["02/04/24", "SALARY", "1002", "", "50.00", "50.00 Dr"],
+        ["03/04/24", "UPI REFUND", "1003", "", "150.00", "100.00 Cr"],
+    ])]
+    rows, closing = mapper.map_page(tables, HDFC_HEADERS, opening_balance=200.0)
+
+    assert [row["Closing Balance"] for row in rows] == ["-100.00", "-50.00", "100.00"]
+    assert [row["Withdrawal Amt."] for row in rows] == ["300.00", "", ""]
+    assert [row["Deposit Amt."] for row in rows] == ["", "50.00", "150.00"]
+    assert closing == 100.0
+
+
+def test_debit_credit_cells_are_absolute(mapper):
+    tables = [(HDFC_HEADERS, [
+        ["01/04/24", "CHARGES", "1", "(25.00)", "", "975.00"],
+        ["02/04/24", "REVERSAL", "2", "", "25.00 Cr", "1,000.00"],
+    ])]
+    rows, _ = mapper.map_page(tables, HDFC_HEADERS, opening_balance=1000.0)
+
+    assert rows[0]["Withdrawal Amt."] == "25.00"
+    assert rows[1]["Deposit Amt."] == "25.00"
+
+
+def test_derived_amount_is_signed_without_a_direction_column(mapper):
+    tables = [(HDFC_HEADERS, [
+        ["01/04/24", "RENT", "1", "300.00", "", "700.00"],
+        ["02/04/24", "SALARY", "2", "", "1,000.00", "1,700.00"],
+    ])]
+    rows, _ = mapper.map_page(tables, ["Date", "Amount", "Balance"], opening_balance=1000.0)
+
+    assert [row["Amount"] for row in rows] == ["-300.00", "1000.00"]
+
+
+def test_derived_amount_is_absolute_with_a_type_column(mapper):
+    tables = [(HDFC_HEADERS, [
+        ["01/04/24", "RENT", "1", "300.00", "", "700.00"],
+        ["02/04/24", "SALARY", "2", "", "1,000.00", "1,700.00"],
+    ])]
+    rows, _ = mapper.map_page(tables, ["Date", "Amount", "Type", "Balance"], opening_balance=1000.0)
+
+    assert [(row["Amount"], row["Type"]) for row in rows] == [("300.00", "DR"), ("1000.00", "CR")]
+
+
+def test_amount_and_type_table(mapper):
+    tables = [(ICICI_HEADERS, [
+        ["01/04/24", "RENT", "300.00", "DR", "-100.00"],
+        ["02/04/24", "SALARY", "500.00", "CR", "400.00"],
+    ])]
+
+    signed, closing = mapper.map_page(tables, ["Date", "Amount", "Balance"], opening_balance=200.0)
+    assert [(row["Amount"], row["Balance"]) for row in signed] == [("-300.00", "-100.00"), ("500.00", "400.00")]
+    assert closing == 400.0
+
+    directed, _ = mapper.map_page(tables, ICICI_HEADERS, opening_balance=200.0)
+    assert [(row["Amount"], row["Type"]) for row in directed] == [("300.00", "DR"), ("500.00", "CR")]
+
+
+def test_dr_suffix_amount_is_a_debit(mapper):
+    tables = [(["Date", "Description", "Amount", "Balance"], [
+        ["01/04/24", "RENT", "300.00 Dr", "700.00 Cr"],
+        ["02/04/24", "SALARY", "1,000.00 Cr", "1,700.00 Cr"],
+    ])]
+    rows, _ = mapper.map_page(tables, ["Date", "Debit", "Credit", "Balance"], opening_balance=1000.0)
+
+    assert [(row["Debit"], row["Credit"], row["Balance"]) for row in rows] == [
+        ("300.00", "", "700.00"), ("", "1000.00", "1700.00"),
+    ]
+
+
+def test_running_balance_break_falls_back_to_the_llm(mapper):
+    tables = [(HDFC_HEADERS, [
+        ["01/04/24", "ATM WITHDRAWAL", "1", "300.00", "", "(100.00)"],
+        ["02/04/24", "SALARY", "2", "", "50.00", "50.00"],
+        ["03/04/24", "UPI", "3", "", "10.00", "60.00"],
+    ])]
+    assert mapper.map_page(tables, HDFC_HEADERS) is None
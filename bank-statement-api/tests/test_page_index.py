@@ -0,0 +1,85 @@
+"""Page fingerprint index: text fingerprint collisions, schema keys and image hash lookups"""
+
+import json
+
+import pytest
+
+from page_index import PageFingerprintIndex, schema_key, text_fingerprint
+
+HEADERS = ["Date", "Description", "Amount", "Balance"]
+
+
+def page(amount, description="UPI/1234/GROCERY"):
+    return [(HEADERS, [["01/04/24", description, amount, "700.00"]])]
+
+
+@pytest.mark.parametrize("first, second", [
+    ("200.00", "-200.00"),
+    ("200.00", "(200.00)"),
+    ("200.00", "+200.00"),
+    ("-200.00", "(200.00)"),
+    ("200.00 Dr", "200.00 Cr"),
+    ("200.00 Dr", "200.00"),
+    ("200.00", "2000.0"),
+])
+def test_different_amounts_do_not_collide(first, second):
+    assert text_fingerprint(page(first)) != text_fingerprint(page(second))
+
+
+@pytest.mark.parametrize("first, second", [
+    ("200.00 Dr", "200.00Dr"),
+    ("200.00 DR", "200.00 dr"),
+    (" 200.00 ", "200.00"),
+])
+def test_formatting_noise_is_ignored(first, second):
+    assert text_fingerprint(page(first)) == text_fingerprint(page(second))
+
+
+def test_case_and_whitespace_in_text_are_ignored():
+    assert text_fingerprint(page("200.00", "UPI/1234/GROCERY  STORE")) == text_fingerprint(page("200.00", "upi/1234/grocery store"))
+
+
+def test_row_and_table_boundaries_are_kept():
+    one_row = [(HEADERS, [["01/04/24", "RENT", "300.00", "700.00"]])]
+    split = [(HEADERS, [["01/04/24", "RENT"], ["300.00", "700.00"]])]
+
+    assert text_fingerprint(one_row) != text_fingerprint(split)
+
+
+def test_schema_key_covers_what_the_rows_depend_on():
+    columns = ["Date", "Description", "Amount"]
+    profile = {"max_side": 1600, "format": "jpeg", "quality": 85}
+    base = schema_key(columns, "model-a", "v1", profile)
+
+    assert base == schema_key(list(columns), "model-a", "v1", dict(reversed(list(profile.items()))))
+    assert base != schema_key(columns[::-1], "model-a", "v1", profile)
+    assert base != schema_key(columns, "model-b", "v1", profile)
+    assert base != schema_key(columns, "model-a", "v1+batch", profile)
+    assert base != schema_key(columns, "model-a", "v1", {**profile, "quality": 70})
+
+
+def test_lookup_matches_the_closest_image_hash_within_max_distance():
+    index = PageFingerprintIndex(":memory:", max_bytes=1 << 20, max_distance=2)
+    text_hash = text_fingerprint(page("200.00"))
+    rows = [{"Date": "01/04/24", "Amount": "200.00"}]
+    index.store(text_hash, "schema", "f0", rows)
+
+    assert index.lookup(text_hash, "schema", "f3") == rows
+    assert index.lookup(text_hash, "schema", "ff") is None
+    assert index.lookup(text_hash, "other schema", "f0") is None
+    assert index.lookup(text_fingerprint(page("-200.00")), "schema", "f0") is None
+    assert index.stats()["hits"] == 1
+    assert index.stats()["misses"] == 3
+
+
+def test_least_recently_used_pages_are_evicted():
+    rows = [{"Description": "x" * 100}]
+    size = len(json.dumps(rows))
+    index = PageFingerprintIndex(":memory:", max_bytes=2 * size, max_distance=0)
+    for text_hash in ("a", "b", "c"):
+        index.store(text_hash, "schema", "00", rows)
+
+    assert index.lookup("a", "schema", "00") is None
+    assert index.lookup("c", "schema", "00") == rows
+    assert index.stats()["entries"] == 2
+    assert index.stats()["bytes"] == 2 * size
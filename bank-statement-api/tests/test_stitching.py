@@ -0,0 +1,117 @@
+"""TableStitcher: header-less continuations, split rows, wrapped narrations and repeated rows"""
+
+from stitching import TableStitcher, stitch_page_tables
+
+HEADERS = ["Date", "Narration", "Withdrawal Amt.", "Deposit Amt.", "Closing Balance"]
+
+
+def test_headerless_continuation_gets_the_previous_headers():
+    stats = {}
+    pages = stitch_page_tables([
+        [(HEADERS, [["01/04/24", "RENT", "300.00", "", "700.00"]])],
+        # No header row on the next page: the first transaction was parsed as the header
+        [(["02/04/24", "SALARY", "", "1,000.00", "1,700.00"], [["03/04/24", "ATM", "200.00", "", "1,500.00"]])],
+    ], stats)
+
+    assert pages[1] == [(HEADERS, [
+        ["02/04/24", "SALARY", "", "1,000.00", "1,700.00"],
+        ["03/04/24", "ATM", "200.00", "", "1,500.00"],
+    ])]
+    assert stats["continuation_tables"] == 1
+
+
+def test_table_with_other_column_kinds_is_not_a_continuation():
+    summary = (["Opening Balance", "Total Debits", "Total Credits"], [["1,000.00", "300.00", "1,000.00"]])
+    pages = stitch_page_tables([
+        [(HEADERS, [["01/04/24", "RENT", "300.00", "", "700.00"]])],
+        [summary],
+    ])
+
+    assert pages[1] == [summary]
+
+
+def test_row_split_across_a_page_break_is_merged_on_its_first_page():
+    stats = {}
+    stitcher = TableStitcher(stats)
+    stitcher.add_page([(HEADERS, [
+        ["01/04/24", "RENT", "300.00", "", "700.00"],
+        ["02/04/24", "NEFT FROM EMPLOYER", "", "", ""],
+    ])])
+    # The last row may still be completed by the next page
+    assert stitcher.final_pages() == 0
+
+    stitcher.add_page([(HEADERS, [
+        ["", "SALARY APRIL", "", "1,000.00", "1,700.00"],
+        ["03/04/24", "ATM", "200.00", "", "1,500.00"],
+    ])])
+
+    assert stitcher.pages[0] == [(HEADERS, [
+        ["01/04/24", "RENT", "300.00", "", "700.00"],
+        ["02/04/24", "NEFT FROM EMPLOYER SALARY APRIL", "", "1,000.00", "1,700.00"],
+    ])]
+    assert stitcher.pages[1] == [(HEADERS, [["03/04/24", "ATM", "200.00", "", "1,500.00"]])]
+    assert stats["split_rows_merged"] == 1
+    assert stitcher.final_pages() == 1
+
+
+def test_split_row_on_a_headerless_page():
+    stats = {}
+    pages = stitch_page_tables([
+        [(HEADERS, [["02/04/24", "NEFT FROM EMPLOYER", "", "", ""]])],
+        [(["", "SALARY APRIL", "", "1,000.00", "1,700.00"], [["03/04/24", "ATM", "200.00", "", "1,500.00"]])],
+    ], stats)
+
+    assert pages[0] == [(HEADERS, [["02/04/24", "NEFT FROM EMPLOYER SALARY APRIL", "", "1,000.00", "1,700.00"]])]
+    assert pages[1] == [(HEADERS, [["03/04/24", "ATM", "200.00", "", "1,500.00"]])]
+    assert stats["continuation_tables"] == 1
+    assert stats["split_rows_merged"] == 1
+
+
+def test_wrapped_narration_lines_are_merged():
+    stats = {}
+    pages = stitch_page_tables([[(HEADERS, [
+        ["01/04/24", "UPI/1234/GROCERY", "300.00", "", "700.00"],
+        ["", "STORE BANGALORE", "", "", ""],
+        ["02/04/24", "ATM", "200.00", "", "500.00"],
+    ])]], stats)
+
+    assert pages[0][0][1] == [
+        ["01/04/24", "UPI/1234/GROCERY STORE BANGALORE", "300.00", "", "700.00"],
+        ["02/04/24", "ATM", "200.00", "", "500.00"],
+    ]
+    assert stats["wrapped_lines_merged"] == 1
+
+
+def test_repeated_header_and_transaction_rows_are_removed():
+    stats = {}
+    row = ["01/04/24", "RENT", "300.00", "", "700.00"]
+    pages = stitch_page_tables([
+        [(HEADERS, [row])],
+        [(HEADERS, [list(HEADERS), list(row), ["02/04/24", "ATM", "200.00", "", "500.00"]])],
+    ], stats)
+
+    assert pages[1] == [(HEADERS, [["02/04/24", "ATM", "200.00", "", "500.00"]])]
+    assert stats["header_rows_removed"] == 1
+    assert stats["duplicate_rows_removed"] == 1
+
+
+def test_tables_with_the_same_headers_on_a_page_are_merged():
+    stats = {}
+    pages = stitch_page_tables([[
+        (HEADERS, [["01/04/24", "RENT", "300.00", "", "700.00"]]),
+        (HEADERS, [["02/04/24", "ATM", "200.00", "", "500.00"]]),
+    ]], stats)
+
+    assert len(pages[0]) == 1
+    assert len(pages[0][0][1]) == 2
+    assert stats["tables_merged"] == 1
+
+
+def test_page_count_is_kept_when_tables_are_emptied():
+    pages = stitch_page_tables([
+        [(HEADERS, [["02/04/24", "NEFT FROM EMPLOYER", "", "", ""]])],
+        [(HEADERS, [["", "SALARY APRIL", "", "1,000.00", "1,700.00"]])],
+    ])
+
+    assert len(pages) == 2
+    assert pages[1] == []
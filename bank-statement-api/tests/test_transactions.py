@@ -0,0 +1,81 @@
+"""TransactionTable output typing: JSON numbers and nulls, CSV with fixed-precision amounts"""
+
+import csv
+import io
+import json
+
+import pytest
+
+from transactions import TransactionTable
+
+COLUMNS = ["Date", "Description", "Debit", "Credit", "Balance"]
+TYPES = {"Date": "string", "Description": "string", "Debit": "float", "Credit": "float", "Balance": "float"}
+
+ROWS = [
+    {"Date": "01/04/24", "Description": "RENT", "Debit": "1,250.50", "Credit": "", "Balance": "(250.50)"},
+    {"Date": "02/04/24", "Description": "SALARY", "Debit": None, "Credit": "₹ 1,000", "Balance": "749.50"},
+    {"Date": "03/04/24", "Description": "REVERSAL", "Debit": "-20.00", "Credit": "", "Balance": "729.50"},
+    {"Date": "04/04/24", "Description": None, "Debit": "see note", "Credit": "", "Balance": "1,000.00 Dr"},
+]
+
+
+@pytest.fixture
+def table():
+    return TransactionTable.from_rows(ROWS, COLUMNS, TYPES)
+
+
+def test_records_have_typed_amounts(table):
+    records = table.to_records()
+
+    assert records[0] == {"Date": "01/04/24", "Description": "RENT", "Debit": 1250.5, "Credit": None, "Balance": -250.5}
+    assert records[1]["Debit"] is None
+    assert records[1]["Credit"] == 1000.0
+    # Debit and credit columns carry the direction, so their amounts are absolute
+    assert records[2]["Debit"] == 20.0
+    assert records[3] == {"Date": "04/04/24", "Description": "", "Debit": "see note", "Credit": None, "Balance": -1000.0}
+
+
+def test_json_matches_records(table):
+    assert json.loads(table.to_json()) == table.to_records()
+    assert json.loads(table.to_json(add_ids=True)) == table.to_records(add_ids=True)
+    assert [record["id"] for record in table.to_records(add_ids=True)] == [1, 2, 3, 4]
+
+
+def test_json_amounts_are_numbers_or_null(table):
+    text = table.to_json()
+
+    assert '"Debit": 1250.5' in text
+    assert '"Credit": null' in text
+    assert '"Debit": "see note"' in text
+
+
+def test_empty_table_json():
+    assert TransactionTable(COLUMNS, TYPES).to_json() == "[]"
+
+
+def test_csv_amounts_have_two_decimals(table):
+    rows = list(csv.reader(io.StringIO(table.to_csv())))
+
+    assert rows[0] == COLUMNS
+    assert rows[1] == ["01/04/24", "RENT", "1250.50", "", "-250.50"]
+    assert rows[2] == ["02/04/24", "SALARY", "", "1000.00", "749.50"]
+    assert rows[3] == ["03/04/24", "REVERSAL", "20.00", "", "729.50"]
+    assert rows[4] == ["04/04/24", "", "see note", "", "-1000.00"]
+
+
+def test_csv_without_header_appends_to_a_csv(table):
+    header = TransactionTable(COLUMNS, TYPES).to_csv()
+    body = b"".join(table.iter_csv(header=False)).decode("utf-8")
+
+    assert header == ",".join(COLUMNS) + "\n"
+    assert header + body == table.to_csv()
+
+
+def test_csv_chunks_and_column_subset(table):
+    chunks = list(table.iter_csv(["Date", "Balance"], chunk_rows=2))
+
+    # Header, then two chunks of two rows
+    assert len(chunks) == 3
+    assert b"".join(chunks).decode("utf-8").splitlines() == [
+        "Date,Balance", "01/04/24,-250.50", "02/04/24,749.50", "03/04/24,729.50", "04/04/24,-1000.00",
+    ]
@@ -0,0 +1,369 @@
+"""
+Native text-layer extraction for Bank Statement API
+Reads the text layer of born-digital PDFs locally (PDFium via pypdfium2) and
+rebuilds their transaction tables from word positions, so only scanned or
+image-only pages need the remote OCR service. Tables come out in the same
+(headers, rows) shape as BankStatementProcessor.extract_all_table_parts, and
+go through the same stitching, fast path and LLM steps.
+
+pypdfium2 is imported on first use; without it every page goes to OCR.
+"""
+
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from fast_path import AMOUNT_ROLES, parse_amount, parse_date, table_roles
+from stitching import cell_kind, is_transaction_table
+
+logger = logging.getLogger(__name__)
+
+# Pages with fewer non-space characters than this have no usable text layer
+MIN_TEXT_CHARS = 20
+
+# Pages whose text is less than this share letters and digits, or more than
+# MAX_UNREADABLE_RATIO glyphs without a Unicode mapping (symbol fonts, missing
+# ToUnicode maps), are sent to OCR
+MIN_ALNUM_RATIO = 0.5
+MAX_UNREADABLE_RATIO = 0.05
+
+# Characters drawn further apart than this many font heights start a new word,
+# and words further apart than PHRASE_GAP font heights are separate cells
+WORD_GAP = 0.5
+PHRASE_GAP = 1.0
+
+# A vertical gap of more than this many row pitches ends a table (e.g. before a footer)
+MAX_ROW_GAP = 2.5
+
+# Pages without a rebuilt table but with images covering this share of the page
+# may hold the table as a picture and are sent to OCR
+IMAGE_COVERAGE = 0.25
+
+# Replacement character, controls and private-use code points: glyphs PDFium could not map
+_UNREADABLE = re.compile("[\ufffd\x00-\x08\x0e-\x1f\ue000-\uf8ff]")
+
+# PDFium is not thread-safe; documents are read one at a time (shared with page_index)
+pdfium_lock = threading.Lock()
+
+
+class TextSource:
+    TEXT_LAYER = "text_layer"  # Tables rebuilt from the PDF's own text
+    OCR = "ocr"  # Sent to the remote OCR service
+
+
+class Word:
+    """A word (or a phrase of nearby words) with its bounding box; y grows downwards"""
+
+    __slots__ = ("text", "x0", "x1", "top", "bottom")
+
+    def __init__(self, text: str, x0: float, x1: float, top: float, bottom: float):
+        self.text = text
+        self.x0 = x0
+        self.x1 = x1
+        self.top = top
+        self.bottom = bottom
+
+    @property
+    def height(self) -> float:
+        return max(self.bottom - self.top, 1.0)
+
+    @property
+    def middle(self) -> float:
+        return (self.top + self.bottom) / 2
+
+    def copy(self) -> "Word":
+        return Word(self.text, self.x0, self.x1, self.top, self.bottom)
+
+    def extend(self, other: "Word", separator: str = " ") -> None:
+        self.text += separator + other.text
+        self.x1 = max(self.x1, other.x1)
+        self.top = min(self.top, other.top)
+        self.bottom = max(self.bottom, other.bottom)
+
+
+class TextLayerPage:
+    """Text-layer result of one page: its tables, or the reason it needs OCR"""
+
+    def __init__(self, index: int, source: str, reason: str, tables: Optional[List[tuple]] = None):
+        self.index = index
+        self.source = source
+        self.reason = reason
+        self.tables = tables or []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"page": self.index + 1, "source": self.source, "reason": self.reason}
+
+
+def page_words(textpage, page_height: float) -> Tuple[List[Word], int, int, int]:
+    """
+    Words of a page from PDFium's character boxes
+
+    Returns:
+        (words, characters, letters and digits, unreadable characters)
+    """
+    count = textpage.count_chars()
+    text = textpage.get_text_range(0, count) if count else ""
+    words: List[Word] = []
+    current: Optional[Word] = None
+    chars = alnum = unreadable = 0
+    for index, char in enumerate(text):
+        if char.isspace():
+            current = None
+            continue
+        chars += 1
+        if char.isalnum():
+            alnum += 1
+        elif _UNREADABLE.match(char):
+            unreadable += 1
+        # Loose boxes span the font's full height, so characters of a line line up
+        left, bottom, right, top = textpage.get_charbox(index, loose=True)
+        word = Word(char, left, right, page_height - top, page_height - bottom)
+        if current is not None and word.x0 - current.x1 <= WORD_GAP * word.height \
+                and abs(word.middle - current.middle) < word.height / 2:
+            current.extend(word, separator="")
+        else:
+            current = word
+            words.append(current)
+    return words, chars, alnum, unreadable
+
+
+def group_lines(words: List[Word]) -> List[List[Word]]:
+    """Words grouped into lines by their vertical middle, top to bottom and each line left to right"""
+    lines: List[List[Word]] = []
+    line_middle = 0.0
+    for word in sorted(words, key=lambda w: (w.middle, w.x0)):
+        if lines and abs(word.middle - line_middle) <= word.height / 2:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+            line_middle = word.middle
+    return [sorted(line, key=lambda w: w.x0) for line in lines]
+
+
+def line_phrases(line: List[Word]) -> List[Word]:
+    """Join the words of a line separated by ordinary spaces into phrases; wider gaps separate cells"""
+    phrases: List[Word] = []
+    for word in line:
+        if phrases and word.x0 - phrases[-1].x1 <= PHRASE_GAP * max(word.height, phrases[-1].height):
+            phrases[-1].extend(word)
+        else:
+            phrases.append(word.copy())
+    return phrases
+
+
+def _is_transaction_line(phrases: List[Word]) -> bool:
+    """A line with a date and an amount, wherever they are"""
+    kinds = [cell_kind(phrase.text) for phrase in phrases]
+    return "date" in kinds and "amount" in kinds
+
+
+class _Columns:
+    """Column headers of a table and their horizontal extent, used to place the cells of a line"""
+
+    def __init__(self, headers: List[Word]):
+        self.headers = [header.text for header in headers]
+        self.spans = [(header.x0, header.x1) for header in headers]
+        self.roles = table_roles(self.headers)
+
+    def column_of(self, phrase: Word) -> int:
+        """Column whose header overlaps the phrase most, or the nearest one"""
+        best, best_score = 0, None
+        for column, (x0, x1) in enumerate(self.spans):
+            overlap = min(phrase.x1, x1) - max(phrase.x0, x0)
+            # Any overlap beats a gap; among gaps the smallest one wins
+            score = overlap if overlap > 0 else overlap - 1e6
+            if best_score is None or score > best_score:
+                best, best_score = column, score
+        return best
+
+    def cells(self, phrases: List[Word]) -> List[str]:
+        cells = [""] * len(self.headers)
+        for phrase in phrases:
+            column = self.column_of(phrase)
+            cells[column] = f"{cells[column]} {phrase.text}".strip()
+        return cells
+
+    def fit(self, cells: List[str]) -> Optional[Tuple[bool, bool]]:
+        """
+        How a line fits the columns
+
+        Returns:
+            None when an amount column holds text or a date column an amount,
+            otherwise (has a date, has an amount)
+        """
+        has_date = has_amount = False
+        for cell, role in zip(cells, self.roles):
+            if not cell:
+                continue
+            if role in ("date", "value_date"):
+                if parse_date(cell) is not None:
+                    has_date = True
+                elif parse_amount(cell) is not None:
+                    return None
+            elif role in AMOUNT_ROLES:
+                if parse_amount(cell) is None:
+                    return None
+                has_amount = True
+        return has_date, has_amount
+
+
+def page_tables(lines: List[List[Word]], carried: Optional[_Columns] = None
+                ) -> Tuple[List[tuple], Optional[_Columns], int]:
+    """
+    Rebuild the transaction tables of a page from its lines
+
+    A table starts at a line whose phrases are transaction headers (a date and an
+    amount column) or, on a page continuing a table without repeating its headers,
+    at a line with an amount that fits the carried columns. Every following line
+    becomes a row, its phrases placed in the column whose header they sit under;
+    lines with only text (wrapped narrations) and split rows are kept as they are,
+    for the stitcher to merge as it does with OCR tables. A table ends at a line
+    that does not fit its columns or after a vertical gap of several rows.
+
+    Args:
+        lines: Lines of the page, from group_lines
+        carried: Columns of the last table of the previous page
+
+    Returns:
+        (tables, columns to carry to the next page, transaction-like lines left outside tables)
+    """
+    tables: List[tuple] = []
+    columns: Optional[_Columns] = None
+    rows: List[List[str]] = []
+    last_bottom: Optional[float] = None
+    pitch: Optional[float] = None
+    unmatched = 0
+
+    def close():
+        if columns is not None and rows:
+            tables.append((list(columns.headers), rows))
+
+    for line in lines:
+        phrases = line_phrases(line)
+        if len(phrases) >= 3 and is_transaction_table([phrase.text for phrase in phrases]):
+            close()
+            columns, rows, pitch = _Columns(phrases), [], None
+            last_bottom = max(phrase.bottom for phrase in phrases)
+            carried = columns
+            continue
+
+        if columns is None and carried is not None and not tables and not unmatched:
+            fit = carried.fit(carried.cells(phrases))
+            if fit is not None and fit[1]:
+                columns, rows, last_bottom, pitch = carried, [], None, None
+
+        if columns is not None:
+            top = min(phrase.top for phrase in phrases)
+            gap = None if last_bottom is None else top - last_bottom
+            cells = columns.cells(phrases)
+            if (gap is None or pitch is None or gap <= MAX_ROW_GAP * pitch) and columns.fit(cells) is not None:
+                if gap is not None:
+                    row_pitch = max(gap, 0.0) + max(phrase.height for phrase in phrases)
+                    pitch = row_pitch if pitch is None else min(pitch, row_pitch)
+                last_bottom = max(phrase.bottom for phrase in phrases)
+                rows.append(cells)
+                continue
+            close()
+            columns, rows = None, []
+
+        if _is_transaction_line(phrases):
+            unmatched += 1
+
+    close()
+    return tables, carried, unmatched
+
+
+def image_coverage(page) -> float:
+    """Share of the page covered by its largest image"""
+    import pypdfium2.raw as pdfium_c
+
+    area = page.get_width() * page.get_height()
+    largest = 0.0
+    for image in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_IMAGE], max_depth=2):
+        left, bottom, right, top = image.get_bounds()
+        largest = max(largest, (right - left) * (top - bottom))
+    return largest / area if area else 0.0
+
+
+def classify_page(index: int, page, carried: Optional[_Columns]) -> Tuple[TextLayerPage, Optional[_Columns]]:
+    """Extract one page from its text layer, or decide that it needs OCR"""
+    textpage = page.get_textpage()
+    try:
+        words, chars, alnum, unreadable = page_words(textpage, page.get_height())
+    finally:
+        textpage.close()
+
+    if chars < MIN_TEXT_CHARS:
+        return TextLayerPage(index, TextSource.OCR, "no_text_layer"), carried
+    if alnum < MIN_ALNUM_RATIO * chars or unreadable > MAX_UNREADABLE_RATIO * chars:
+        return TextLayerPage(index, TextSource.OCR, "unreadable_text"), carried
+
+    tables, carried_out, unmatched = page_tables(group_lines(words), carried)
+    if unmatched:
+        # Rows the columns did not explain: OCR sees the whole page
+        return TextLayerPage(index, TextSource.OCR, "unmatched_rows"), carried_out
+    if tables:
+        return TextLayerPage(index, TextSource.TEXT_LAYER, "tables", tables), carried_out
+    if image_coverage(page) >= IMAGE_COVERAGE:
+        return TextLayerPage(index, TextSource.OCR, "image_content"), carried_out
+    return TextLayerPage(index, TextSource.TEXT_LAYER, "no_transactions"), carried_out
+
+
+def read_text_layer(pdf_path: str) -> Optional[List[TextLayerPage]]:
+    """
+    Classify and extract every page of a PDF from its text layer
+
+    Blocking: run it on an executor. Pages are read in order so a table's columns
+    carry over to the header-less continuation on the next page.
+
+    Returns:
+        One TextLayerPage per page, or None when pypdfium2 is not installed or the
+        PDF cannot be opened (every page then goes to OCR)
+    """
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        logger.warning("pypdfium2 is not installed; the text layer is not used")
+        return None
+
+    with pdfium_lock:
+        try:
+            document = pdfium.PdfDocument(pdf_path)
+        except pdfium.PdfiumError as e:
+            logger.info(f"Text layer not readable ({e}); using OCR for every page")
+            return None
+        try:
+            results = []
+            carried = None
+            for index in range(len(document)):
+                page = document[index]
+                try:
+                    result, carried = classify_page(index, page, carried)
+                except Exception:
+                    logger.exception(f"Text layer extraction failed on page {index + 1}")
+                    result = TextLayerPage(index, TextSource.OCR, "extraction_failed")
+                finally:
+                    page.close()
+                results.append(result)
+            return results
+        finally:
+            document.close()
+
+
+def page_count(pdf_path: str) -> Optional[int]:
+    """Number of pages of a PDF, or None when pypdfium2 is not installed or cannot open it"""
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        return None
+
+    with pdfium_lock:
+        try:
+            document = pdfium.PdfDocument(pdf_path)
+        except pdfium.PdfiumError:
+            return None
+        try:
+            return len(document)
+        finally:
+            document.close()
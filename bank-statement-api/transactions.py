@@ -0,0 +1,338 @@
+"""
+Columnar transaction store for Bank Statement API
+Keeps the transactions of a statement as typed column arrays instead of one dict
+per row: amount columns as float64, date columns as dictionary-encoded text with
+a parsed datetime64 view, and other text (descriptions) dictionary-encoded.
+Amount and date parsing, debit/credit signs and the running-balance check run
+vectorized over whole columns.
+"""
+
+import csv
+import io
+import itertools
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from fast_path import BALANCE_TOLERANCE, DATE_FORMATS, column_role
+
+# Rows buffered as dicts before they are converted to column arrays
+CHUNK_ROWS = 4096
+
+# Number of mismatching rows listed in a balance check
+MAX_LISTED_MISMATCHES = 20
+
+# CSV amounts have a fixed precision, as in bank statement exports (JSON keeps the float value)
+CSV_AMOUNT_FORMAT = "%.2f"
+
+AMOUNT_NOISE = r"[₹$€£,\s]|INR|Rs\.?"
+
+
+def parse_amounts(values: Iterable[Any]) -> np.ndarray:
+    """
+    Vectorized fast_path.parse_amount over a column
+
+    Numbers pass through; text such as '1,250.50', '₹ 500', '(200.00)' or '1,000.00 Dr'
+    is cleaned with column-wide string operations. Returns signed float64 values
+    ('Dr' and parentheses are negative), NaN for empty and non-numeric cells.
+    """
+    series = pd.Series(values, dtype=object)
+    numbers = pd.to_numeric(series, errors="coerce").astype("float64")
+    pending = numbers.isna() & series.notna()
+    if not pending.any():
+        return numbers.to_numpy()
+
+    text = series[pending].astype(str).str.strip()
+    suffix = text.str.extract(r"\b(dr|cr)\.?$", flags=re.IGNORECASE)[0].str.lower()
+    negative = suffix.eq("dr").fillna(False).astype(bool)
+    text = text.str.replace(r"\b(?:dr|cr)\.?$", "", case=False, regex=True).str.strip()
+    wrapped = text.str.startswith("(") & text.str.endswith(")")
+    text = text.where(~wrapped, text.str[1:-1])
+    minus = text.str.startswith("-")
+    text = text.where(~minus, text.str[1:])
+    negative = negative ^ wrapped ^ minus
+    text = text.str.replace(AMOUNT_NOISE, "", case=False, regex=True)
+    parsed = pd.to_numeric(text.where(text.str.fullmatch(r"\d+(\.\d+)?").fillna(False)), errors="coerce")
+    numbers[pending] = parsed.where(~negative, -parsed)
+    return numbers.to_numpy()
+
+
+def parse_dates(values: pd.Categorical) -> np.ndarray:
+    """
+    Vectorized fast_path.parse_date over a dictionary-encoded column
+
+    Each distinct date string is parsed once, trying DATE_FORMATS in order, and the
+    result is expanded through the codes. Returns datetime64[ns], NaT when unparseable.
+    """
+    categories = pd.Series(values.categories, dtype=object).astype(str)
+    normalized = categories.str.strip().str.replace(r"\s+", " ", regex=True)
+    parsed = pd.Series(pd.NaT, index=categories.index, dtype="datetime64[ns]")
+    for date_format in DATE_FORMATS:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(normalized[missing], format=date_format, errors="coerce")
+    lookup = np.append(parsed.to_numpy(), np.datetime64("NaT", "ns"))
+    return lookup[values.codes]  # code -1 (missing) picks the trailing NaT
+
+
+def _text_column(values: List[Any]) -> pd.Categorical:
+    return pd.Categorical([None if value is None else str(value) for value in values])
+
+
+def _output_amounts(values: np.ndarray) -> np.ndarray:
+    """Amounts as Python floats, None for missing (and non-finite) values"""
+    infinity = float("inf")
+    return np.array([value if abs(value) < infinity else None for value in values.tolist()], dtype=object)
+
+
+class TransactionTable:
+    """
+    Typed columnar container for the transactions of one statement
+
+    Column types come from BankStatementProcessor.infer_json_type: 'float' columns are
+    stored as float64 (debit and credit columns as absolute values, their sign being
+    implied by the column), 'string' columns whose name contains 'date' keep their
+    text and can be parsed with dates(), and all other columns are dictionary-encoded.
+    Amount cells that cannot be parsed keep their text, so output is never lost.
+    """
+
+    def __init__(self, columns: List[str], types: Dict[str, str]):
+        self.columns = list(columns)
+        self.types = {column: types.get(column, "string") for column in self.columns}
+        self.roles = {column: column_role(column) for column in self.columns}
+        self._pending: List[Dict[str, Any]] = []
+        self._chunks: List[Dict[str, Any]] = []
+        self._frame: Optional[pd.DataFrame] = None
+        self._unparsed: Dict[str, Dict[int, str]] = {}  # column -> row -> original amount text
+        self._rows = 0
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]], columns: List[str], types: Dict[str, str]) -> "TransactionTable":
+        table = cls(columns, types)
+        table.extend(rows)
+        return table
+
+    def __len__(self) -> int:
+        return self._rows + len(self._pending)
+
+    def is_amount(self, column: str) -> bool:
+        return self.types[column] == "float"
+
+    def is_date(self, column: str) -> bool:
+        return self.types[column] == "string" and "date" in column.lower()
+
+    def unparsed(self, column: str) -> Dict[int, str]:
+        """Row -> original text of the amount cells of a column that are not numbers"""
+        return self._unparsed.get(column, {})
+
+    def extend(self, rows: List[Dict[str, Any]]) -> None:
+        """Add rows (e.g. one page); they are converted to column arrays every CHUNK_ROWS rows"""
+        self._pending.extend(rows)
+        if len(self._pending) >= CHUNK_ROWS:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        chunk = {}
+        for column in self.columns:
+            values = [row.get(column) for row in rows]
+            if not self.is_amount(column):
+                chunk[column] = _text_column(values)
+                continue
+            amounts = parse_amounts(values)
+            if self.roles[column] in ("debit", "credit"):
+                amounts = np.abs(amounts)
+            for offset in np.flatnonzero(np.isnan(amounts)):
+                value = values[offset]
+                if value is not None and str(value).strip():
+                    self._unparsed.setdefault(column, {})[self._rows + int(offset)] = str(value)
+            chunk[column] = amounts
+        self._chunks.append(chunk)
+        self._rows += len(rows)
+        self._frame = None
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """All rows as a DataFrame of float64 and categorical columns"""
+        self._flush()
+        if self._frame is None:
+            data = {}
+            for column in self.columns:
+                parts = [chunk[column] for chunk in self._chunks]
+                if self.is_amount(column):
+                    data[column] = np.concatenate(parts) if parts else np.array([], dtype="float64")
+                else:
+                    data[column] = union_categoricals(parts) if parts else pd.Categorical([])
+            self._frame = pd.DataFrame(data, columns=self.columns)
+            self._chunks = [data]
+        return self._frame
+
+    def amounts(self, column: str) -> np.ndarray:
+        return self.frame[column].to_numpy()
+
+    def dates(self, column: str) -> np.ndarray:
+        """Parsed datetime64 values of a text column (NaT where the text is not a date)"""
+        return parse_dates(self.frame[column].array)
+
+    def nbytes(self) -> int:
+        """Memory held by the column arrays, including the category dictionaries"""
+        return int(self.frame.memory_usage(index=False, deep=True).sum())
+
+    def output_column(self, column: str) -> np.ndarray:
+        """
+        A column as output values: amounts as floats (None when missing, the original
+        text when it is not a number), other columns as text with missing values as ''
+        """
+        series = self.frame[column]
+        if not self.is_amount(column):
+            return series.astype(object).where(series.notna(), "").to_numpy()
+        values = _output_amounts(series.to_numpy())
+        for row, text in self.unparsed(column).items():
+            values[row] = text
+        return values
+
+    def output_columns(self) -> Dict[str, np.ndarray]:
+        return {column: self.output_column(column) for column in self.columns}
+
+    def _amount_text(self, column: str, missing: str, amount_format: str = "%r") -> List[str]:
+        """Amounts as text in amount_format (float repr by default), missing as the given text, unparsed text as is"""
+        infinity = float("inf")
+        values = [amount_format % value if abs(value) < infinity else missing
+                  for value in self.frame[column].to_numpy().tolist()]
+        for row, text in self.unparsed(column).items():
+            values[row] = text
+        return values
+
+    def to_records(self, add_ids: bool = False) -> List[Dict[str, Any]]:
+        """Rows as dicts, for callers that need them (optionally numbered with an 'id' field)"""
+        output = self.output_columns()
+        records = [dict(zip(self.columns, values)) for values in zip(*(output[column] for column in self.columns))]
+        if add_ids:
+            for index, record in enumerate(records, start=1):
+                record["id"] = index
+        return records
+
+    def to_json(self, add_ids: bool = False) -> str:
+        """
+        Rows as a JSON array, encoded column by column
+
+        Dictionary-encoded columns encode each distinct value once; every row is then
+        one %-format of a fixed object template over the pre-encoded values, without
+        building a dict per row.
+        """
+        if not len(self):
+            return "[]"
+        encoded = []
+        for column in self.columns:
+            series = self.frame[column]
+            if self.is_amount(column):
+                # Only unparsed text needs JSON encoding
+                values = self._amount_text(column, "null")
+                for row, text in self.unparsed(column).items():
+                    values[row] = json.dumps(text)
+            else:
+                categories = np.array([json.dumps(str(value)) for value in series.cat.categories] + ['""'], dtype=object)
+                values = categories[series.cat.codes.to_numpy()].tolist()
+            encoded.append(values)
+        fields = [json.dumps(column).replace("%", "%%") + ": %s" for column in self.columns]
+        if add_ids:
+            fields.append('"id": %d')
+            encoded.append(range(1, len(self) + 1))
+        template = "{" + ", ".join(fields) + "}"
+        return "[" + ", ".join([template % values for values in zip(*encoded)]) + "]"
+
+    def iter_csv(self, columns: Optional[List[str]] = None, chunk_rows: int = CHUNK_ROWS,
+                 header: bool = True) -> Iterator[bytes]:
+        """
+        CSV of the rows as UTF-8 chunks of chunk_rows rows, with the values of to_records (amounts with two decimals)
+
+        The header line is the first chunk unless header is False (for appending to a CSV).
+        """
+        columns = list(columns or self.columns)
+        # Amounts pre-formatted column-wise with two decimals, missing amounts left empty
+        output = {
+            column: self._amount_text(column, "", CSV_AMOUNT_FORMAT) if self.is_amount(column)
+            else self.output_column(column).tolist()
+            for column in columns
+        }
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+
+        def flush() -> bytes:
+            chunk = buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        if header:
+            writer.writerow(columns)
+            yield flush()
+        rows = zip(*(output[column] for column in columns))
+        while True:
+            chunk = list(itertools.islice(rows, chunk_rows))
+            if not chunk:
+                return
+            writer.writerows(chunk)
+            yield flush()
+
+    def to_csv(self, path_or_buffer=None, columns: Optional[List[str]] = None) -> Optional[str]:
+        """CSV of the rows; returns the text when no path or text buffer is given"""
+        if path_or_buffer is None:
+            return b"".join(self.iter_csv(columns)).decode("utf-8")
+        if isinstance(path_or_buffer, (str, os.PathLike)):
+            with open(path_or_buffer, "wb") as handle:
+                handle.writelines(self.iter_csv(columns))
+        else:
+            for chunk in self.iter_csv(columns):
+                path_or_buffer.write(chunk.decode("utf-8"))
+        return None
+
+    def balance_check(self) -> Optional[Dict[str, Any]]:
+        """
+        Vectorized running-balance validation: previous balance ± debit/credit = balance
+
+        Tries oldest-first and newest-first order and keeps the one with fewer breaks.
+        Returns None when the columns do not include a balance and debit/credit or amount.
+        """
+        by_role = {}
+        for column in self.columns:
+            if self.is_amount(column) or self.roles[column] == "type":
+                by_role.setdefault(self.roles[column], column)
+        if "balance" not in by_role or not ({"debit", "credit"} & set(by_role) or "amount" in by_role):
+            return None
+
+        balance = self.amounts(by_role["balance"])
+        if "debit" in by_role or "credit" in by_role:
+            debit = np.abs(self.amounts(by_role["debit"])) if "debit" in by_role else np.zeros(len(balance))
+            credit = np.abs(self.amounts(by_role["credit"])) if "credit" in by_role else np.zeros(len(balance))
+            delta = np.nan_to_num(credit) - np.nan_to_num(debit)
+        else:
+            amount = self.amounts(by_role["amount"])
+            is_debit = amount < 0
+            if "type" in by_role:
+                kind = self.frame[by_role["type"]].astype(str).str.strip().str.lower()
+                is_debit = is_debit | kind.str.startswith(("d", "w")).to_numpy()
+            delta = np.where(is_debit, -np.abs(amount), np.abs(amount))
+
+        checkable = ~np.isnan(balance[1:]) & ~np.isnan(balance[:-1]) & ~np.isnan(delta[1:])
+        forward = np.abs(balance[:-1] + delta[1:] - balance[1:]) < BALANCE_TOLERANCE
+        reverse = np.abs(balance[1:] + delta[:-1] - balance[:-1]) < BALANCE_TOLERANCE
+        forward_breaks = np.flatnonzero(checkable & ~forward)
+        reverse_breaks = np.flatnonzero(checkable & ~reverse)
+        direction, breaks = ("forward", forward_breaks) if len(forward_breaks) <= len(reverse_breaks) \
+            else ("reverse", reverse_breaks)
+        return {
+            "checked": int(checkable.sum()),
+            "order": direction,
+            "mismatches": len(breaks),
+            # 1-based numbers of the rows whose balance does not follow from the row before
+            "mismatched_rows": [int(row) + 2 for row in breaks[:MAX_LISTED_MISMATCHES]],
+        }
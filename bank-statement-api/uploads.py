@@ -0,0 +1,144 @@
+"""
+Upload storage for Bank Statement API
+Streams uploaded PDFs to temporary files in fixed-size chunks, enforcing the size
+limit and computing the SHA-256 in the same pass. The stored file is the single
+copy of the PDF read by the OCR upload, the cache key and the page rasterizer.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import BinaryIO, Iterable, Optional
+
+from fastapi import HTTPException
+
+# Bytes read and written per step while storing an upload
+CHUNK_SIZE = 1024 * 1024
+
+# Allowance for the multipart boundaries and form fields sent alongside the PDF
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the maximum file size"""
+
+    def __init__(self, name: str, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"{name} exceeds the maximum file size of {max_size / (1024 * 1024):g} MB")
+
+
+class StoredPdf:
+    """A PDF stored in a temporary file, with its size and SHA-256"""
+
+    def __init__(self, path: str, size: int, sha256: str):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+
+    def open(self) -> BinaryIO:
+        return open(self.path, "rb")
+
+    def delete(self) -> None:
+        """Remove the file; safe to call more than once"""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def store_pdf_chunks(chunks: Iterable[bytes], name: str, max_size: Optional[int], temp_dir: str,
+                     suffix: str = ".pdf") -> StoredPdf:
+    """
+    Write chunks to a temporary file, hashing them as they are written
+
+    Raises:
+        UploadTooLargeError: As soon as more than max_size bytes arrived (the file is removed)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(suffix=suffix, dir=temp_dir, delete=False) as output:
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise UploadTooLargeError(name, max_size)
+                digest.update(chunk)
+                output.write(chunk)
+        except BaseException:
+            output.close()
+            os.unlink(output.name)
+            raise
+    return StoredPdf(output.name, size, digest.hexdigest())
+
+
+def iter_chunks(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterable[bytes]:
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def store_pdf_stream(stream: BinaryIO, name: str, max_size: Optional[int], temp_dir: str,
+                     suffix: str = ".pdf") -> StoredPdf:
+    """Store a readable binary stream (an upload or an archive member) chunk by chunk"""
+    return store_pdf_chunks(iter_chunks(stream), name, max_size, temp_dir, suffix)
+
+
+def store_pdf_bytes(pdf_bytes: bytes, temp_dir: str) -> StoredPdf:
+    """Store PDF content that is already in memory"""
+    return store_pdf_chunks([pdf_bytes], "PDF", None, temp_dir)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware rejecting uploads larger than max_file_size on the given paths
+
+    The request body may exceed max_file_size by MULTIPART_OVERHEAD_BYTES. Requests whose Content-Length is already too large get a 413 before any of the
+    body is read; bodies without (or with an understated) Content-Length are cut
+    off with a 413 as soon as the received bytes pass the limit.
+    """
+
+    def __init__(self, app, paths: Iterable[str], max_file_size: int):
+        self.app = app
+        self.paths = set(paths)
+        self.max_file_size = max_file_size
+        self.max_body_size = max_file_size + MULTIPART_OVERHEAD_BYTES
+
+    def too_large_detail(self) -> str:
+        return str(UploadTooLargeError("Upload", self.max_file_size))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_body_size:
+            await self.reject(send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # Raised inside the request handler while the form is parsed, so the
+                    # exception handlers turn it into a regular 413 response
+                    raise HTTPException(status_code=413, detail=self.too_large_detail())
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def reject(self, send) -> None:
+        body = json.dumps({"detail": self.too_large_detail()}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})